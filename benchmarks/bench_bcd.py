@@ -0,0 +1,67 @@
+# Time the boustrophedon decomposition for polygons with a growing number of holes.
+# Usage: python benchmarks/bench_bcd.py [largest number of holes] [--rectilinear]
+import sys
+import time
+
+import numpy as np
+
+import trajgenpy.bindings as bindings
+
+
+def grid_of_holes(count, rng):
+    # Rotated square holes on a jittered grid, so that no two vertices share an x coordinate
+    side = int(np.ceil(np.sqrt(count)))
+    size = 10.0 * side
+    boundary = np.array([[0, 0], [size, 0], [size, size], [0, size]], dtype=np.float64)
+    holes = []
+    for i in range(count):
+        x, y = 10.0 * (i % side), 10.0 * (i // side)
+        cx, cy = rng.uniform(4, 6, 2)
+        half, angle = rng.uniform(1, 2.5), rng.uniform(0.1, np.pi / 2 - 0.1)
+        corners = angle + np.arange(4) * np.pi / 2
+        # Clockwise, as expected for holes
+        holes.append(
+            np.column_stack(
+                [x + cx + half * np.cos(-corners), y + cy + half * np.sin(-corners)]
+            )
+        )
+    return boundary, holes
+
+
+def rectilinear_grid_of_holes(count, rng):
+    # Axis-aligned rectangles in aligned rows and columns, like building footprints.
+    # Every hole has vertical edges and shares its x coordinates with its column.
+    side = int(np.ceil(np.sqrt(count)))
+    size = 10.0 * side
+    boundary = np.array([[0, 0], [size, 0], [size, size], [0, size]], dtype=np.float64)
+    holes = []
+    for i in range(count):
+        x, y = 10.0 * (i % side) + 2, 10.0 * (i // side) + 2
+        height = rng.uniform(2, 6)
+        holes.append(
+            np.array([[x, y], [x, y + height], [x + 6, y + height], [x + 6, y]])
+        )
+    return boundary, holes
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--rectilinear"]
+    largest = int(args[0]) if args else 3000
+    make_holes = (
+        rectilinear_grid_of_holes if "--rectilinear" in sys.argv else grid_of_holes
+    )
+    rng = np.random.default_rng(0)
+
+    print(f"{'holes':>6} {'cells':>6} {'time [s]':>9} {'per hole [ms]':>14}")
+    count = 10
+    while count <= largest:
+        boundary, holes = make_holes(count, rng)
+
+        start = time.perf_counter()
+        _, offsets = bindings.decompose_in_direction_array(boundary, holes, (1.0, 0.0))
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"{count:>6} {len(offsets) - 1:>6} {elapsed:>9.3f} {elapsed / count * 1000:>14.3f}"
+        )
+        count *= 3
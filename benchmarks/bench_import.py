@@ -0,0 +1,39 @@
+# Measure the import time of trajgenpy in a fresh interpreter.
+# Usage: python benchmarks/bench_import.py [module] [repeat]
+import subprocess
+import sys
+
+HEAVY_MODULES = ("osmnx", "geopandas", "contextily", "matplotlib")
+
+
+def import_time(module):
+    # -X importtime reports the cumulative time of every import in microseconds
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented, the top level ones add up to the total
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+        loaded.add(name.strip().split(".")[0])
+    return total / 1e6, sorted(loaded.intersection(HEAVY_MODULES))
+
+
+if __name__ == "__main__":
+    module = sys.argv[1] if len(sys.argv) > 1 else "trajgenpy.Geometries"
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    times = []
+    for _ in range(repeat):
+        seconds, heavy = import_time(module)
+        times.append(seconds)
+    print(f"import {module}: best {min(times) * 1000:.1f} ms over {repeat} runs")
+    print(f"heavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
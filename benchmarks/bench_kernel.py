@@ -0,0 +1,59 @@
+# Compare the exact and inexact kernels on the Amagerværket environment.
+# Usage: python benchmarks/bench_kernel.py [path/to/environment.json]
+import sys
+import time
+from pathlib import Path
+
+import geojson
+import shapely
+from trajgenpy import Geometries
+
+DATA = Path(__file__).resolve().parent.parent / "data" / "amagervaerket.json"
+
+
+def load_environment(path):
+    with open(path) as f:
+        collection = geojson.load(f)
+    features = {feature["id"]: feature for feature in collection["features"]}
+    boundary = shapely.geometry.shape(features["boundary"]["geometry"])
+    obstacles = shapely.geometry.shape(features["obstacles"]["geometry"])
+    return boundary, obstacles
+
+
+def timeit(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    boundary, obstacles = load_environment(sys.argv[1] if len(sys.argv) > 1 else DATA)
+    offset = Geometries.get_sweep_offset(0.1, 30, 90)
+
+    results = {}
+    for kernel in Geometries.KERNELS:
+        results[kernel] = (
+            timeit(
+                lambda kernel=kernel: Geometries.decompose_polygon(
+                    boundary, obstacles=obstacles, kernel=kernel
+                )
+            ),
+            timeit(
+                lambda kernel=kernel: Geometries.plan_coverage(
+                    boundary, obstacles=obstacles, sweep_offset=offset, kernel=kernel
+                )
+            ),
+        )
+        print(
+            f"{kernel:>8}: decompose {results[kernel][0] * 1000:8.1f} ms, "
+            f"decompose + sweeps {results[kernel][1] * 1000:8.1f} ms"
+        )
+
+    exact, inexact = results["exact"], results["inexact"]
+    print(
+        f" speedup: decompose {exact[0] / inexact[0]:.2f}x, "
+        f"decompose + sweeps {exact[1] / inexact[1]:.2f}x"
+    )
@@ -0,0 +1,33 @@
+# Time the obstacle preparation of decompose_polygon for many building footprints.
+# Usage: python benchmarks/bench_obstacles.py [number of obstacles]
+import sys
+import time
+
+import numpy as np
+import shapely
+
+from trajgenpy import Geometries
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = np.random.default_rng(0)
+    size = 20 * np.sqrt(count)
+
+    # Random rectangular footprints, some of them overlap or cross the boundary
+    boundary = shapely.box(0, 0, size, size)
+    corners = rng.uniform(-10, size, (count, 2))
+    extents = rng.uniform(2, 12, (count, 2))
+    obstacles = shapely.MultiPolygon(
+        list(shapely.box(*corners.T, *(corners + extents).T))
+    )
+
+    start = time.perf_counter()
+    prepared, holes = Geometries._prepare_obstacles(
+        boundary, obstacles, min_obstacle_area=10.0
+    )
+    elapsed = time.perf_counter() - start
+
+    overlapping = shapely.STRtree(holes).query(holes, predicate="overlaps")
+    print(f"{count} obstacles prepared in {elapsed * 1000:.1f} ms")
+    print(f"{len(holes)} holes, {overlapping.shape[1]} overlapping pairs")
+    print(f"boundary area {boundary.area:.0f} -> {prepared.area:.0f}")
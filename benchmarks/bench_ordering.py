@@ -0,0 +1,45 @@
+# Time full-area planning with cell ordering and compare the transits to the decomposition order.
+# Usage: python benchmarks/bench_ordering.py [number of obstacles]
+import math
+import sys
+import time
+
+import numpy as np
+import shapely
+
+from trajgenpy import Geometries, Planning
+
+
+def transit_distance(sweeps, start):
+    position, total = start, 0.0
+    for cell_sweeps in sweeps:
+        total += math.dist(position, cell_sweeps[0].coords[0])
+        position = cell_sweeps[-1].coords[-1]
+    return total
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rng = np.random.default_rng(0)
+    size = 100 * np.sqrt(count)
+
+    boundary = shapely.box(0, 0, size, size)
+    corners = rng.uniform(10, size - 40, (count, 2))
+    extents = rng.uniform(5, 30, (count, 2))
+    obstacles = shapely.union_all(shapely.box(*corners.T, *(corners + extents).T))
+
+    start = time.perf_counter()
+    cells, sweeps, _ = Geometries.plan_coverage(boundary, obstacles, sweep_offset=5.0)
+    planning = time.perf_counter() - start
+
+    for budget in (0.0, 0.1, 0.5):
+        start = time.perf_counter()
+        _, ordered, transit = Planning.order_coverage(
+            cells, sweeps, start=(0, 0), time_budget=budget
+        )
+        ordering = time.perf_counter() - start
+        print(
+            f"{len(cells)} cells, budget {budget:.1f} s: planning {planning:.3f} s, "
+            f"ordering {ordering:.3f} s, transit {transit_distance(sweeps, (0, 0)):.0f} "
+            f"-> {transit:.0f}"
+        )
@@ -0,0 +1,22 @@
+# Time the sweep generation for long and narrow cells with densely sampled boundaries.
+# Usage: python benchmarks/bench_sweep.py [sweep offset]
+import sys
+import time
+
+import numpy as np
+
+import trajgenpy.bindings as bindings
+
+if __name__ == "__main__":
+    sweep_offset = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+
+    print(f"{'vertices':>8} {'sweeps':>7} {'time [s]':>9}")
+    for count in (100, 1000, 10000):
+        angles = np.linspace(0, 2 * np.pi, count, endpoint=False)
+        ellipse = np.column_stack([1000 * np.cos(angles), 50 * np.sin(angles)])
+
+        start = time.perf_counter()
+        sweeps = bindings.generate_sweeps_array(ellipse, sweep_offset)
+        elapsed = time.perf_counter() - start
+
+        print(f"{count:>8} {len(sweeps):>7} {elapsed:>9.3f}")
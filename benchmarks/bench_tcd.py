@@ -0,0 +1,54 @@
+# Compare the runtime and cell count of the boustrophedon and trapezoidal decompositions
+# on the Amagerværket environment.
+# Usage: python benchmarks/bench_tcd.py [path/to/environment.json]
+import sys
+import time
+from pathlib import Path
+
+import geojson
+import shapely
+from trajgenpy import Geometries
+
+DATA = Path(__file__).resolve().parent.parent / "data" / "amagervaerket.json"
+
+
+def load_environment(path):
+    with open(path) as f:
+        collection = geojson.load(f)
+    features = {feature["id"]: feature for feature in collection["features"]}
+    boundary = shapely.geometry.shape(features["boundary"]["geometry"])
+    obstacles = shapely.geometry.shape(features["obstacles"]["geometry"])
+    return boundary, obstacles
+
+
+def timeit(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    boundary, obstacles = load_environment(sys.argv[1] if len(sys.argv) > 1 else DATA)
+    offset = Geometries.get_sweep_offset(0.1, 30, 90)
+
+    print(
+        f"{'method':>6} {'decompose [ms]':>15} {'cells':>6} {'plan [ms]':>10} {'sweeps':>7}"
+    )
+    for method in Geometries.DECOMPOSITION_METHODS:
+        decompose_time, cells = timeit(
+            lambda method=method: Geometries.decompose_polygon(
+                boundary, obstacles=obstacles, method=method
+            )
+        )
+        plan_time, (_, sweeps, _) = timeit(
+            lambda method=method: Geometries.plan_coverage(
+                boundary, obstacles=obstacles, sweep_offset=offset, method=method
+            )
+        )
+        print(
+            f"{method:>6} {decompose_time * 1000:>15.1f} {len(cells):>6} "
+            f"{plan_time * 1000:>10.1f} {sum(len(s) for s in sweeps):>7}"
+        )
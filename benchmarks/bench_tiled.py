@@ -0,0 +1,41 @@
+# Compare plan_coverage with plan_coverage_tiled for growing square areas with random obstacles.
+# Usage: python benchmarks/bench_tiled.py [number of workers]
+import sys
+import time
+
+import numpy as np
+import shapely
+
+from trajgenpy import Geometries, Planning
+
+
+def random_area(size, rng):
+    boundary = shapely.box(0, 0, size, size)
+    count = int((size / 200) ** 2)
+    corners = rng.uniform(0, size - 30, (count, 2))
+    extents = rng.uniform(5, 30, (count, 2))
+    obstacles = shapely.union_all(shapely.box(*corners.T, *(corners + extents).T))
+    return boundary, obstacles
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    rng = np.random.default_rng(0)
+
+    print(f"{'area [km2]':>10} {'global [s]':>11} {'tiled [s]':>10} {'sweeps':>8}")
+    for size in (1000, 2000, 4000, 8000):
+        boundary, obstacles = random_area(size, rng)
+
+        start = time.perf_counter()
+        Geometries.plan_coverage(boundary, obstacles, sweep_offset=20.0)
+        global_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, sweeps = Planning.plan_coverage_tiled(
+            boundary, obstacles, tile_size=1000.0, sweep_offset=20.0, workers=workers
+        )
+        tiled_time = time.perf_counter() - start
+
+        print(
+            f"{size * size / 1e6:>10.1f} {global_time:>11.3f} {tiled_time:>10.3f} {len(sweeps):>8}"
+        )
@@ -0,0 +1,52 @@
+# Time the visibility graph construction and shortest path queries for polygons with many holes.
+# Usage: python benchmarks/bench_visibility.py [number of queries]
+import sys
+import time
+
+import numpy as np
+
+import trajgenpy.bindings as bindings
+
+
+def grid_of_holes(count, rng):
+    # Square holes on a jittered grid, every hole is in its own grid cell
+    side = int(np.ceil(np.sqrt(count)))
+    size = 10.0 * side
+    boundary = np.array([[0, 0], [size, 0], [size, size], [0, size]], dtype=np.float64)
+    holes = []
+    for i in range(count):
+        x, y = 10.0 * (i % side), 10.0 * (i // side)
+        cx, cy = rng.uniform(4, 6, 2)
+        half, angle = rng.uniform(1, 2.5), rng.uniform(0, np.pi / 2)
+        corners = angle + np.arange(4) * np.pi / 2
+        # Clockwise, as expected for holes
+        holes.append(
+            np.column_stack(
+                [x + cx + half * np.cos(-corners), y + cy + half * np.sin(-corners)]
+            )
+        )
+    return boundary, holes, size
+
+
+if __name__ == "__main__":
+    queries = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rng = np.random.default_rng(0)
+
+    print(f"{'holes':>6} {'nodes':>6} {'edges':>8} {'build [s]':>10} {'query [ms]':>11}")
+    for count in (10, 100, 1000):
+        boundary, holes, size = grid_of_holes(count, rng)
+
+        start = time.perf_counter()
+        graph = bindings.VisibilityGraph(boundary, holes)
+        build = time.perf_counter() - start
+
+        # Grid lines between the holes are always free
+        lines = 10.0 * rng.integers(0, int(size / 10), (queries, 2, 2)) + 0.5
+        start = time.perf_counter()
+        for source, goal in lines:
+            graph.shortest_path(source, goal)
+        query = (time.perf_counter() - start) / queries
+
+        print(
+            f"{count:>6} {graph.num_nodes:>6} {graph.num_edges:>8} {build:>10.3f} {query * 1000:>11.2f}"
+        )
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 import trajgenpy.bindings as bindings
 
@@ -62,6 +63,305 @@ def test_create_sweeps():
     assert len(segments) == 20
 
 
+def test_decompose_multithreaded():
+    outer_boundary = bindings.Polygon_2(
+        [
+            bindings.Point_2(0, 0),
+            bindings.Point_2(10, 0),
+            bindings.Point_2(12, 6),
+            bindings.Point_2(10, 10),
+            bindings.Point_2(0, 10),
+        ]
+    )
+    pwh = bindings.Polygon_with_holes_2(outer_boundary)
+    pwh.add_hole(
+        bindings.Polygon_2(
+            [
+                bindings.Point_2(2, 2),
+                bindings.Point_2(2, 4),
+                bindings.Point_2(4, 4),
+                bindings.Point_2(4, 2),
+            ]
+        )
+    )
+    pwh.add_hole(
+        bindings.Polygon_2(
+            [
+                bindings.Point_2(6, 5),
+                bindings.Point_2(7, 8),
+                bindings.Point_2(8, 5),
+            ]
+        )
+    )
+
+    serial = bindings.decompose(pwh)
+    assert len(serial) > 0
+    for num_threads in [0, 2, 4]:
+        parallel = bindings.decompose(pwh, num_threads=num_threads)
+        assert [[(v.x, v.y) for v in poly] for poly in parallel] == [
+            [(v.x, v.y) for v in poly] for poly in serial
+        ]
+
+
+def test_polygon_vertices_array():
+    polygon = bindings.Polygon_2(
+        [
+            bindings.Point_2(0, 0),
+            bindings.Point_2(1, 0),
+            bindings.Point_2(1, 1),
+        ]
+    )
+    vertices = polygon.vertices_array
+    assert vertices.shape == (3, 2)
+    assert vertices.tolist() == [[0, 0], [1, 0], [1, 1]]
+
+
+def test_decompose_array():
+    boundary = np.array([[0, 0], [0, 10], [10, 10], [10, 0]], dtype=np.float64)
+    hole = np.array([[2, 2], [2, 8], [8, 8], [8, 2]], dtype=np.float64)
+
+    coords, offsets = bindings.decompose_array(boundary, [hole])
+    assert coords.shape[1] == 2
+    assert offsets[0] == 0
+    assert offsets[-1] == len(coords)
+
+    outer_poly = bindings.Polygon_with_holes_2(
+        bindings.Polygon_2([bindings.Point_2(x, y) for x, y in boundary])
+    )
+    outer_poly.add_hole(bindings.Polygon_2([bindings.Point_2(x, y) for x, y in hole]))
+    expected = bindings.decompose(outer_poly)
+    assert len(offsets) == len(expected) + 1
+    for i, poly in enumerate(expected):
+        cell = coords[offsets[i] : offsets[i + 1]]
+        assert cell.tolist() == poly.vertices_array.tolist()
+
+
+def test_generate_sweeps_array():
+    square = np.array([[0, 0], [10, 0], [10, 10], [0, 10]], dtype=np.float64)
+    polygon = bindings.Polygon_2([bindings.Point_2(x, y) for x, y in square])
+
+    for connect_sweeps in [False, True]:
+        segments = bindings.generate_sweeps_array(
+            square, 0.5, connect_sweeps=connect_sweeps
+        )
+        expected = bindings.generate_sweeps(
+            polygon, 0.5, connect_sweeps=connect_sweeps
+        )
+        assert segments.shape == (len(expected), 2, 2)
+        assert segments.tolist() == [
+            [[seg.source.x, seg.source.y], [seg.target.x, seg.target.y]]
+            for seg in expected
+        ]
+
+
+def test_generate_sweeps_array_closed_ring():
+    square = np.array([[0, 0], [10, 0], [10, 10], [0, 10]], dtype=np.float64)
+    closed = np.vstack([square, square[:1]])
+    assert (
+        bindings.generate_sweeps_array(closed, 0.5).tolist()
+        == bindings.generate_sweeps_array(square, 0.5).tolist()
+    )
+
+
+def test_generate_sweeps_array_dense_polygon():
+    # A long and narrow ellipse with many vertices, every sweep crosses only two edges
+    angles = np.linspace(0, 2 * np.pi, 400, endpoint=False)
+    ellipse = np.column_stack([100 * np.cos(angles), 5 * np.sin(angles)])
+
+    sweeps = bindings.generate_sweeps_array(ellipse, 0.5)
+    assert len(sweeps) >= 20
+    # Every sweep ends on the boundary
+    x, y = sweeps.reshape(-1, 2).T
+    assert np.all((x / 100) ** 2 + (y / 5) ** 2 <= 1 + 1e-9)
+    assert np.all((x / 100) ** 2 + (y / 5) ** 2 >= np.cos(np.pi / 400) ** 2 - 1e-9)
+
+
+def test_plan_coverage():
+    boundary = np.array([[0, 0], [0, 10], [10, 10], [10, 0]], dtype=np.float64)
+    hole = np.array([[2, 2], [2, 8], [8, 8], [8, 2]], dtype=np.float64)
+
+    result = bindings.plan_coverage(boundary, [hole], 0.5)
+    coords, offsets = bindings.decompose_array(boundary, [hole])
+    assert result["cells"].tolist() == coords.tolist()
+    assert result["cell_offsets"].tolist() == offsets.tolist()
+
+    num_cells = len(offsets) - 1
+    assert result["directions"].shape == (num_cells, 2)
+    assert len(result["sweep_offsets"]) == num_cells + 1
+    assert result["sweep_offsets"][-1] == len(result["sweeps"])
+    assert result["sweeps"].shape[1:] == (2, 2)
+    assert len(result["sweeps"]) == 20
+
+
+def test_decompose_direction_pruning():
+    # A long straight edge and a finely sampled arc with a different direction per edge
+    angles = np.linspace(0, np.pi, 65)
+    arc = np.column_stack([50 + 50 * np.cos(angles), 20 + 20 * np.sin(angles)])
+    boundary = np.vstack([[[0, 0], [100, 0]], arc])
+
+    def cell_area(coords, offsets):
+        area = 0.0
+        for i in range(len(offsets) - 1):
+            x, y = coords[offsets[i] : offsets[i + 1]].T
+            area += 0.5 * abs(np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1)))
+        return area
+
+    area = cell_area(boundary, [0, len(boundary)])
+    full = bindings.decompose_array(boundary, [])
+    assert cell_area(*full) == pytest.approx(area)
+    for tolerance, max_directions in [(0.2, 0), (0.0, 4), (0.1, 1)]:
+        pruned = bindings.decompose_array(
+            boundary, [], angular_tolerance=tolerance, max_directions=max_directions
+        )
+        assert cell_area(*pruned) == pytest.approx(area)
+
+    # Only the direction of the long edge is left, the decomposition is perpendicular to it
+    result = bindings.plan_coverage(boundary, [], 5.0, max_directions=1)
+    assert abs(result["decomposition_direction"][0]) == pytest.approx(0.0, abs=1e-9)
+
+
+def test_decompose_rectilinear_holes():
+    def area(coords):
+        x, y = np.asarray(coords).T
+        return 0.5 * abs(np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1)))
+
+    # A boundary with collinear vertices and steps, which are vertical edges between
+    # two vertices that have one edge to the left and one to the right
+    boundary = np.array(
+        [
+            [0, 0],
+            [60, 0],
+            [120, 0],
+            [120, -10],
+            [200, -10],
+            [200, 100],
+            [100, 100],
+            [80, 100],
+            [80, 110],
+            [0, 110],
+        ],
+        dtype=np.float64,
+    )
+    # Axis-aligned holes that do not share x coordinates, some with a collinear vertex
+    holes = []
+    for k in range(30):
+        x, y = 5 + 6.3 * k, 10 + (37 * k) % 70
+        top = [[x, y + 10], [x + 1.5, y + 10]] if k % 2 else [[x, y + 10]]
+        holes.append(np.array([[x, y], *top, [x + 3, y + 10], [x + 3, y]]))
+    free_area = area(boundary) - sum(area(hole) for hole in holes)
+
+    coords, offsets = bindings.decompose_in_direction_array(boundary, holes, (1.0, 0.0))
+    cells = [coords[offsets[i] : offsets[i + 1]] for i in range(len(offsets) - 1)]
+    # Every hole closes one cell where it starts and two where it ends, the last
+    # cell is closed by the boundary
+    assert len(cells) == 3 * len(holes) + 1
+    assert all(area(cell) > 0 for cell in cells)
+    assert sum(area(cell) for cell in cells) == pytest.approx(free_area)
+
+    coords, offsets = bindings.decompose_array(boundary, holes, method="tcd")
+    tcd_area = sum(
+        area(coords[offsets[i] : offsets[i + 1]]) for i in range(len(offsets) - 1)
+    )
+    assert tcd_area == pytest.approx(free_area)
+
+
+def test_decompose_aligned_holes():
+    def area(coords):
+        x, y = np.asarray(coords).T
+        return 0.5 * abs(np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1)))
+
+    # Building footprints in aligned rows and columns, many vertices share an x
+    # coordinate and the cells between the holes of a column have no width
+    boundary = np.array([[0, 0], [100, 0], [100, 100], [0, 100]], dtype=np.float64)
+    holes = [
+        np.array([[x, y], [x, y + 2 + j % 3], [x + 6, y + 2 + j % 3], [x + 6, y]])
+        for i, x in enumerate(range(2, 100, 10))
+        for j, y in enumerate(range(2 + i % 2, 100, 10))
+    ]
+    free_area = area(boundary) - sum(area(hole) for hole in holes)
+
+    for direction in [(1.0, 0.0), (0.0, 1.0)]:
+        coords, offsets = bindings.decompose_in_direction_array(
+            boundary, holes, direction
+        )
+        cells = [coords[offsets[i] : offsets[i + 1]] for i in range(len(offsets) - 1)]
+        assert 0 < len(cells) <= 3 * len(holes) + 1
+        assert all(area(cell) > 0 for cell in cells)
+        assert sum(area(cell) for cell in cells) == pytest.approx(free_area)
+
+
+def test_visibility_graph_cache():
+    # An L-shaped cell, the sweeps are connected around the concave corner
+    cell = np.array(
+        [[0, 0], [10, 0], [10, 10], [5, 10], [5, 5], [0, 5]], dtype=np.float64
+    )
+    bindings.clear_visibility_graph_cache()
+
+    bindings.generate_sweeps_array(cell, 0.5)
+    assert bindings.visibility_graph_cache_size() == 0
+
+    first = bindings.generate_sweeps_array(cell, 0.5, connect_sweeps=True)
+    assert bindings.visibility_graph_cache_size() == 1
+    second = bindings.generate_sweeps_array(cell, 0.5, connect_sweeps=True)
+    assert bindings.visibility_graph_cache_size() == 1
+    assert first.tolist() == second.tolist()
+
+    bindings.clear_visibility_graph_cache()
+    assert bindings.visibility_graph_cache_size() == 0
+
+
+def test_visibility_graph():
+    boundary = np.array([[0, 0], [10, 0], [10, 10], [0, 10]], dtype=np.float64)
+    hole = np.array([[4, 4], [6, 4], [6, 6], [4, 6]], dtype=np.float64)
+    graph = bindings.VisibilityGraph(boundary, [hole])
+
+    # The hole corners, each one sees its two neighbours
+    assert graph.num_nodes == 4
+    assert graph.num_edges == 4
+
+    path = graph.shortest_path((1, 5), (9, 5))
+    assert path.shape == (4, 2)
+    assert path[0].tolist() == [1, 5]
+    assert path[-1].tolist() == [9, 5]
+    assert graph.shortest_path((1, 1), (9, 1)).tolist() == [[1, 1], [9, 1]]
+
+    # Opposite corners of the hole are two sides apart
+    distances = graph.distance_matrix()
+    assert distances.shape == (4, 4)
+    assert np.allclose(distances, distances.T)
+    assert np.allclose(np.diag(distances), 0)
+    assert np.allclose(np.sort(distances, axis=1), [[0, 2, 2, 4]] * 4)
+    assert sorted(map(tuple, graph.nodes.tolist())) == [(4, 4), (4, 6), (6, 4), (6, 6)]
+
+
+def test_visibility_graph_path_trees():
+    boundary = np.array([[0, 0], [40, 0], [40, 40], [0, 40]], dtype=np.float64)
+    holes = [
+        np.array([[x, y], [x, y + 4], [x + 4, y + 4], [x + 4, y]], dtype=np.float64)
+        for x in range(3, 40, 10)
+        for y in range(3, 40, 10)
+    ]
+    graph = bindings.VisibilityGraph(boundary, holes)
+
+    def length(path):
+        return np.linalg.norm(np.diff(path, axis=0), axis=1).sum()
+
+    rng = np.random.default_rng(0)
+    # Points on the free grid lines between the holes
+    points = 10.0 * rng.integers(0, 4, (20, 2, 2)) + 1.0
+    for start, goal in points:
+        trees = graph.shortest_path(start, goal)
+        search = graph.shortest_path(start, goal, use_path_trees=False)
+        assert length(trees) == pytest.approx(length(search))
+        assert trees[0].tolist() == start.tolist()
+        assert trees[-1].tolist() == goal.tolist()
+
+
+def test_invalid_coordinate_array():
+    with pytest.raises(ValueError, match="Coordinates must be an"):
+        bindings.generate_sweeps_array(np.zeros(4), 0.5)
+
+
 # Run the tests
 if __name__ == "__main__":
     pytest.main(["-v", "-x", "tests/test_bindings.py"])
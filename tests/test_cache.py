@@ -0,0 +1,77 @@
+import os
+import time
+
+import geopandas as gpd
+import pytest
+import shapely
+from shapely.geometry import Polygon
+from trajgenpy import Cache, Query
+from trajgenpy.Geometries import GeoPolygon
+
+
+def test_disk_cache_roundtrip(tmp_path):
+    cache = Cache.DiskCache(tmp_path)
+    key = Cache.make_key("polygon", b"\x01\x02")
+    assert cache.get(key) is None
+
+    cache.set(key, {"values": [1, 2, 3]})
+    assert cache.get(key) == {"values": [1, 2, 3]}
+    assert key in cache
+    assert key != Cache.make_key("polygon\x01", b"\x02")
+
+    cache.delete(key)
+    assert key not in cache
+
+
+def test_disk_cache_ttl(tmp_path):
+    cache = Cache.DiskCache(tmp_path, ttl=0.05)
+    cache.set("entry", 1)
+    assert cache.get("entry") == 1
+    time.sleep(0.1)
+    assert cache.get("entry") is None
+    assert cache.size() == 0
+
+
+def test_disk_cache_lru_eviction(tmp_path):
+    cache = Cache.DiskCache(tmp_path)
+    for index, name in enumerate(["a", "b", "c"]):
+        cache.set(name, bytes(1000))
+        # Make the order of use explicit, as the file times may be too coarse
+        os.utime(tmp_path / f"{name}.pkl", (index, index))
+    cache.get("a")
+
+    cache.max_bytes = 2 * (cache.size() // 3)
+    cache.evict()
+    assert "b" not in cache
+    assert "a" in cache
+    assert "c" in cache
+
+
+def test_query_features_cache(tmp_path, monkeypatch):
+    calls = []
+
+    def features_from_polygon(_polygon, tags):
+        calls.append(tags)
+        return gpd.GeoDataFrame(
+            {"building": ["yes", None], "highway": [None, "path"]},
+            geometry=[
+                Polygon([(0, 0), (1, 0), (1, 1)]),
+                shapely.LineString([(0, 0), (2, 2)]),
+            ],
+        )
+
+    monkeypatch.setattr(Query.ox, "features_from_polygon", features_from_polygon)
+    cache = Cache.DiskCache(tmp_path)
+    area = GeoPolygon(Polygon([(0, 0), (2, 0), (2, 2), (0, 2)]))
+
+    first = Query.query_features(area, {"building": True, "highway": ["path"]}, cache)
+    second = Query.query_features(area, {"highway": "path", "building": True}, cache)
+    assert len(calls) == 1
+    assert first.keys() == second.keys()
+    for tag in first:
+        assert first[tag].equals(second[tag])
+    assert first["building"].area == pytest.approx(0.5)
+
+    with pytest.raises(LookupError):
+        Query.query_features(area, {"natural": True}, cache, offline=True)
+    assert len(calls) == 1
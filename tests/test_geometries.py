@@ -1,8 +1,11 @@
 import math
 
+import numpy as np
+import pyproj
 import pytest
+import shapely
 from shapely.geometry import LineString, Point, Polygon
-from trajgenpy import Geometries, Logging
+from trajgenpy import Cache, Geometries, Logging, Tracing
 
 log = Logging.get_logger()
 
@@ -115,6 +118,31 @@ def test_polygon_data():
     ]
 
 
+def test_multi_polygon_crs_roundtrip():
+    polygon = Polygon(
+        [(12.620, 55.683), (12.637, 55.683), (12.637, 55.691), (12.620, 55.691)],
+        [[(12.625, 55.686), (12.630, 55.686), (12.630, 55.688), (12.625, 55.688)]],
+    )
+    other = Polygon([(12.640, 55.683), (12.645, 55.683), (12.645, 55.686)])
+    multi_polygon = Geometries.GeoMultiPolygon([polygon, other])
+
+    multi_polygon.set_crs("EPSG:3857")
+    assert len(multi_polygon.geometry.geoms) == 2
+    assert len(multi_polygon.geometry.geoms[0].interiors) == 1
+    transformer = pyproj.Transformer.from_crs("WGS84", "EPSG:3857", always_xy=True)
+    assert multi_polygon.geometry.geoms[1].exterior.coords[1] == pytest.approx(
+        transformer.transform(12.645, 55.683)
+    )
+
+    multi_polygon.set_crs("WGS84")
+    assert multi_polygon.geometry.equals_exact(
+        shapely.MultiPolygon([polygon, other]), 1e-9
+    )
+    assert Geometries.get_transformer("WGS84", "EPSG:3857") is (
+        Geometries.get_transformer("WGS84", "EPSG:3857")
+    )
+
+
 def test_valid_inputs():
     assert math.isclose(Geometries.get_sweep_offset(0.1, 30, 90), 54, abs_tol=1e-3)
     assert math.isclose(Geometries.get_sweep_offset(0.5, 40, 120), 69.282, abs_tol=1e-3)
@@ -242,6 +270,261 @@ def test_sweep_gen_with_obstacle():
         assert len(sweeps_disconnected) != 1
 
 
+def test_plan_coverage():
+    poly = Polygon(
+        [
+            (12.620400, 55.687962),
+            (12.632788, 55.691589),
+            (12.637446, 55.687689),
+            (12.624924, 55.683489),
+            (12.628446, 55.686489),
+            (12.625924, 55.688489),
+            (12.630924, 55.689489),
+        ]
+    )
+    geo_poly = Geometries.GeoPolygon(poly)
+    geo_poly.set_crs("EPSG:3857")
+
+    hole = Geometries.GeoPolygon(
+        Polygon([(12.629, 55.688), (12.631, 55.689), (12.632, 55.687)])
+    )
+    hole.set_crs("EPSG:3857")
+
+    offset = Geometries.get_sweep_offset(0.1, 30, 90)
+    cells, sweeps, directions = Geometries.plan_coverage(
+        geo_poly.get_geometry(),
+        obstacles=hole.get_geometry(),
+        sweep_offset=offset,
+        connect_sweeps=True,
+    )
+
+    polygon_list = Geometries.decompose_polygon(
+        geo_poly.get_geometry(), obstacles=hole.get_geometry()
+    )
+    assert len(cells) == len(polygon_list)
+    assert pytest.approx(sum([cell.area for cell in cells])) == sum(
+        [poly.area for poly in polygon_list]
+    )
+    assert len(sweeps) == len(cells)
+    assert directions.shape == (len(cells), 2)
+    for cell_sweeps in sweeps:
+        assert len(cell_sweeps) == 1
+
+
+def test_plan_coverage_inexact_kernel():
+    boundary = Polygon([(0, 0), (100, 0), (100, 100), (0, 100)])
+    obstacle = Polygon([(20, 20), (40, 20), (40, 40), (20, 40)])
+
+    exact = Geometries.decompose_polygon(boundary, obstacles=obstacle)
+    inexact = Geometries.decompose_polygon(
+        boundary, obstacles=obstacle, kernel="inexact"
+    )
+    assert len(inexact) == len(exact)
+    assert pytest.approx(sum([cell.area for cell in inexact])) == 9600
+
+    cells, sweeps, _ = Geometries.plan_coverage(
+        boundary, obstacles=obstacle, sweep_offset=5, kernel="inexact"
+    )
+    assert len(cells) == len(exact)
+    assert len(sweeps) == len(cells)
+
+    with pytest.raises(ValueError, match="Kernel must be one of"):
+        Geometries.decompose_polygon(boundary, kernel="approximate")
+
+
+def test_inexact_kernel_falls_back_to_exact(monkeypatch):
+    boundary = Polygon([(0, 0), (100, 0), (100, 100), (0, 100)])
+    obstacle = Polygon([(20, 20), (40, 20), (40, 40), (20, 40)])
+    cell = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)])
+    exact_cells = Geometries.decompose_polygon(boundary, obstacles=obstacle)
+    exact_sweeps = Geometries.generate_sweep_pattern(cell, 1)
+
+    def fail(*_):
+        msg = "Inexact construction failed"
+        raise RuntimeError(msg)
+
+    def missing_area(*_):
+        return np.array([[0, 0], [1, 0], [1, 1]], dtype=np.float64), np.array([0, 3])
+
+    def outside_cell(*_):
+        return np.array([[[0, 50], [10, 50]]], dtype=np.float64)
+
+    Tracing.reset()
+    Tracing.enable()
+    try:
+        for decompose, sweep in [(fail, fail), (missing_area, outside_cell)]:
+            monkeypatch.setattr(
+                Geometries.bindings_inexact, "decompose_array", decompose
+            )
+            monkeypatch.setattr(
+                Geometries.bindings_inexact, "generate_sweeps_array", sweep
+            )
+            cells = Geometries.decompose_polygon(
+                boundary, obstacles=obstacle, kernel="inexact"
+            )
+            assert [c.wkt for c in cells] == [c.wkt for c in exact_cells]
+            sweeps = Geometries.generate_sweep_pattern(cell, 1, kernel="inexact")
+            assert [s.wkt for s in sweeps] == [s.wkt for s in exact_sweeps]
+        summary = Tracing.summary()
+    finally:
+        Tracing.disable()
+        Tracing.reset()
+    assert summary["decompose_polygon"]["counters"]["exact_fallbacks"] == 2
+    assert summary["generate_sweep_pattern"]["counters"]["exact_fallbacks"] == 2
+
+
+def test_decompose_tcd():
+    boundary = Polygon([(0, 0), (100, 0), (100, 100), (0, 100)])
+    obstacle = Polygon([(20, 20), (40, 30), (30, 50)])
+
+    bcd = Geometries.decompose_polygon(boundary, obstacles=obstacle)
+    tcd = Geometries.decompose_polygon(boundary, obstacles=obstacle, method="tcd")
+    assert len(tcd) >= len(bcd)
+    assert pytest.approx(sum([cell.area for cell in tcd])) == 10000 - obstacle.area
+    for cell in tcd:
+        assert pytest.approx(cell.convex_hull.area) == cell.area
+
+    # The inexact kernel is not used for the trapezoidal decomposition
+    cells, sweeps, _ = Geometries.plan_coverage(
+        boundary, obstacles=obstacle, sweep_offset=5, kernel="inexact", method="tcd"
+    )
+    assert len(cells) == len(tcd)
+    assert len(sweeps) == len(cells)
+
+    with pytest.raises(ValueError, match="Decomposition method must be one of"):
+        Geometries.decompose_polygon(boundary, method="quadtree")
+
+
+def test_prepare_obstacles():
+    boundary = Polygon([(0, 0), (100, 0), (100, 100), (0, 100)])
+    obstacles = shapely.MultiPolygon(
+        [
+            Polygon([(10, 10), (20, 10), (20, 20), (10, 20)]),
+            Polygon([(15, 15), (25, 15), (25, 25), (15, 25)]),  # Overlaps the first
+            Polygon([(50, 50), (60, 50), (60, 60), (50, 60)]),
+            Polygon([(90, 40), (110, 40), (110, 50), (90, 50)]),  # Crosses the edge
+            Polygon([(200, 200), (210, 200), (210, 210)]),  # Outside
+            Polygon([(70, 70), (70.1, 70), (70.1, 70.1), (70, 70.1)]),  # Too small
+        ]
+    )
+    boundary, holes = Geometries._prepare_obstacles(
+        boundary, obstacles, min_obstacle_area=1.0
+    )
+
+    assert boundary.area == pytest.approx(100 * 100 + 10 * 10)
+    assert len(boundary.interiors) == 0
+    assert len(holes) == 2
+    assert holes[0].area == pytest.approx(175)
+    assert holes[1].area == pytest.approx(100)
+    assert not shapely.intersects(holes[0], holes[1])
+
+
+def test_simplify_polygon():
+    # A noisy circle with a hole, like a high resolution coastline
+    angles = np.linspace(0, 2 * np.pi, 2000, endpoint=False)
+    radius = 100 + np.random.default_rng(0).uniform(-0.5, 0.5, len(angles))
+    boundary = Polygon(
+        np.column_stack([radius * np.cos(angles), radius * np.sin(angles)])
+    )
+    hole = shapely.Point(0, 0).buffer(20, quad_segs=64)
+
+    simplified, holes, deviation = Geometries.simplify_polygon(
+        boundary, [hole], tolerance=1.0
+    )
+    assert deviation <= 1.0
+    assert shapely.get_num_coordinates(simplified) < 200
+    assert len(holes) == 1
+    assert shapely.Polygon(simplified.exterior, [holes[0].exterior]).is_valid
+
+    simplified, holes, deviation = Geometries.simplify_polygon(
+        boundary, [hole], max_vertices=60
+    )
+    assert shapely.get_num_coordinates(simplified) + len(holes[0].exterior.coords) <= 62
+    assert 0 < deviation < 10
+
+    cells = Geometries.decompose_polygon(boundary, hole, max_vertices=60)
+    assert pytest.approx(sum(cell.area for cell in cells), rel=0.05) == (
+        boundary.area - hole.area
+    )
+
+
+def test_decomposition_cache(tmp_path, monkeypatch):
+    boundary = Polygon([(0, 0), (100, 0), (100, 100), (0, 100)])
+    obstacles = shapely.MultiPolygon(
+        [
+            Polygon([(20, 20), (40, 20), (40, 40), (20, 40)]),
+            Polygon([(60, 60), (80, 60), (80, 80), (60, 80)]),
+        ]
+    )
+    cache = Geometries.DecompositionCache(
+        disk=Cache.DiskCache(tmp_path / "decompositions")
+    )
+    cells = Geometries.decompose_polygon(boundary, obstacles, cache=cache)
+
+    # The same geometries with another orientation, start vertex and obstacle order
+    reordered = shapely.MultiPolygon(list(reversed(obstacles.geoms)))
+    rotated = Polygon([(100, 0), (0, 0), (0, 100), (100, 100)])
+    make_key = Geometries.DecompositionCache.make_key
+    assert make_key(rotated, reordered) == make_key(boundary, obstacles)
+
+    calls = []
+    decompose_array = Geometries.bindings.decompose_array
+    monkeypatch.setattr(
+        Geometries.bindings,
+        "decompose_array",
+        lambda *args: calls.append(args) or decompose_array(*args),
+    )
+    cached = Geometries.decompose_polygon(rotated, reordered, cache=cache)
+    assert calls == []
+    assert [cell.wkb for cell in cached] == [cell.wkb for cell in cells]
+    assert cache.stats() == {"hits": 1, "disk_hits": 0, "misses": 1, "entries": 1}
+
+    # A new process only has the entries on disk
+    restarted = Geometries.DecompositionCache(disk=cache.disk)
+    restored = Geometries.decompose_polygon(boundary, obstacles, cache=restarted)
+    assert len(restored) == len(cells)
+    assert restarted.stats()["disk_hits"] == 1
+
+    Geometries.decompose_polygon(
+        boundary, obstacles, min_obstacle_area=500, cache=cache
+    )
+    assert len(calls) == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_prepare_obstacles_touching_at_vertex():
+    boundary = Polygon([(0, 0), (100, 0), (100, 100), (0, 100)])
+    obstacles = shapely.MultiPolygon(
+        [
+            shapely.box(10, 10, 20, 20),
+            shapely.box(20, 20, 30, 30),  # Touches the first at a corner
+            shapely.box(100, 50, 110, 60),  # Touches the boundary at an edge
+            shapely.box(100, 100, 110, 110),  # Touches the boundary at a corner
+        ]
+    )
+    boundary, holes = Geometries._prepare_obstacles(boundary, obstacles)
+
+    assert isinstance(boundary, Polygon)
+    assert boundary.area == pytest.approx(100 * 100 + 10 * 10)
+    assert sorted(hole.area for hole in holes) == pytest.approx([100, 100])
+    assert shapely.union_all(holes).equals(
+        shapely.union_all([shapely.box(10, 10, 20, 20), shapely.box(20, 20, 30, 30)])
+    )
+
+
+def test_touching_components():
+    geometries = np.array(
+        [
+            shapely.box(0, 0, 1, 1),
+            shapely.box(5, 5, 6, 6),
+            shapely.box(1, 0, 2, 1),
+            shapely.box(2, 0, 3, 1),
+        ]
+    )
+    labels = Geometries.touching_components(geometries)
+    assert labels.tolist() == [0, 1, 0, 0]
+
+
 def test_shapely_polygon_to_cgal():
     poly = Polygon(
         [
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+import trajgenpy
+
+
+def test_geometries_does_not_import_gis_stack():
+    # Run in a fresh interpreter, as the test session may already have loaded them
+    code = (
+        "import sys, trajgenpy.Geometries;"
+        "print(','.join(m for m in ('osmnx', 'geopandas', 'contextily', 'matplotlib')"
+        " if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_lazy_modules():
+    assert "Query" in dir(trajgenpy)
+    assert trajgenpy.Utils.normalize_coordinates is not None
+    assert trajgenpy.Query.query_features is not None
@@ -0,0 +1,37 @@
+import logging
+
+import pytest
+from trajgenpy import Logging
+
+
+@pytest.fixture
+def logger():
+    yield Logging.get_logger()
+    # Restore the defaults, the environment of the test is still set here
+    Logging.init_logger(level="DEBUG", use_queue=False)
+
+
+def test_level_from_environment(monkeypatch, logger):
+    monkeypatch.setenv(Logging.LOG_LEVEL_ENV, "warning")
+    Logging.init_logger()
+    assert logger.level == logging.WARNING
+    assert not logger.isEnabledFor(logging.DEBUG)
+
+    Logging.set_level("DEBUG")
+    assert logger.isEnabledFor(logging.DEBUG)
+
+
+def test_queue_handler(capsys, logger):
+    Logging.init_logger(level="INFO", use_queue=True)
+    assert len(logger.handlers) == 1
+    assert isinstance(logger.handlers[0], logging.handlers.QueueHandler)
+
+    logger.info("Planned %d cells", 3)
+    logger.debug("Not emitted")
+    # Stopping the listener flushes the queue
+    Logging.init_logger(level="INFO", use_queue=False)
+
+    output = capsys.readouterr().err
+    assert "Planned 3 cells" in output
+    assert "test_logging.py" in output
+    assert "Not emitted" not in output
@@ -0,0 +1,178 @@
+import itertools
+import json
+import math
+
+import geojson
+import numpy as np
+import pytest
+import shapely
+import shapely.affinity
+from shapely.geometry import LineString, Polygon
+from trajgenpy import Geometries, Planning
+
+
+def square(x, y, size=100):
+    return Polygon([(x, y), (x + size, y), (x + size, y + size), (x, y + size)])
+
+
+def test_plan_coverage_batch():
+    obstacle = square(20, 20, 20)
+    areas = [(square(0, 0), obstacle), (square(200, 0), None), (square(400, 0, 50), None)]
+    plans = Planning.plan_coverage_batch(areas, sweep_offset=10, workers=2)
+
+    assert [plan.index for plan in plans] == [0, 1, 2]
+    assert all(plan.ok for plan in plans)
+    for plan, (boundary, obstacles) in zip(plans, areas, strict=True):
+        cells, sweeps, directions = plan.to_shapely()
+        expected = Geometries.plan_coverage(boundary, obstacles, sweep_offset=10)
+        assert len(cells) == len(expected[0])
+        assert [len(s) for s in sweeps] == [len(s) for s in expected[1]]
+        assert directions.shape == (len(cells), 2)
+
+
+def test_plan_coverage_batch_failure_does_not_abort():
+    invalid = (square(200, 0), LineString([(0, 0), (1, 1)]))
+    areas = [square(0, 0), invalid, square(400, 0)]
+    plans = Planning.plan_coverage_batch(areas, sweep_offset=10, workers=1)
+
+    assert [plan.ok for plan in plans] == [True, False, True]
+    assert "ValueError" in plans[1].error
+    with pytest.raises(RuntimeError):
+        plans[1].to_shapely()
+
+
+def test_plan_coverage_batch_feature_collection():
+    area = Polygon(square(0, 0).exterior, [square(20, 20, 20).exterior.coords])
+    collection = geojson.FeatureCollection(
+        [geojson.Feature(geometry=area), geojson.Feature(geometry=square(200, 0))]
+    )
+    plans = Planning.plan_coverage_batch(collection, sweep_offset=10, workers=1)
+
+    assert len(plans) == 2
+    cells, _, _ = plans[0].to_shapely()
+    assert pytest.approx(shapely.area(cells).sum()) == 9600
+
+
+def test_incremental_planner():
+    boundary = square(0, 0)
+    obstacle = square(20, 20, 20)
+    planner = Planning.IncrementalPlanner(boundary, obstacle, sweep_offset=5)
+    assert planner.direction.shape == (2,)
+    cells_before = list(planner.cells)
+
+    added = square(70, 70, 10)
+    new_cells = planner.add_obstacle(added)
+    assert new_cells[-1] == len(planner.cells) - 1
+    # Cells away from the new obstacle and their sweeps are reused
+    untouched = [cell for cell in cells_before if not cell.intersects(added)]
+    assert all(any(cell is kept for kept in planner.cells) for cell in untouched)
+    assert pytest.approx(shapely.area(planner.cells).sum()) == 10000 - 400 - 100
+    assert not any(cell.overlaps(added) for cell in planner.cells)
+
+    cells, sweeps = planner.coverage()
+    assert len(sweeps) == len(cells)
+    assert all(len(cell_sweeps) > 0 for cell_sweeps in sweeps)
+
+    planner.remove_obstacle(added)
+    assert pytest.approx(shapely.area(planner.cells).sum()) == 10000 - 400
+    with pytest.raises(ValueError, match="not part of the plan"):
+        planner.remove_obstacle(added)
+
+
+def test_iter_coverage_writer(tmp_path):
+    boundary = square(0, 0)
+    obstacle = square(20, 20, 20)
+    cells, sweeps, _ = Geometries.plan_coverage(boundary, obstacle, sweep_offset=10)
+
+    path = tmp_path / "plan.geojsonl"
+    with Planning.GeoJSONSeqWriter(path, crs="EPSG:3857") as writer:
+        for index, cell, cell_sweeps in Planning.iter_coverage(
+            boundary, obstacle, sweep_offset=10
+        ):
+            writer.write_cell(index, cell, cell_sweeps)
+    assert writer.count == 2 * len(cells)
+
+    with path.open() as f:
+        features = [json.loads(line) for line in f]
+    assert [feature["properties"]["cell"] for feature in features[::2]] == list(
+        range(len(cells))
+    )
+    lines = [shapely.geometry.shape(f["geometry"]) for f in features[1::2]]
+    assert [len(line.geoms) for line in lines] == [len(s) for s in sweeps]
+    # The output is in WGS84
+    assert abs(features[0]["geometry"]["coordinates"][0][0][0]) < 0.01
+
+
+def test_plan_coverage_tiled():
+    boundary = square(0, 0)
+    obstacle = square(40, 40, 20)
+    cells, sweeps = Planning.plan_coverage_tiled(
+        boundary, obstacle, tile_size=30, sweep_offset=5, align=False
+    )
+    sweeps = np.array(sweeps)
+
+    assert pytest.approx(shapely.area(cells).sum()) == 10000 - 400
+    # Sweeps that cross the tile borders are stitched, only the obstacle splits them
+    y = np.array([line.coords[0][1] for line in sweeps])
+    assert sorted(set(y.round(6))) == pytest.approx(np.arange(2.5, 100, 5))
+    crossing = (y > 40) & (y < 60)
+    assert len(sweeps) == 20 + crossing.sum() / 2
+    assert all(line.length == pytest.approx(100) for line in sweeps[~crossing])
+    assert all(line.length == pytest.approx(40) for line in sweeps[crossing])
+    # Boustrophedon order
+    assert sweeps[0].coords[0][0] < sweeps[0].coords[1][0]
+    assert sweeps[1].coords[0][0] > sweeps[1].coords[1][0]
+    first, second = np.flatnonzero(y == 47.5)
+    assert sweeps[first].coords[0][0] == pytest.approx(100)
+    assert sweeps[second].coords[1][0] == pytest.approx(0)
+
+
+def test_plan_coverage_tiled_aligned():
+    rectangle = Polygon([(0, 0), (200, 0), (200, 50), (0, 50)])
+    rotated = shapely.affinity.rotate(rectangle, 30)
+    _, sweeps = Planning.plan_coverage_tiled(rotated, tile_size=60, sweep_offset=10)
+    assert len(sweeps) == 5
+    assert all(line.length == pytest.approx(200) for line in sweeps)
+
+
+def test_order_coverage():
+    # Three cells in a row, each swept by three horizontal lines, given out of order
+    cells = [square(200, 0), square(0, 0), square(100, 0)]
+    sweeps = [
+        [
+            LineString([(x, 20), (x + 100, 20)]),
+            LineString([(x + 100, 50), (x, 50)]),
+            LineString([(x, 80), (x + 100, 80)]),
+        ]
+        for x in (200, 0, 100)
+    ]
+
+    ordered_cells, ordered_sweeps, cost = Planning.order_coverage(
+        cells, sweeps, start=(-10, 20)
+    )
+    assert [cell.bounds[0] for cell in ordered_cells] == [0, 100, 200]
+    # The middle cell is entered at its last sweep, which is mirrored
+    transits = [
+        math.dist(cell[-1].coords[-1], following[0].coords[0])
+        for cell, following in itertools.pairwise(ordered_sweeps)
+    ]
+    assert transits == [0, 0]
+    assert ordered_sweeps[1][0].coords[:] == [(100, 80), (200, 80)]
+    assert cost == pytest.approx(10)
+    # Every line is still swept once
+    swept = [shapely.normalize(line).wkt for cell in ordered_sweeps for line in cell]
+    given = [shapely.normalize(line).wkt for cell in sweeps for line in cell]
+    assert sorted(swept) == sorted(given)
+
+
+def test_order_coverage_connected():
+    cells = [square(0, 0), square(100, 0)]
+    sweeps = [
+        [LineString([(100, 0), (100, 100), (0, 100)])],
+        [LineString([(100, 0), (200, 0), (200, 100)])],
+    ]
+    _, ordered_sweeps, cost = Planning.order_coverage(cells, sweeps, start=(0, 110))
+    # Connected sweeps can only be reversed
+    assert ordered_sweeps[0][0].coords[:] == [(0, 100), (100, 100), (100, 0)]
+    assert ordered_sweeps[1][0].coords[0] == (100, 0)
+    assert cost == pytest.approx(10)
@@ -0,0 +1,88 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import LineString, Polygon
+from trajgenpy import Cache, Query
+from trajgenpy.Geometries import GeoPolygon
+
+
+def square(x, y, size=1):
+    return Polygon([(x, y), (x + size, y), (x + size, y + size), (x, y + size)])
+
+
+@pytest.fixture
+def features(monkeypatch):
+    frame = gpd.GeoDataFrame(
+        {
+            "building": ["yes", "yes", "yes", "yes", None],
+            "height": ["10", None, "30", "5", None],
+            "highway": [None, None, None, None, "path"],
+        },
+        geometry=[
+            square(0, 0),
+            square(1, 0),  # Touches the first building
+            square(5, 5),
+            square(9.5, 9.5),  # Partially outside of the area
+            LineString([(0, 5), (20, 5)]),
+        ],
+    )
+    monkeypatch.setattr(Query.ox, "features_from_polygon", lambda *_, **__: frame)
+    return frame
+
+
+def test_clip_features():
+    area = square(0, 0, 10)
+    geometries = np.array([square(1, 1), square(9.5, 1), square(20, 20)])
+    clipped, indices = Query.clip_features(area, geometries)
+    assert indices.tolist() == [0, 1]
+    assert clipped[0].equals(geometries[0])
+    assert clipped[1].area == pytest.approx(0.5)
+
+
+def test_query_feature_table(tmp_path, features):
+    area = GeoPolygon(square(0, 0, 10))
+    tags = {"building": True, "height": True, "highway": ["path"]}
+    cache = Cache.DiskCache(tmp_path)
+
+    table = Query.query_feature_table(area, tags, cache)
+    assert len(table) == len(features)
+    assert table["height"].dropna().tolist() == ["10", "30", "5"]
+    assert table.geometry.iloc[3].area == pytest.approx(0.25)
+    assert table.geometry.iloc[4].length == pytest.approx(10)
+
+    buildings = table[table["building"].notna()]
+    merged = Query.query_features(area, tags, cache)["building"]
+    assert shapely.union_all(buildings.geometry.to_numpy()).equals(merged)
+    assert shapely.get_num_geometries(merged) == 3
+
+    dissolved = Query.query_feature_table(area, tags, cache, dissolve=True)
+    # Only the two touching buildings are merged, the path is kept on its own
+    assert len(dissolved) == 4
+    assert sorted(shapely.area(dissolved.geometry.to_numpy())) == pytest.approx(
+        [0, 0.25, 1, 2]
+    )
+    assert dissolved["height"].iloc[0] == "10"
+
+
+def test_query_cache_is_opt_in(tmp_path, monkeypatch, features):
+    area = GeoPolygon(square(0, 0, 10))
+    tags = {"building": True}
+
+    def shared_cache():
+        pytest.fail("The shared cache must only be used with cache=True")
+
+    monkeypatch.setattr(Query, "get_cache", shared_cache)
+    assert len(Query.query_feature_table(area, tags)) == len(features)
+    assert not Query.query_features(area, tags)["building"].is_empty
+
+    # A cache miss in offline mode is an error, not an area without features
+    cache = Cache.DiskCache(tmp_path)
+    with pytest.raises(LookupError):
+        Query.query_features(area, tags, cache, offline=True)
+    with pytest.raises(LookupError):
+        Query.query_feature_table(area, tags, cache, offline=True)
+    Query.query_features(area, tags, cache)
+    assert not Query.query_features(area, tags, cache, offline=True)[
+        "building"
+    ].is_empty
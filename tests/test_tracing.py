@@ -0,0 +1,70 @@
+import json
+
+import pytest
+from shapely.geometry import Polygon
+from trajgenpy import Geometries, Tracing
+
+
+@pytest.fixture
+def tracing():
+    Tracing.reset()
+    Tracing.enable()
+    yield Tracing
+    Tracing.disable()
+    Tracing.reset()
+
+
+def test_disabled_records_nothing():
+    Tracing.reset()
+    with Tracing.span("ignored") as span:
+        span.count("vertices", 10)
+        Tracing.count("cells")
+    assert Tracing.events() == []
+
+
+def test_nested_spans(tracing):
+    with tracing.span("outer") as outer:
+        outer.count("vertices", 3)
+        with tracing.span("inner"):
+            tracing.count("cells", 2)
+            tracing.count("cells")
+
+    inner, outer = tracing.events()
+    assert inner["name"] == "inner"
+    assert inner["depth"] == 1
+    assert inner["counters"] == {"cells": 3}
+    assert outer["depth"] == 0
+    assert outer["counters"] == {"vertices": 3}
+    assert outer["duration"] >= inner["duration"]
+
+
+def test_pipeline_summary(tracing, tmp_path):
+    boundary = Polygon([(0, 0), (100, 0), (100, 100), (0, 100)])
+    obstacle = Polygon([(20, 20), (40, 20), (40, 40), (20, 40)])
+    cells = Geometries.decompose_polygon(boundary, obstacles=obstacle)
+    for cell in cells:
+        Geometries.generate_sweep_pattern(cell, 10)
+
+    summary = tracing.summary()
+    assert summary["decompose_polygon"]["calls"] == 1
+    assert summary["decompose_polygon"]["counters"] == {
+        "vertices": 8,
+        "directions": 4,
+        "cells": len(cells),
+    }
+    assert summary["prepare_obstacles"]["counters"] == {
+        "obstacles": 1,
+        "merged": 0,
+        "dropped": 0,
+    }
+    assert summary["generate_sweep_pattern"]["calls"] == len(cells)
+
+    tracing.write_chrome_trace(tmp_path / "trace.json")
+    with (tmp_path / "trace.json").open() as f:
+        trace = json.load(f)
+    assert len(trace["traceEvents"]) == len(tracing.events())
+    assert all(event["ph"] == "X" for event in trace["traceEvents"])
+
+    tracing.write_summary(tmp_path / "summary.json")
+    with (tmp_path / "summary.json").open() as f:
+        assert json.load(f).keys() == summary.keys()
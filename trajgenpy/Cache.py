@@ -0,0 +1,111 @@
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+
+from trajgenpy import Logging
+
+log = Logging.get_logger()
+
+# The root of all trajgenpy caches, defaults to ~/.cache/trajgenpy
+CACHE_DIR_ENV = "TRAJGENPY_CACHE_DIR"
+
+
+def default_directory(name):
+    root = os.environ.get(CACHE_DIR_ENV)
+    if root is None:
+        root = Path.home() / ".cache" / "trajgenpy"
+    return Path(root) / name
+
+
+def make_key(*parts):
+    # Content addressed key, every part is hashed as bytes
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part.encode() if isinstance(part, str) else part
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    # A directory of pickled entries with a size limit and an optional time to live.
+    # When the cache grows beyond max_bytes the least recently used entries are evicted.
+    # The modification time of an entry is its last use, the creation time is stored in the entry.
+    def __init__(self, directory, max_bytes=1 << 30, ttl=None):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+    def _path(self, key):
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with path.open("rb") as f:
+                created, value = pickle.load(f)
+        except FileNotFoundError:
+            return default
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            log.warning("Removing unreadable cache entry %s: %s", path.name, e)
+            self.delete(key)
+            return default
+
+        if self.ttl is not None and time.time() - created > self.ttl:
+            self.delete(key)
+            return default
+
+        # Mark the entry as recently used
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        return value
+
+    def set(self, key, value):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so that readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((time.time(), value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            Path(tmp).replace(self._path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def delete(self, key):
+        self._path(key).unlink(missing_ok=True)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def _entries(self):
+        entries = []
+        for path in self.directory.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        # Remove the least recently used entries until the cache fits
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            path.unlink(missing_ok=True)
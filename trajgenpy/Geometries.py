@@ -1,16 +1,54 @@
 import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 
 import geojson
+import numpy as np
 import pyproj
 import shapely
-import shapely.plotting as shplt
 from shapely.geometry.polygon import orient
 import random
 import trajgenpy.bindings as bindings
-from trajgenpy import Logging
+import trajgenpy.bindings_inexact as bindings_inexact
+from trajgenpy import Cache, Logging, Tracing
 
 log = Logging.get_logger()
 
+# "exact" uses exact constructions for everything. "inexact" runs on the faster
+# inexact constructions kernel and retries with the exact kernel when it fails.
+KERNELS = ("exact", "inexact")
+
+# "bcd" is the boustrophedon decomposition. "tcd" is the trapezoidal decomposition, which
+# has more but convex cells and splits at every vertex. It always runs on the exact kernel.
+DECOMPOSITION_METHODS = ("bcd", "tcd")
+
+
+def _decomposition_kernel(method, kernel):
+    if method not in DECOMPOSITION_METHODS:
+        msg = f"Decomposition method must be one of {DECOMPOSITION_METHODS}."
+        raise ValueError(msg)
+    return "exact" if method == "tcd" else kernel
+
+
+def _shapely_plotting():
+    # Imported on first use, so that headless workers never load the plotting stack
+    import shapely.plotting  # noqa: PLC0415
+
+    return shapely.plotting
+
+
+@lru_cache(maxsize=32)
+def get_transformer(src_crs, dst_crs):
+    # Transformers are expensive to set up, so they are shared between all geometries
+    return pyproj.Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+
+def transform_geometry(geometry, src_crs, dst_crs):
+    # Reproject all coordinates of the geometry in one call, keeping holes and parts intact
+    transformer = get_transformer(src_crs, dst_crs)
+    return shapely.transform(geometry, transformer.transform, interleaved=False)
+
 
 class GeoData:
     def __init__(self, geometry, crs="WGS84"):
@@ -24,13 +62,14 @@ class GeoData:
 
         if crs != self.crs:
             # Apply the transformer to the geometry
-            self._convert_to_crs(crs)
+            with Tracing.span("set_crs") as span:
+                span.count("vertices", shapely.get_num_coordinates(self.geometry))
+                self._convert_to_crs(crs)
         self.crs = crs
         return self
 
-    def _convert_to_crs(self, crs):  # noqa: ARG002
-        msg = "_convert_to_crs(crs) sould be implemented in the data classes!"
-        raise NotImplementedError(msg)
+    def _convert_to_crs(self, crs):
+        self.geometry = transform_geometry(self.geometry, self.crs, crs)
 
     def is_geometry_of_type(self, geometry, expected_class):
         if expected_class and not isinstance(geometry, expected_class):
@@ -73,15 +112,9 @@ class GeoTrajectory(GeoData):
             log.warning(
                 "Plotting in WGS84 is not recomended as this distorts the geometry!"
             )
-        shplt.plot_line(self.geometry, ax, add_points, color, linewidth, **kwargs)
-
-    def _convert_to_crs(self, crs):
-        transformer = pyproj.Transformer.from_crs(self.crs, crs, always_xy=True)
-
-        converted_coords = [
-            transformer.transform(x, y) for x, y in list(self.geometry.coords)
-        ]
-        self.geometry = shapely.LineString(converted_coords)
+        _shapely_plotting().plot_line(
+            self.geometry, ax, add_points, color, linewidth, **kwargs
+        )
 
 
 class GeoMultiTrajectory(GeoData):
@@ -117,18 +150,9 @@ class GeoMultiTrajectory(GeoData):
                 "Plotting in WGS84 is not recomended as this distorts the geometry!"
             )
         for line in self.geometry.geoms:
-            shplt.plot_line(line, ax, add_points, color, linewidth, **kwargs)
-
-    def _convert_to_crs(self, crs):
-        transformer = pyproj.Transformer.from_crs(self.crs, crs, always_xy=True)
-        # Convert the coordinates of each line in the MultiLineString
-        converted_geoms = [
-            [
-                transformer.transform(x, y) for x, y in list(line.coords)
-            ]  # Convert the coordinates of each line in the MultiLineString
-            for line in self.geometry.geoms
-        ]
-        self.geometry = shapely.MultiLineString(converted_geoms)
+            _shapely_plotting().plot_line(
+                line, ax, add_points, color, linewidth, **kwargs
+            )
 
 
 class GeoPoint(GeoData):
@@ -141,12 +165,9 @@ class GeoPoint(GeoData):
             log.warning(
                 "Plotting in WGS84 is not recomended as this distorts the geometry!"
             )
-        shplt.plot_points(self.geometry, ax, add_points, color, linewidth, **kwargs)
-
-    def _convert_to_crs(self, crs):
-        transformer = pyproj.Transformer.from_crs(self.crs, crs, always_xy=True)
-        x, y = transformer.transform(self.geometry.x, self.geometry.y)
-        self.geometry = shapely.Point(x, y)
+        _shapely_plotting().plot_points(
+            self.geometry, ax, add_points, color, linewidth, **kwargs
+        )
 
 
 class GeoPolygon(GeoData):
@@ -155,18 +176,6 @@ class GeoPolygon(GeoData):
         geometry = shapely.Polygon(geometry)
         super().__init__(geometry, crs)
 
-    def _convert_to_crs(self, crs):
-        transformer = pyproj.Transformer.from_crs(self.crs, crs, always_xy=True)
-        # Convert each point in the polygon
-        exterior = [
-            transformer.transform(x, y) for x, y in self.geometry.exterior.coords
-        ]
-        interiors = [
-            [transformer.transform(x, y) for x, y in interior.coords]
-            for interior in self.geometry.interiors
-        ]
-        self.geometry = shapely.Polygon(exterior, interiors)
-
     def plot(
         self,
         ax=None,
@@ -181,7 +190,7 @@ class GeoPolygon(GeoData):
             log.warning(
                 "Plotting in WGS84 is not recomended as this distorts the geometry!"
             )
-        shplt.plot_polygon(
+        _shapely_plotting().plot_polygon(
             polygon=self.geometry,
             ax=ax,
             add_points=add_points,
@@ -203,20 +212,6 @@ class GeoMultiPolygon(GeoData):
             self.is_geometry_of_type(geometry, shapely.MultiPolygon)
         super().__init__(geometry, crs)
 
-    def _convert_to_crs(self, crs):
-        transformer = pyproj.Transformer.from_crs(self.crs, crs, always_xy=True)
-        polygon_list = []
-        for polygon in list(self.geometry.geoms):
-            # Convert each point in the polygon
-            exterior = [transformer.transform(x, y) for x, y in polygon.exterior.coords]
-            interiors = [
-                [transformer.transform(x, y) for x, y in interior.coords]
-                for interior in polygon.interiors
-            ]
-            polygon_list.append(shapely.Polygon(exterior, interiors))
-
-        self.geometry = shapely.MultiPolygon(polygon_list)
-
     def plot(
         self,
         ax=None,
@@ -231,7 +226,7 @@ class GeoMultiPolygon(GeoData):
             log.warning(
                 "Plotting in WGS84 is not recomended as this distorts the geometry!"
             )
-        shplt.plot_polygon(
+        _shapely_plotting().plot_polygon(
             polygon=self.geometry,
             ax=ax,
             add_points=add_points,
@@ -301,12 +296,84 @@ def is_convex(polygon: shapely.Polygon):
 
 
 def shapely_polygon_to_cgal(polygon: shapely.Polygon):
+    with Tracing.span("shapely_polygon_to_cgal") as span:
+        # Exctract all the points except the last, as this is the same as the first
+        cgal_points = [
+            bindings.Point_2(point[0], point[1])
+            for point in polygon.exterior.coords[:-1]
+        ]
+        span.count("vertices", len(cgal_points))
+        # Create a CGAL Polygon_2 from the list of points
+        return bindings.Polygon_2(cgal_points)
+
+
+def shapely_polygon_to_array(polygon: shapely.Polygon):
     # Exctract all the points except the last, as this is the same as the first
-    cgal_points = [
-        bindings.Point_2(point[0], point[1]) for point in polygon.exterior.coords[:-1]
-    ]
-    # Create a CGAL Polygon_2 from the list of points
-    return bindings.Polygon_2(cgal_points)
+    return shapely.get_coordinates(polygon.exterior)[:-1]
+
+
+def _polygons_from_arrays(coords, offsets):
+    # Cell i has the vertices coords[offsets[i]:offsets[i + 1]]
+    if len(offsets) < 2:
+        return []
+    indices = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    return list(shapely.polygons(shapely.linearrings(coords, indices=indices)))
+
+
+def _polygons_to_arrays(polygons):
+    # The inverse of _polygons_from_arrays, only the exteriors are kept
+    coords = [shapely.get_coordinates(polygon.exterior)[:-1] for polygon in polygons]
+    offsets = np.zeros(len(coords) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(c) for c in coords])
+    return np.concatenate(coords) if coords else np.empty((0, 2)), offsets
+
+
+def _sweeps_to_lines(segments, connect_sweeps):
+    if connect_sweeps:
+        # Combine all segments into a single LineString
+        return [shapely.LineString(segments.reshape(-1, 2))]
+    return list(shapely.linestrings(segments))
+
+
+def _is_valid_decomposition(coords, offsets, boundary, holes):
+    # All cells must be valid and together cover the area of the polygon with holes
+    cells = np.array(_polygons_from_arrays(coords, offsets))
+    if len(cells) == 0 or not shapely.is_valid(cells).all():
+        return False
+    area = shapely.Polygon(boundary).area - sum(shapely.Polygon(h).area for h in holes)
+    return math.isclose(shapely.area(cells).sum(), area, rel_tol=1e-6)
+
+
+def _is_valid_sweeps(segments, polygon):
+    # There must be sweeps and all their end points must lie in the cell
+    if len(segments) == 0:
+        return False
+    tolerance = 1e-6 * max(1.0, *np.ptp(polygon, axis=0))
+    points = shapely.points(np.reshape(segments, (-1, 2)))
+    return bool((shapely.distance(points, shapely.Polygon(polygon)) <= tolerance).all())
+
+
+def _run_with_kernel(kernel, name, *args, is_valid=None):
+    if kernel not in KERNELS:
+        msg = f"Kernel must be one of {KERNELS}."
+        raise ValueError(msg)
+
+    if kernel == "inexact":
+        try:
+            result = getattr(bindings_inexact, name)(*args)
+            if is_valid is None or is_valid(result):
+                return result
+            log.debug(
+                "Inexact %s returned an invalid result, retrying with the exact kernel.",
+                name,
+            )
+            Tracing.count("exact_fallbacks")
+        except RuntimeError as e:
+            log.debug(
+                "Inexact %s failed (%s), retrying with the exact kernel.", name, e
+            )
+            Tracing.count("exact_fallbacks")
+    return getattr(bindings, name)(*args)
 
 
 def get_sweep_offset(overlap=0.1, height=10, field_of_view=90):
@@ -324,60 +391,430 @@ def generate_sweep_pattern(
     sweep_offset,
     clockwise=True,
     connect_sweeps=False,
+    kernel="exact",
 ):
-    # Make sure that the orientation of the polygon is counterclockwise and the interior is clockwise
-    cgal_poly = shapely_polygon_to_cgal(orient(polygon=polygon))
-    segments = bindings.generate_sweeps(
-        cgal_poly, sweep_offset, clockwise, connect_sweeps
-    )
+    with Tracing.span("generate_sweep_pattern") as span:
+        # Make sure that the orientation of the polygon is counterclockwise and the interior is clockwise
+        polygon = shapely_polygon_to_array(orient(polygon=polygon))
+        span.count("vertices", len(polygon))
+        segments = _run_with_kernel(
+            kernel,
+            "generate_sweeps_array",
+            polygon,
+            sweep_offset,
+            clockwise,
+            connect_sweeps,
+            is_valid=lambda segments: _is_valid_sweeps(segments, polygon),
+        )
+        span.count("sweeps", len(segments))
+        return _sweeps_to_lines(segments, connect_sweeps)
 
-    if connect_sweeps:
-        # Combine all segments into a single LineString
-        combined_line = []
-        for seg in segments:
-            combined_line.append([seg.source.x, seg.source.y])
-            combined_line.append([seg.target.x, seg.target.y])
-        result = [shapely.LineString(combined_line)]
-    else:
-        lines = [
-            shapely.LineString(
-                [[seg.source.x, seg.source.y], [seg.target.x, seg.target.y]]
+
+def touching_components(geometries, tree=None):
+    # Label the groups of geometries that touch or overlap each other
+    if tree is None:
+        tree = shapely.STRtree(geometries)
+    left, right = tree.query(geometries, predicate="intersects")
+    parents = np.arange(len(geometries))
+
+    def find(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    for i, j in zip(left[left < right], right[left < right], strict=True):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parents[max(root_i, root_j)] = min(root_i, root_j)
+
+    roots = np.array([find(i) for i in range(len(geometries))], dtype=int)
+    return np.unique(roots, return_inverse=True)[1]
+
+
+def _prepare_obstacles(
+    boundary: shapely.Polygon,
+    obstacles: shapely.MultiPolygon | shapely.Polygon = None,
+    min_obstacle_area=0.0,
+):
+    # Turn the obstacles into a set of non-overlapping holes inside the boundary.
+    # Obstacles that overlap each other are merged, clusters that intersect the edge of the
+    # boundary are merged into the boundary and holes smaller than min_obstacle_area are dropped.
+    if obstacles is None:
+        return boundary, []
+
+    if isinstance(obstacles, shapely.Polygon):
+        obstacles = shapely.MultiPolygon([obstacles])
+    elif not isinstance(obstacles, shapely.MultiPolygon):
+        msg = "Obstacles must be a Shapely MultiPolygon."
+        raise ValueError(msg)
+
+    with Tracing.span("prepare_obstacles") as span:
+        parts = shapely.get_parts(obstacles)
+        span.count("obstacles", len(parts))
+
+        # Obstacles outside of the boundary do not affect the decomposition
+        tree = shapely.STRtree(parts)
+        parts = parts[np.sort(tree.query(boundary, predicate="intersects"))]
+        tree = shapely.STRtree(parts)
+        clusters = touching_components(parts, tree)
+
+        # A cluster is merged with the boundary if any of its obstacles intersect the edge
+        on_edge = np.zeros(len(parts), dtype=bool)
+        on_edge[tree.query(boundary.boundary, predicate="intersects")] = True
+        on_edge = np.isin(clusters, clusters[on_edge])
+        if on_edge.any():
+            log.debug(
+                "%d obstacles intersect with the boundary, the geometries will be merged.",
+                on_edge.sum(),
             )
-            for seg in segments
+            merged = shapely.get_parts(shapely.union_all([boundary, *parts[on_edge]]))
+            # Obstacles that meet the boundary at a single point stay separate parts,
+            # keep the part that covers the boundary
+            boundary = merged[
+                np.argmax(shapely.area(shapely.intersection(merged, boundary)))
+            ]
+
+        # Merge the overlapping obstacles, the clusters with a single obstacle are kept as is
+        interior = parts[~on_edge]
+        labels = np.unique(clusters[~on_edge], return_inverse=True)[1]
+        groups = np.split(
+            interior[np.argsort(labels, kind="stable")],
+            np.cumsum(np.bincount(labels))[:-1],
+        )
+        holes = [
+            group[0] if len(group) == 1 else shapely.union_all(group)
+            for group in groups
+            if len(group) > 0
+        ]
+        span.count("merged", len(interior) - len(holes))
+
+        # A merged obstacle can enclose free space, which cannot be reached anyway.
+        # Areas enclosed by the boundary and the merged obstacles are holes as well.
+        # Obstacles that only touch at a vertex are unioned into a MultiPolygon, every
+        # part becomes a hole of its own.
+        rings = [
+            *shapely.get_exterior_ring(shapely.get_parts(holes)),
+            *boundary.interiors,
         ]
-        result = lines
+        holes = shapely.polygons(np.array(rings, dtype=object))
+        boundary = shapely.Polygon(boundary.exterior)
 
-    return result
+        small = shapely.area(holes) <= min_obstacle_area
+        span.count("dropped", int(small.sum()))
+        return boundary, list(holes[~small])
+
+
+def simplify_polygon(
+    boundary: shapely.Polygon, holes=(), tolerance=None, max_vertices=None
+):
+    # Simplify the boundary and the holes together, so that the rings never cross each other.
+    # With max_vertices the smallest tolerance that reaches the vertex budget is searched for.
+    # Returns the simplified boundary and holes and the largest distance from a vertex of
+    # the input to the simplified rings.
+    polygon = shapely.Polygon(boundary.exterior, [hole.exterior for hole in holes])
+    rings = 1 + len(holes)
+
+    def simplify(tolerance):
+        return shapely.simplify(polygon, tolerance, preserve_topology=True)
+
+    def vertices(geometry):
+        # The closing coordinate of each ring is not a vertex
+        return shapely.get_num_coordinates(geometry) - rings
+
+    tolerance = tolerance or 0.0
+    simplified = simplify(tolerance)
+    if max_vertices is not None and vertices(simplified) > max_vertices:
+        min_x, min_y, max_x, max_y = polygon.bounds
+        low, high = tolerance, max(max_x - min_x, max_y - min_y)
+        if vertices(simplify(high)) > max_vertices:
+            log.warning(
+                "The polygon cannot be simplified to %d vertices while preserving its topology.",
+                max_vertices,
+            )
+        else:
+            # Bisect the tolerance, the vertex count decreases as the tolerance grows
+            for _ in range(32):
+                middle = (low + high) / 2
+                if vertices(simplify(middle)) > max_vertices:
+                    low = middle
+                else:
+                    high = middle
+        simplified = simplify(high)
+
+    original = shapely.points(shapely.get_coordinates(polygon))
+    deviation = float(shapely.distance(original, simplified.boundary).max())
+    return (
+        shapely.Polygon(simplified.exterior),
+        [shapely.Polygon(ring) for ring in simplified.interiors],
+        deviation,
+    )
+
+
+def _prepare_arrays(
+    boundary: shapely.Polygon,
+    obstacles: shapely.MultiPolygon | shapely.Polygon = None,
+    min_obstacle_area=0.0,
+    simplify_tolerance=None,
+    max_vertices=None,
+):
+    # The boundary and hole arrays that are handed to the native planner
+    boundary, obstacles = _prepare_obstacles(boundary, obstacles, min_obstacle_area)
+    if simplify_tolerance is not None or max_vertices is not None:
+        with Tracing.span("simplify_polygon"):
+            boundary, obstacles, deviation = simplify_polygon(
+                boundary, obstacles, simplify_tolerance, max_vertices
+            )
+        log.debug("Simplified the polygon with a maximum deviation of %f.", deviation)
+
+    boundary = shapely_polygon_to_array(boundary)
+    holes = [shapely_polygon_to_array(poly) for poly in obstacles]
+    Tracing.count("vertices", len(boundary) + sum(len(hole) for hole in holes))
+    return boundary, holes
+
+
+class DecompositionCache:
+    # Memoizes decompositions by a canonical hash of the boundary, the obstacles and the
+    # options that change the result. The most recently used entries are kept in memory, and
+    # with disk=True (or a Cache.DiskCache) the decompositions are also stored on disk.
+    def __init__(self, max_entries=128, disk=None):
+        self.max_entries = max_entries
+        if disk is True:
+            disk = Cache.DiskCache(Cache.default_directory("decompositions"))
+        self.disk = disk or None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(boundary, obstacles=None, **options):
+        # Normalizing makes the key independent of the orientation and start vertex of the
+        # rings and of the order of the obstacles
+        parts = [shapely.to_wkb(shapely.normalize(boundary))]
+        if obstacles is not None:
+            if isinstance(obstacles, shapely.Polygon):
+                obstacles = shapely.MultiPolygon([obstacles])
+            parts.append(shapely.to_wkb(shapely.normalize(obstacles)))
+        parts.append(repr(sorted(options.items())))
+        return Cache.make_key(*parts)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = self.disk.get(key) if self.disk is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, value)
+        return value
+
+    def set(self, key, value):
+        self._remember(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+
+_decomposition_cache = None
+
+
+def get_decomposition_cache():
+    # The shared in-memory cache used by decompose_polygon(cache=True)
+    global _decomposition_cache  # noqa: PLW0603
+    if _decomposition_cache is None:
+        _decomposition_cache = DecompositionCache()
+    return _decomposition_cache
 
 
 def decompose_polygon(
-    boundary: shapely.Polygon, obstacles: shapely.MultiPolygon | shapely.Polygon = None
+    boundary: shapely.Polygon,
+    obstacles: shapely.MultiPolygon | shapely.Polygon = None,
+    num_threads=1,
+    kernel="exact",
+    min_obstacle_area=0.0,
+    simplify_tolerance=None,
+    max_vertices=None,
+    cache=None,
+    angular_tolerance=0.0,
+    max_directions=None,
+    method="bcd",
 ):
-    if obstacles is not None:
-        if isinstance(obstacles, shapely.Polygon):
-            obstacles = shapely.MultiPolygon([obstacles])
-        elif not isinstance(obstacles, shapely.MultiPolygon):
-            msg = "Obstacles must be a Shapely MultiPolygon."
-            raise ValueError(msg)
+    # The boundary and obstacles can be simplified before the decomposition, either with a
+    # tolerance or to a vertex budget, see simplify_polygon.
+    # The search for the best decomposition direction can be bounded on detailed boundaries:
+    # directions within angular_tolerance (radians) are tried once and at most max_directions
+    # directions, those with the longest total edge length, are tried.
+    # method is one of DECOMPOSITION_METHODS.
+    # cache is a DecompositionCache, or True for the shared in-memory cache.
+    kernel = _decomposition_kernel(method, kernel)
+    if cache is True:
+        cache = get_decomposition_cache()
+
+    with Tracing.span("decompose_polygon") as span:
+        result = None
+        if cache is not None:
+            key = DecompositionCache.make_key(
+                boundary,
+                obstacles,
+                kernel=kernel,
+                min_obstacle_area=min_obstacle_area,
+                simplify_tolerance=simplify_tolerance,
+                max_vertices=max_vertices,
+                angular_tolerance=angular_tolerance,
+                max_directions=max_directions,
+                method=method,
+            )
+            result = cache.get(key)
+            span.count("cache_hits", int(result is not None))
 
-        # If the obstacles intersect with the boundary, take the union of the two and remove it from the obstacles list
-        updated_obstacles = []
-        for obstacle in obstacles.geoms:
-            if obstacle.intersects(boundary.boundary):
-                log.debug(
-                    "Obstacles intersect with the boundary, the geometries will be merged."
+        if result is None:
+            boundary, holes = _prepare_arrays(
+                boundary, obstacles, min_obstacle_area, simplify_tolerance, max_vertices
+            )
+            # The directions searched after pruning, only computed while tracing
+            if Tracing.is_enabled():
+                span.count(
+                    "directions",
+                    bindings.count_decomposition_directions(
+                        boundary, holes, angular_tolerance, max_directions or 0
+                    ),
                 )
-                boundary = obstacles.union(boundary)
-            else:
-                updated_obstacles.append(obstacle)
-
-        obstacles = shapely.MultiPolygon(updated_obstacles)
-    pwh = bindings.Polygon_with_holes_2(shapely_polygon_to_cgal(boundary))
-    if obstacles is not None:
-        for poly in obstacles.geoms:
-            pwh.add_hole(shapely_polygon_to_cgal(poly))
-    decompose_polygons = bindings.decompose(pwh)
-    return [
-        shapely.Polygon([(vertex.x, vertex.y) for vertex in polygon])
-        for polygon in decompose_polygons
+            result = _run_with_kernel(
+                kernel,
+                "decompose_array",
+                boundary,
+                holes,
+                num_threads,
+                angular_tolerance,
+                max_directions or 0,
+                method,
+                is_valid=lambda result: _is_valid_decomposition(
+                    *result, boundary, holes
+                ),
+            )
+            if cache is not None:
+                cache.set(key, result)
+
+        coords, offsets = result
+        span.count("cells", len(offsets) - 1)
+        return _polygons_from_arrays(coords, offsets)
+
+
+def _plan_coverage_arrays(
+    boundary: shapely.Polygon,
+    obstacles: shapely.MultiPolygon | shapely.Polygon = None,
+    sweep_offset=50.0,
+    clockwise=True,
+    connect_sweeps=False,
+    num_threads=1,
+    kernel="exact",
+    min_obstacle_area=0.0,
+    simplify_tolerance=None,
+    max_vertices=None,
+    angular_tolerance=0.0,
+    max_directions=None,
+    method="bcd",
+):
+    # The native plan_coverage result: flat cell and sweep arrays with their offsets
+    kernel = _decomposition_kernel(method, kernel)
+    boundary, holes = _prepare_arrays(
+        boundary, obstacles, min_obstacle_area, simplify_tolerance, max_vertices
+    )
+    result = _run_with_kernel(
+        kernel,
+        "plan_coverage",
+        boundary,
+        holes,
+        sweep_offset,
+        clockwise,
+        connect_sweeps,
+        num_threads,
+        angular_tolerance,
+        max_directions or 0,
+        method,
+        is_valid=lambda result: _is_valid_decomposition(
+            result["cells"], result["cell_offsets"], boundary, holes
+        ),
+    )
+    Tracing.count("cells", len(result["cell_offsets"]) - 1)
+    Tracing.count("sweeps", len(result["sweeps"]))
+    return result
+
+
+def _coverage_from_arrays(result, connect_sweeps):
+    cells = _polygons_from_arrays(result["cells"], result["cell_offsets"])
+    sweep_offsets = result["sweep_offsets"]
+    sweeps = [
+        _sweeps_to_lines(
+            result["sweeps"][sweep_offsets[i] : sweep_offsets[i + 1]],
+            connect_sweeps,
+        )
+        for i in range(len(cells))
     ]
+    return cells, sweeps, result["directions"]
+
+
+def plan_coverage(
+    boundary: shapely.Polygon,
+    obstacles: shapely.MultiPolygon | shapely.Polygon = None,
+    sweep_offset=50.0,
+    clockwise=True,
+    connect_sweeps=False,
+    num_threads=1,
+    kernel="exact",
+    min_obstacle_area=0.0,
+    simplify_tolerance=None,
+    max_vertices=None,
+    angular_tolerance=0.0,
+    max_directions=None,
+    method="bcd",
+):
+    # Decompose the boundary and generate the sweeps of every cell in one native call.
+    # Returns the cells, the sweeps of each cell and the (C, 2) sweep direction of each cell.
+    # angular_tolerance, max_directions and method are as for decompose_polygon.
+    with Tracing.span("plan_coverage"):
+        result = _plan_coverage_arrays(
+            boundary,
+            obstacles,
+            sweep_offset,
+            clockwise,
+            connect_sweeps,
+            num_threads,
+            kernel,
+            min_obstacle_area,
+            simplify_tolerance,
+            max_vertices,
+            angular_tolerance,
+            max_directions,
+            method,
+        )
+        return _coverage_from_arrays(result, connect_sweeps)
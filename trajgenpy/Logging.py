@@ -1,53 +1,91 @@
-import inspect
+import atexit
 import logging
-from pathlib import Path
+import logging.handlers
+import os
+import queue
 
 import colorama
 
 LOGGER_NAME = "trajgenpy"
 
+# The level and the handler mode can be set through the environment, e.g.
+# TRAJGENPY_LOG_LEVEL=WARNING TRAJGENPY_LOG_QUEUE=1 python planner.py
+LOG_LEVEL_ENV = "TRAJGENPY_LOG_LEVEL"
+LOG_QUEUE_ENV = "TRAJGENPY_LOG_QUEUE"
 
-def init_logger():
+# Define custom log levels and their corresponding colors
+LOG_COLORS = {
+    "TRACE": colorama.Fore.MAGENTA,
+    "DEBUG": colorama.Fore.BLUE,
+    "INFO": colorama.Fore.GREEN,
+    "WARNING": colorama.Fore.YELLOW,
+    "ERROR": colorama.Fore.RED,
+}
+
+_listener = None
+
+
+class ColoredFormatter(logging.Formatter):
+    def format(self, record):
+        # The filename and line number are already stored on the record by the logger
+        record.levelcolor = LOG_COLORS.get(record.levelname, "")
+        record.reset = colorama.Style.RESET_ALL
+        return super().format(record)
+
+
+def _stop_listener():
+    global _listener  # noqa: PLW0603
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def init_logger(level=None, use_queue=None):
+    global _listener  # noqa: PLW0603
     # Initialize colorama to support ANSI color codes on Windows
     colorama.init()
 
-    # Define custom log levels and their corresponding colors
-    LOG_COLORS = {
-        "TRACE": colorama.Fore.MAGENTA,
-        "DEBUG": colorama.Fore.BLUE,
-        "INFO": colorama.Fore.GREEN,
-        "WARNING": colorama.Fore.YELLOW,
-        "ERROR": colorama.Fore.RED,
-    }
-
-    class ColoredFormatter(logging.Formatter):
-        def format(self, record):
-            log_level = record.levelname
-            color = LOG_COLORS.get(log_level, "")
-            reset = colorama.Style.RESET_ALL
-            frame_info = inspect.stack()[-1]
-            filename = Path(frame_info[1])
-            record.filename = filename.name
-            record.levelname = f"{color}{log_level}{reset}"
-            return super().format(record)
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_ENV, "DEBUG")
+    if use_queue is None:
+        use_queue = os.environ.get(LOG_QUEUE_ENV, "0") not in ("", "0")
 
     logger = logging.getLogger(LOGGER_NAME)
-    log_format = "%(asctime)s - %(levelname)s - %(message)s (%(filename)s:%(lineno)d)"
-
-    formatter = ColoredFormatter(log_format)
-    logger.setLevel(logging.DEBUG)
+    # Remove the handlers of a previous initialization
+    _stop_listener()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
 
+    log_format = "%(asctime)s - %(levelcolor)s%(levelname)s%(reset)s - %(message)s (%(filename)s:%(lineno)d)"
     stream_handler = logging.StreamHandler()
-    stream_handler.setFormatter(formatter)
-
-    logger.addHandler(stream_handler)
+    stream_handler.setFormatter(ColoredFormatter(log_format))
+
+    if use_queue:
+        # Records are handed to a background thread, which formats and writes them
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        _listener.start()
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    else:
+        logger.addHandler(stream_handler)
+
+    set_level(level)
     return logger
 
 
+def set_level(level):
+    # Records below the level are discarded before any formatting takes place
+    if isinstance(level, str):
+        level = level.upper()
+    get_logger().setLevel(level)
+
+
 def get_logger():
     return logging.getLogger(LOGGER_NAME)
 
 
+atexit.register(_stop_listener)
+
 if get_logger().handlers == []:
     init_logger()
 
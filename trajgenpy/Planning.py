@@ -0,0 +1,548 @@
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import shapely
+from shapely.geometry.polygon import orient
+
+import trajgenpy.bindings as bindings
+from trajgenpy import Geometries, Logging, Tracing
+
+log = Logging.get_logger()
+
+
+class AreaPlan:
+    # The coverage plan of a single area, stored as the flat arrays of the native planner.
+    # cells[cell_offsets[i]:cell_offsets[i + 1]] are the vertices of cell i and
+    # sweeps[sweep_offsets[i]:sweep_offsets[i + 1]] are the (M, 2, 2) sweep segments of cell i.
+    def __init__(self, index, result=None, error=None, connect_sweeps=False):
+        self.index = index
+        self.error = error
+        self.connect_sweeps = connect_sweeps
+        result = result or {}
+        self.cells = result.get("cells")
+        self.cell_offsets = result.get("cell_offsets")
+        self.sweeps = result.get("sweeps")
+        self.sweep_offsets = result.get("sweep_offsets")
+        self.directions = result.get("directions")
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def to_shapely(self):
+        # Returns the cells, the sweeps of each cell and the sweep directions like Geometries.plan_coverage
+        if not self.ok:
+            msg = f"Planning area {self.index} failed: {self.error}"
+            raise RuntimeError(msg)
+        return Geometries._coverage_from_arrays(
+            {
+                "cells": self.cells,
+                "cell_offsets": self.cell_offsets,
+                "sweeps": self.sweeps,
+                "sweep_offsets": self.sweep_offsets,
+                "directions": self.directions,
+            },
+            self.connect_sweeps,
+        )
+
+    def __repr__(self):
+        if not self.ok:
+            return f"AreaPlan(index={self.index}, error={self.error!r})"
+        cells = len(self.cell_offsets) - 1
+        return f"AreaPlan(index={self.index}, cells={cells}, sweeps={len(self.sweeps)})"
+
+
+def areas_from_feature_collection(collection):
+    # Every polygon feature is an area, its interiors are the obstacles
+    areas = []
+    for feature in collection["features"]:
+        geometry = shapely.geometry.shape(feature["geometry"])
+        polygons = (
+            geometry.geoms if isinstance(geometry, shapely.MultiPolygon) else [geometry]
+        )
+        for polygon in polygons:
+            if not isinstance(polygon, shapely.Polygon):
+                msg = f"Feature geometries must be polygons, got {polygon.geom_type}."
+                raise ValueError(msg)
+            obstacles = [shapely.Polygon(ring) for ring in polygon.interiors]
+            areas.append(
+                (
+                    shapely.Polygon(polygon.exterior),
+                    shapely.MultiPolygon(obstacles) if obstacles else None,
+                )
+            )
+    return areas
+
+
+def _normalize_areas(areas):
+    if isinstance(areas, dict) and areas.get("type") == "FeatureCollection":
+        return areas_from_feature_collection(areas)
+    return [
+        (area, None) if isinstance(area, shapely.Polygon) else tuple(area)
+        for area in areas
+    ]
+
+
+def _plan_area(task):
+    # Runs in the worker processes, the geometries are passed as WKB to keep the payload small
+    index, boundary, obstacles, options = task
+    try:
+        boundary = shapely.from_wkb(boundary)
+        obstacles = None if obstacles is None else shapely.from_wkb(obstacles)
+        result = Geometries._plan_coverage_arrays(boundary, obstacles, **options)
+    except Exception as e:
+        return AreaPlan(index, error=f"{type(e).__name__}: {e}")
+    return AreaPlan(index, result, connect_sweeps=options["connect_sweeps"])
+
+
+def plan_coverage_batch(
+    areas,
+    sweep_offset=50.0,
+    clockwise=True,
+    connect_sweeps=False,
+    kernel="exact",
+    min_obstacle_area=0.0,
+    simplify_tolerance=None,
+    max_vertices=None,
+    workers=None,
+    chunksize=None,
+    angular_tolerance=0.0,
+    max_directions=None,
+    method="bcd",
+):
+    # Plan the coverage of many areas on a process pool.
+    # areas is a list of boundaries, a list of (boundary, obstacles) tuples or a GeoJSON
+    # FeatureCollection. Returns one AreaPlan per area in the input order. Areas that fail
+    # get an AreaPlan with the error message instead of aborting the batch.
+    areas = _normalize_areas(areas)
+    options = {
+        "sweep_offset": sweep_offset,
+        "clockwise": clockwise,
+        "connect_sweeps": connect_sweeps,
+        "kernel": kernel,
+        "min_obstacle_area": min_obstacle_area,
+        "simplify_tolerance": simplify_tolerance,
+        "max_vertices": max_vertices,
+        "angular_tolerance": angular_tolerance,
+        "max_directions": max_directions,
+        "method": method,
+    }
+    tasks = [
+        (
+            index,
+            shapely.to_wkb(boundary),
+            None if obstacles is None else shapely.to_wkb(obstacles),
+            options,
+        )
+        for index, (boundary, obstacles) in enumerate(areas)
+    ]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+
+    with Tracing.span("plan_coverage_batch") as span:
+        span.count("areas", len(tasks))
+        if workers == 1:
+            plans = [_plan_area(task) for task in tasks]
+        else:
+            if chunksize is None:
+                # A few chunks per worker balances the load without too much overhead
+                chunksize = max(1, len(tasks) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                plans = list(executor.map(_plan_area, tasks, chunksize=chunksize))
+
+        failed = [plan.index for plan in plans if not plan.ok]
+        span.count("failed", len(failed))
+    if failed:
+        log.warning("Planning failed for %d of %d areas.", len(failed), len(plans))
+    return plans
+
+
+class IncrementalPlanner:
+    # Keeps the decomposition of an area, so that adding or removing an obstacle only
+    # redecomposes the cells it affects. The affected cells are redecomposed in the
+    # direction of the initial best BCD and all other cells and their sweeps are reused.
+    def __init__(
+        self,
+        boundary: shapely.Polygon,
+        obstacles: shapely.MultiPolygon | shapely.Polygon = None,
+        sweep_offset=50.0,
+        clockwise=True,
+        connect_sweeps=False,
+        num_threads=1,
+        min_obstacle_area=0.0,
+    ):
+        self.sweep_offset = sweep_offset
+        self.clockwise = clockwise
+        self.connect_sweeps = connect_sweeps
+        self.boundary, holes = Geometries._prepare_obstacles(
+            boundary, obstacles, min_obstacle_area
+        )
+        self.obstacles = list(holes)
+
+        with Tracing.span("incremental_plan") as span:
+            result = bindings.plan_coverage(
+                Geometries.shapely_polygon_to_array(self.boundary),
+                [Geometries.shapely_polygon_to_array(hole) for hole in holes],
+                sweep_offset,
+                clockwise,
+                connect_sweeps,
+                num_threads,
+            )
+            self.direction = result["decomposition_direction"]
+            self.cells = Geometries._polygons_from_arrays(
+                result["cells"], result["cell_offsets"]
+            )
+            sweep_offsets = result["sweep_offsets"]
+            self.sweeps = [
+                result["sweeps"][sweep_offsets[i] : sweep_offsets[i + 1]]
+                for i in range(len(self.cells))
+            ]
+            span.count("cells", len(self.cells))
+
+    def coverage(self):
+        # The cells and the sweeps of each cell, like Geometries.plan_coverage
+        return self.cells, [
+            Geometries._sweeps_to_lines(segments, self.connect_sweeps)
+            for segments in self.sweeps
+        ]
+
+    def add_obstacle(self, obstacle: shapely.Polygon):
+        # Returns the indices of the new cells
+        with Tracing.span("add_obstacle"):
+            affected = self._cells_touching(obstacle)
+            region = shapely.difference(
+                shapely.union_all([self.cells[i] for i in affected]), obstacle
+            )
+            self.obstacles.append(obstacle)
+            return self._replace_cells(affected, region)
+
+    def remove_obstacle(self, obstacle: shapely.Polygon):
+        # The obstacle has to be one of self.obstacles. Returns the indices of the new cells
+        matches = [i for i, hole in enumerate(self.obstacles) if hole.equals(obstacle)]
+        if not matches:
+            msg = "The obstacle is not part of the plan."
+            raise ValueError(msg)
+
+        with Tracing.span("remove_obstacle"):
+            removed = self.obstacles.pop(matches[0])
+            affected = self._cells_touching(removed)
+            region = shapely.union_all(
+                [*(self.cells[i] for i in affected), removed.intersection(self.boundary)]
+            )
+            # The removed obstacle may have overlapped other obstacles
+            others = [hole for hole in self.obstacles if hole.intersects(region)]
+            if others:
+                region = shapely.difference(region, shapely.union_all(others))
+            return self._replace_cells(affected, region)
+
+    def _cells_touching(self, geometry):
+        tree = shapely.STRtree(self.cells)
+        return sorted(tree.query(geometry, predicate="intersects").tolist())
+
+    def _replace_cells(self, affected, region):
+        # Decompose the region in the original direction and replace the affected cells
+        new_cells = []
+        for part in shapely.get_parts(region):
+            if not isinstance(part, shapely.Polygon) or part.area <= 0:
+                continue
+            oriented = orient(part)
+            coords, offsets = bindings.decompose_in_direction_array(
+                shapely.get_coordinates(oriented.exterior)[:-1],
+                [shapely.get_coordinates(ring)[:-1] for ring in oriented.interiors],
+                self.direction,
+            )
+            new_cells.extend(Geometries._polygons_from_arrays(coords, offsets))
+
+        keep = np.ones(len(self.cells), dtype=bool)
+        keep[affected] = False
+        self.cells = [cell for cell, k in zip(self.cells, keep, strict=True) if k]
+        self.sweeps = [sweep for sweep, k in zip(self.sweeps, keep, strict=True) if k]
+        first = len(self.cells)
+        for cell in new_cells:
+            self.cells.append(cell)
+            self.sweeps.append(
+                bindings.generate_sweeps_array(
+                    Geometries.shapely_polygon_to_array(orient(cell)),
+                    self.sweep_offset,
+                    self.clockwise,
+                    self.connect_sweeps,
+                )
+            )
+        Tracing.count("replaced", len(affected))
+        Tracing.count("cells", len(new_cells))
+        log.debug(
+            "Replaced %d of %d cells with %d new cells.",
+            len(affected),
+            len(self.cells) - len(new_cells) + len(affected),
+            len(new_cells),
+        )
+        return list(range(first, len(self.cells)))
+
+
+def iter_coverage(
+    boundary: shapely.Polygon,
+    obstacles: shapely.MultiPolygon | shapely.Polygon = None,
+    sweep_offset=50.0,
+    clockwise=True,
+    connect_sweeps=False,
+    num_threads=1,
+    kernel="exact",
+    **decompose_options,
+):
+    # Yields (index, cell, sweeps) one cell at a time. Only the cells of the decomposition are
+    # kept in memory, the sweeps of a cell are generated when the cell is reached.
+    # decompose_options are passed on to Geometries.decompose_polygon.
+    cells = Geometries.decompose_polygon(
+        boundary,
+        obstacles,
+        num_threads=num_threads,
+        kernel=kernel,
+        **decompose_options,
+    )
+    for index, cell in enumerate(cells):
+        yield index, cell, Geometries.generate_sweep_pattern(
+            cell, sweep_offset, clockwise, connect_sweeps, kernel
+        )
+
+
+def order_coverage(cells, sweeps, start=None, time_budget=0.5):
+    # Choose the order in which the cells are covered and where each cell is entered, such
+    # that the transits between the cells are short. sweeps[i] are the lines of cell i as
+    # returned by Geometries.plan_coverage, a cell can be swept backwards and unconnected
+    # sweeps can also be mirrored, every line in the opposite direction. start is an optional
+    # (x, y) start position. Returns the reordered cells and sweeps and the transit distance.
+    counts = np.array([len(cell_sweeps) for cell_sweeps in sweeps], dtype=np.int64)
+    if len(counts) != len(cells):
+        msg = "There must be one list of sweeps per cell."
+        raise ValueError(msg)
+    if (counts == 0).any():
+        msg = "Every cell needs at least one sweep."
+        raise ValueError(msg)
+    if len(cells) == 0:
+        return [], [], 0.0
+
+    with Tracing.span("order_coverage") as span:
+        lines = np.array([line for cell_sweeps in sweeps for line in cell_sweeps])
+        ends = np.cumsum(counts)
+        first = lines[ends - counts]
+        last = lines[ends - 1]
+        heads = [shapely.get_coordinates(shapely.get_point(first, 0))]
+        tails = [shapely.get_coordinates(shapely.get_point(last, -1))]
+        # Mirroring is only possible if the sweeps are not connected
+        mirror = bool((shapely.get_num_coordinates(lines) == 2).all())
+        if mirror:
+            heads.append(shapely.get_coordinates(shapely.get_point(first, -1)))
+            tails.append(shapely.get_coordinates(shapely.get_point(last, 0)))
+        entries = np.stack(heads, axis=1)
+        exits = np.stack(tails, axis=1)
+
+        order, variants, cost = bindings.order_cells(entries, exits, start, time_budget)
+        span.count("cells", len(order))
+
+    num_candidates = entries.shape[1]
+    ordered_cells, ordered_sweeps = [], []
+    for cell, variant in zip(order, variants, strict=True):
+        cell_lines = lines[ends[cell] - counts[cell] : ends[cell]]
+        backward = variant >= num_candidates
+        mirrored = variant % num_candidates == 1
+        if backward:
+            cell_lines = cell_lines[::-1]
+        if backward != mirrored:
+            cell_lines = shapely.reverse(cell_lines)
+        ordered_cells.append(cells[cell])
+        ordered_sweeps.append(list(cell_lines))
+    return ordered_cells, ordered_sweeps, cost
+
+
+class GeoJSONSeqWriter:
+    # Writes one GeoJSON feature per line, so that a plan can be written while it is generated.
+    # The output is newline delimited JSON, or a GeoJSON text sequence (RFC 8142) with rs=True.
+    # Geometries in crs are reprojected to WGS84, as GeoJSON requires.
+    def __init__(self, file, crs=None, rs=False):
+        self._owns_file = isinstance(file, str | Path)
+        # Closed by close() or on leaving the with block of the writer
+        self.file = Path(file).open("w") if self._owns_file else file  # noqa: SIM115
+        self.crs = crs
+        self.prefix = "\x1e" if rs else ""
+        self.count = 0
+
+    def write(self, geometry, properties=None, id=None):
+        if self.crs is not None and self.crs != "WGS84":
+            geometry = Geometries.transform_geometry(geometry, self.crs, "WGS84")
+        feature = {"type": "Feature", "properties": properties or {}}
+        if id is not None:
+            feature["id"] = id
+        # Splice in the geometry that GEOS serializes, instead of building dicts of coordinates
+        line = json.dumps(feature)[:-1] + ', "geometry": ' + shapely.to_geojson(geometry)
+        self.file.write(f"{self.prefix}{line}}}\n")
+        self.count += 1
+
+    def write_cell(self, index, cell, sweeps):
+        # The cell and its sweeps as two features
+        self.write(cell, {"type": "cell", "cell": index})
+        self.write(shapely.MultiLineString(sweeps), {"type": "sweeps", "cell": index})
+
+    def close(self):
+        if self._owns_file:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def _rotate(geometry, angle):
+    # Rotate counterclockwise about the origin
+    cos, sin = math.cos(angle), math.sin(angle)
+    return shapely.transform(
+        geometry, lambda xy: xy @ np.array([[cos, sin], [-sin, cos]])
+    )
+
+
+def _plan_tile(task):
+    # Decompose the free space of a tile so that every horizontal line crosses a cell at
+    # most once, and clip the global sweep lines y = origin + k * sweep_offset to the cells.
+    index, region, sweep_offset, origin = task
+    cells = []
+    for part in shapely.get_parts(shapely.from_wkb(region)):
+        if not isinstance(part, shapely.Polygon) or part.area <= 0:
+            continue
+        oriented = orient(part)
+        coords, offsets = bindings.decompose_in_direction_array(
+            shapely.get_coordinates(oriented.exterior)[:-1],
+            [shapely.get_coordinates(ring)[:-1] for ring in oriented.interiors],
+            (0.0, 1.0),
+        )
+        cells.extend(Geometries._polygons_from_arrays(coords, offsets))
+
+    spans, lines = [], []
+    for cell in cells:
+        min_x, min_y, max_x, max_y = cell.bounds
+        k = np.arange(
+            math.ceil((min_y - origin) / sweep_offset),
+            math.floor((max_y - origin) / sweep_offset) + 1,
+        )
+        y = origin + k * sweep_offset
+        clipped = shapely.intersection(
+            shapely.linestrings(
+                np.stack(
+                    [
+                        np.column_stack([np.full_like(y, min_x - 1), y]),
+                        np.column_stack([np.full_like(y, max_x + 1), y]),
+                    ],
+                    axis=1,
+                )
+            ),
+            cell,
+        )
+        for line, part in zip(k, clipped, strict=True):
+            x = shapely.get_coordinates(part)[:, 0]
+            if len(x) >= 2 and x.max() > x.min():
+                spans.append((x.min(), x.max()))
+                lines.append(line)
+
+    coords, offsets = Geometries._polygons_to_arrays(cells)
+    return index, coords, offsets, np.array(spans).reshape(-1, 2), np.array(lines)
+
+
+def _stitch(spans, lines, tolerance):
+    # Merge the spans of the same sweep line that meet at a tile border
+    if len(spans) == 0:
+        return spans, lines
+    order = np.lexsort((spans[:, 0], lines))
+    spans, lines = spans[order], lines[order]
+    starts = np.ones(len(spans), dtype=bool)
+    starts[1:] = (lines[1:] != lines[:-1]) | (spans[1:, 0] - spans[:-1, 1] > tolerance)
+    first = np.flatnonzero(starts)
+    merged = np.column_stack(
+        [spans[first, 0], np.maximum.reduceat(spans[:, 1], first)]
+    ).reshape(-1, 2)
+    return merged, lines[first]
+
+
+def plan_coverage_tiled(
+    boundary: shapely.Polygon,
+    obstacles: shapely.MultiPolygon | shapely.Polygon = None,
+    tile_size=1000.0,
+    sweep_offset=50.0,
+    align=True,
+    workers=1,
+    min_obstacle_area=0.0,
+):
+    # Plan large areas by splitting them into square tiles of tile_size that are decomposed
+    # and swept independently, optionally on a process pool. All tiles share one sweep
+    # direction and one set of sweep lines, so the sweeps that cross a tile border are
+    # stitched into continuous sweeps afterwards. With align the tiles and the sweeps follow
+    # the longest side of the minimum rotated rectangle of the boundary, otherwise the x-axis.
+    # Returns the cells of all tiles and the sweeps in boustrophedon order.
+    boundary, holes = Geometries._prepare_obstacles(
+        boundary, obstacles, min_obstacle_area
+    )
+    free = shapely.Polygon(boundary.exterior, [hole.exterior for hole in holes])
+
+    angle = 0.0
+    if align:
+        corners = shapely.get_coordinates(boundary.minimum_rotated_rectangle)[:3]
+        edges = np.diff(corners, axis=0)
+        longest = edges[np.argmax(np.hypot(edges[:, 0], edges[:, 1]))]
+        angle = math.atan2(longest[1], longest[0])
+    free = _rotate(free, -angle)
+
+    # The tile borders lie halfway between two sweep lines
+    min_x, min_y, max_x, max_y = free.bounds
+    origin = min_y + sweep_offset / 2
+    tile_height = max(1, round(tile_size / sweep_offset)) * sweep_offset
+    xs = np.arange(min_x, max_x, tile_size)
+    ys = np.arange(min_y, max_y, tile_height)
+    tiles = shapely.box(
+        *np.meshgrid(xs, ys),
+        *np.meshgrid(xs + tile_size, ys + tile_height),
+    ).reshape(-1)
+
+    with Tracing.span("plan_coverage_tiled") as span:
+        shapely.prepare(free)
+        tiles = tiles[shapely.intersects(free, tiles)]
+        regions = shapely.intersection(tiles, free)
+        tasks = [
+            (index, shapely.to_wkb(region), sweep_offset, origin)
+            for index, region in enumerate(regions)
+        ]
+        span.count("tiles", len(tasks))
+
+        workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+        if workers == 1:
+            results = [_plan_tile(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_plan_tile, tasks))
+
+        cells = []
+        for _, coords, offsets, _, _ in results:
+            cells.extend(Geometries._polygons_from_arrays(coords, offsets))
+        spans = np.concatenate([result[3] for result in results]).reshape(-1, 2)
+        lines = np.concatenate([result[4] for result in results]).astype(int)
+        merged, merged_lines = _stitch(spans, lines, 1e-9 * max(1.0, tile_size))
+        span.count("stitched", len(spans) - len(merged))
+
+    # Alternate the direction of the sweep lines and rotate everything back
+    forward = merged_lines % 2 == 0
+    order = np.lexsort((np.where(forward, merged[:, 0], -merged[:, 0]), merged_lines))
+    merged, merged_lines, forward = merged[order], merged_lines[order], forward[order]
+    y = origin + merged_lines * sweep_offset
+    x_start = np.where(forward, merged[:, 0], merged[:, 1])
+    x_end = np.where(forward, merged[:, 1], merged[:, 0])
+    sweeps = shapely.linestrings(
+        np.stack(
+            [np.column_stack([x_start, y]), np.column_stack([x_end, y])], axis=1
+        ).reshape(-1, 2, 2)
+    )
+    return list(_rotate(np.array(cells), angle)), list(_rotate(sweeps, angle))
@@ -1,35 +1,205 @@
+import json
+import os
 from pathlib import Path
 
+import geopandas as gpd
+import numpy as np
 import osmnx as ox
+import pandas as pd
 import shapely
 from geojson import Feature, FeatureCollection, dump
 
-from trajgenpy import Logging
-from trajgenpy.Geometries import GeoPolygon
+from trajgenpy import Cache, Logging, Tracing
+from trajgenpy.Geometries import GeoPolygon, touching_components
 
 log = Logging.get_logger()
 
+# Only serve OSM features from the cache, never query the Overpass API
+OFFLINE_ENV = "TRAJGENPY_OFFLINE"
 
-def query_features(area: GeoPolygon, tags: dict):
+# Bump when the layout of the cached entries changes
+_CACHE_VERSION = "2"
+_cache = None
+
+
+def get_cache():
+    # The shared OSM feature cache, entries expire after 30 days
+    global _cache  # noqa: PLW0603
+    if _cache is None:
+        _cache = Cache.DiskCache(
+            Cache.default_directory("osm"), max_bytes=2 << 30, ttl=30 * 24 * 3600
+        )
+    return _cache
+
+
+def _resolve_cache(cache, offline):
+    if cache is True:
+        cache = get_cache()
+    elif cache is False:
+        cache = None
+    if offline is None:
+        offline = os.environ.get(OFFLINE_ENV, "0") not in ("", "0")
+    return cache, offline
+
+
+def _normalize_tags(tags: dict):
+    # {"building": "yes"} and {"building": ["yes"]} query the same features
+    normalized = {}
+    for tag, value in tags.items():
+        if isinstance(value, str):
+            normalized[tag] = [value]
+        elif isinstance(value, list | tuple | set):
+            normalized[tag] = sorted(set(value))
+        else:
+            normalized[tag] = value
+    return json.dumps(normalized, sort_keys=True)
+
+
+def _download_features(area: GeoPolygon, tags: dict):
+    # The geometries of the features as WKB and the value of every tag for each feature
+    geometries = ox.features_from_polygon(area.get_geometry(), tags=tags)
+    attributes = {
+        tag: (
+            geometries[tag].to_numpy(dtype=object)
+            if tag in geometries
+            else np.full(len(geometries), None, dtype=object)
+        )
+        for tag in tags
+    }
+    return {
+        "geometries": shapely.to_wkb(geometries.geometry.to_numpy()),
+        "attributes": attributes,
+    }
+
+
+def _fetch_features(area: GeoPolygon, tags: dict, cache, offline):
+    key = Cache.make_key(
+        _CACHE_VERSION, shapely.to_wkb(area.get_geometry()), _normalize_tags(tags)
+    )
+    features = cache.get(key) if cache is not None else None
+    if features is not None:
+        log.debug("Loaded the OSM features from the cache.")
+    elif offline:
+        msg = "The OSM features are not in the cache and offline mode is enabled."
+        raise LookupError(msg)
+    else:
+        with Tracing.span("osm_query"):
+            features = _download_features(area, tags)
+        if cache is not None:
+            cache.set(key, features)
+    return shapely.from_wkb(features["geometries"]), features["attributes"]
+
+
+def clip_features(area: shapely.Geometry, geometries):
+    # Clip the features to the area, returns the clipped geometries and the indices of
+    # the features they belong to. Only the candidates from the STRtree are intersected
+    # and features that lie inside the area are kept as they are.
+    tree = shapely.STRtree(geometries)
+    indices = np.sort(tree.query(area, predicate="intersects"))
+    candidates = geometries[indices]
+    shapely.prepare(area)
+    inside = shapely.contains_properly(area, candidates)
+    clipped = candidates.copy()
+    clipped[~inside] = shapely.intersection(candidates[~inside], area)
+    keep = ~shapely.is_empty(clipped)
+    return clipped[keep], indices[keep]
+
+
+def _union_touching(geometries):
+    # The union of the geometries, computed per group of touching geometries. The groups
+    # are disjoint, so collecting the unions of the groups gives the union of all of them.
+    if len(geometries) == 0:
+        return shapely.union_all(geometries)
+    labels = touching_components(geometries)
+    order = np.argsort(labels, kind="stable")
+    splits = np.flatnonzero(np.diff(labels[order])) + 1
+    groups = [shapely.union_all(group) for group in np.split(geometries[order], splits)]
+    if len(groups) == 1:
+        return groups[0]
+    parts = shapely.get_parts(groups)
+    type_ids = set(shapely.get_type_id(parts).tolist())
+    if type_ids == {3}:
+        return shapely.multipolygons(parts)
+    if type_ids == {1}:
+        return shapely.multilinestrings(parts)
+    if type_ids == {0}:
+        return shapely.multipoints(parts)
+    return shapely.geometrycollections(parts)
+
+
+def query_feature_table(
+    area: GeoPolygon, tags: dict, cache=False, offline=None, dissolve=False
+):
+    # The features clipped to the area as a GeoDataFrame with a column per tag.
+    # With dissolve, polygons that touch are merged and keep the first value of every tag.
+    if not area.crs and area.crs != "WGS84":
+        msg = "The geometry must use WGS84 CRS!"
+        raise ValueError(msg)
+
+    cache, offline = _resolve_cache(cache, offline)
+
+    with Tracing.span("query_feature_table") as span:
+        try:
+            geometries, attributes = _fetch_features(area, tags, cache, offline)
+        except LookupError:
+            raise
+        except Exception as e:
+            log.error("Something went wrong while trying to query from OSM: %s", e)
+            return gpd.GeoDataFrame(columns=[*tags, "geometry"], crs=area.crs)
+        span.count("features", len(geometries))
+
+        with Tracing.span("clip_features"):
+            clipped, indices = clip_features(area.get_geometry(), geometries)
+            table = gpd.GeoDataFrame(
+                {tag: attributes[tag][indices] for tag in tags},
+                geometry=clipped,
+                crs=area.crs,
+            )
+        if dissolve and len(table) > 0:
+            with Tracing.span("dissolve_features"):
+                # Only areas are merged, lines and points such as roads are kept as they are
+                polygonal = np.isin(shapely.get_type_id(clipped), [3, 6])
+                components = np.arange(len(clipped)) + len(clipped)
+                components[polygonal] = touching_components(clipped[polygonal])
+                table["component"] = components
+                table = table.dissolve(by="component", aggfunc="first")
+                table = table.reset_index(drop=True)
+        span.count("rows", len(table))
+    return table
+
+
+def query_features(area: GeoPolygon, tags: dict, cache=False, offline=None):
+    # cache is True for the shared cache in ~/.cache/trajgenpy/osm, which keeps the
+    # features for up to 30 days, or a Cache.DiskCache. Nothing is cached by default.
+    # In offline mode the features are only served from the cache and a cache miss
+    # raises a LookupError. Returns the union of the features of each tag, use
+    # query_feature_table to keep the metadata of each feature.
     # Check that the geometry has the right crs
     if not area.crs and area.crs != "WGS84":
         msg = "The geometry must use WGS84 CRS!"
         raise ValueError(msg)
 
-    try:
-        geometries = ox.features_from_polygon(area.get_geometry(), tags=tags)
-    except Exception as e:
-        log.error("Something went wrong while trying to query from OSM: ", extra=str(e))
-        return []
-    results = {tag: [] for tag in tags}
-    # Iterate through the features and populate the results dictionary
-    for tag in tags:
-        # Filter the GeoDataFrame by the specified tag
-        filtered_features = geometries[geometries[tag].notna()]
-        results[tag] = shapely.intersection(
-            area.get_geometry(), filtered_features.geometry.unary_union
-        )
-        # TODO Also include the metadata of the features for future analysis
+    cache, offline = _resolve_cache(cache, offline)
+
+    with Tracing.span("query_features") as span:
+        try:
+            geometries, attributes = _fetch_features(area, tags, cache, offline)
+        except LookupError:
+            raise
+        except Exception as e:
+            log.error("Something went wrong while trying to query from OSM: %s", e)
+            return []
+        span.count("features", len(geometries))
+        results = {tag: [] for tag in tags}
+        # Iterate through the features and populate the results dictionary
+        with Tracing.span("merge_features"):
+            # Clip the features first, so that the unions only contain the parts inside the
+            # area, and only union the features that touch
+            clipped, indices = clip_features(area.get_geometry(), geometries)
+            for tag in tags:
+                # Filter the features by the specified tag
+                mask = pd.notna(attributes[tag][indices])
+                results[tag] = _union_touching(clipped[mask])
 
     log.info("Extracted %d features with the tags: %s", len(geometries), str(tags))
     return results
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# Opt-in instrumentation of the planning pipeline. Tracing is disabled by default
+# and can be turned on with enable() or by setting TRAJGENPY_TRACE=1.
+#
+#   Tracing.enable()
+#   with Tracing.span("my_step") as span:
+#       span.count("vertices", 42)
+#   Tracing.write_chrome_trace("trace.json")
+
+_enabled = os.environ.get("TRAJGENPY_TRACE", "0") not in ("", "0")
+_lock = threading.Lock()
+_local = threading.local()
+_events = []
+_origin = time.perf_counter()
+
+
+class Span:
+    def __init__(self, name):
+        self.name = name
+        self.counters = {}
+        self.start = 0.0
+        self.duration = 0.0
+        self.depth = 0
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def __enter__(self):
+        stack = _stack()
+        self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.duration = time.perf_counter() - self.start
+        _stack().pop()
+        with _lock:
+            _events.append(
+                {
+                    "name": self.name,
+                    "start": self.start - _origin,
+                    "duration": self.duration,
+                    "depth": self.depth,
+                    "thread": threading.get_ident(),
+                    "pid": os.getpid(),
+                    "counters": self.counters,
+                }
+            )
+        return False
+
+
+class _NullSpan:
+    # Shared by all spans while tracing is disabled, so that they cost next to nothing
+    def count(self, name, value=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def enable():
+    global _enabled  # noqa: PLW0603
+    _enabled = True
+
+
+def disable():
+    global _enabled  # noqa: PLW0603
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _events.clear()
+
+
+def span(name):
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name)
+
+
+def count(name, value=1):
+    # Add to a counter of the innermost open span of this thread
+    if _enabled:
+        stack = _stack()
+        if stack:
+            stack[-1].count(name, value)
+
+
+def events():
+    with _lock:
+        return list(_events)
+
+
+def summary():
+    # Aggregate the recorded spans by name
+    result = {}
+    for event in events():
+        entry = result.setdefault(
+            event["name"],
+            {"calls": 0, "total": 0.0, "max": 0.0, "counters": {}},
+        )
+        entry["calls"] += 1
+        entry["total"] += event["duration"]
+        entry["max"] = max(entry["max"], event["duration"])
+        for key, value in event["counters"].items():
+            entry["counters"][key] = entry["counters"].get(key, 0) + value
+
+    for entry in result.values():
+        entry["mean"] = entry["total"] / entry["calls"]
+    return result
+
+
+def write_summary(path):
+    with Path(path).open("w") as f:
+        json.dump(summary(), f, indent=2)
+
+
+def write_chrome_trace(path):
+    # Complete events in the Chrome trace event format, viewable in chrome://tracing or Perfetto
+    trace_events = [
+        {
+            "name": event["name"],
+            "ph": "X",
+            "ts": event["start"] * 1e6,
+            "dur": event["duration"] * 1e6,
+            "pid": event["pid"],
+            "tid": event["thread"],
+            "args": event["counters"],
+        }
+        for event in events()
+    ]
+    with Path(path).open("w") as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
@@ -1,3 +1,22 @@
-from trajgenpy import Geometries, Query, Utils
+import importlib
 
-__all__ = ["__doc__", "__version__", "Geometries", "Query", "Utils"]
+from trajgenpy import Geometries, Planning, Tracing
+
+# Query and Utils pull in osmnx, contextily and matplotlib, so they are only
+# imported when they are first accessed
+_LAZY_MODULES = ("Query", "Utils")
+
+__all__ = ["__doc__", "__version__", "Geometries", "Planning", "Query", "Tracing", "Utils"]
+
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        module = importlib.import_module(f"{__name__}.{name}")
+        globals()[name] = module
+        return module
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_MODULES))
@@ -1,12 +1,17 @@
 
 #include "bcd.h"
+#include "cell_ordering.h"
 #include "cgal_comm.h"
 #include "decomposition.h"
 #include "sweep.h"
+#include "visibility_graph.h"
 #include "weakly_monotone.h"
 
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <array>
+#include <stdexcept>
 #include <string>
 #include <vector>
 
@@ -15,8 +20,15 @@
 #define STRINGIFY(x) #x
 #define MACRO_STRINGIFY(x) STRINGIFY(x)
 
+// The inexact kernel build is the same module under a different name
+#ifndef TRAJGENPY_MODULE_NAME
+#define TRAJGENPY_MODULE_NAME bindings
+#endif
+
 namespace py = pybind11;
 
+typedef py::array_t<double, py::array::c_style | py::array::forcecast> CoordinateArray;
+
 std::string polygon_to_string(const Polygon_2 &poly)
 {
     std::stringstream ss;
@@ -28,8 +40,41 @@ std::string polygon_to_string(const Polygon_2 &poly)
     return ss.str();
 }
 
-py::list decompose(const PolygonWithHoles &pwh)
+polygon_coverage_planning::DirectionPruning direction_pruning(double angular_tolerance, size_t max_directions)
+{
+    polygon_coverage_planning::DirectionPruning pruning;
+    pruning.angular_tolerance = angular_tolerance;
+    pruning.max_directions = max_directions;
+    return pruning;
+}
+
+polygon_coverage_planning::DecompositionType decomposition_type(const std::string &method)
+{
+    if (method == "bcd")
+    {
+        return polygon_coverage_planning::DecompositionType::kBCD;
+    }
+    if (method == "tcd")
+    {
+        return polygon_coverage_planning::DecompositionType::kTCD;
+    }
+    throw std::invalid_argument("Decomposition method must be 'bcd' or 'tcd'.");
+}
+
+bool compute_best_decomposition(polygon_coverage_planning::DecompositionType type, const PolygonWithHoles &pwh, std::vector<Polygon_2> *cells,
+                                size_t num_threads, std::vector<Direction_2> *cell_dirs, Direction_2 *decomposition_dir,
+                                const polygon_coverage_planning::DirectionPruning &pruning)
 {
+    if (type == polygon_coverage_planning::DecompositionType::kTCD)
+    {
+        return polygon_coverage_planning::computeBestTCDFromPolygonWithHoles(pwh, cells, num_threads, cell_dirs, decomposition_dir, pruning);
+    }
+    return polygon_coverage_planning::computeBestBCDFromPolygonWithHoles(pwh, cells, num_threads, cell_dirs, decomposition_dir, pruning);
+}
+
+py::list decompose(const PolygonWithHoles &pwh, size_t num_threads = 1, double angular_tolerance = 0.0, size_t max_directions = 0, const std::string &method = "bcd")
+{
+    const polygon_coverage_planning::DecompositionType type = decomposition_type(method);
     std::vector<Polygon_2> decomposedPolygons;
     std::vector<Line_2> cell_dirs;
     double msa;
@@ -41,7 +86,9 @@ py::list decompose(const PolygonWithHoles &pwh)
     // TODO before calculating BCD, check whether it is a valid polygon with holes and check that the function does not fail
     try
     {
-        polygon_coverage_planning::computeBestBCDFromPolygonWithHoles(pwh, &decomposedPolygons);
+        py::gil_scoped_release release;
+        compute_best_decomposition(type, pwh, &decomposedPolygons, num_threads, nullptr, nullptr,
+                                   direction_pruning(angular_tolerance, max_directions));
     }
     catch (const std::exception &e)
     {
@@ -55,35 +102,294 @@ py::list decompose(const PolygonWithHoles &pwh)
     return result;
 }
 
-py::list generate_sweeps(const Polygon_2 &poly, const double sweep_offset = 50.0, bool clockwise = false, bool connect_sweeps = false)
+Polygon_2 array_to_polygon(const CoordinateArray &coords)
 {
-    py::list result = py::list();
+    if (coords.ndim() != 2 || coords.shape(1) != 2)
+    {
+        throw std::invalid_argument("Coordinates must be an (N, 2) array.");
+    }
+    auto c = coords.unchecked<2>();
+    py::ssize_t num_vertices = c.shape(0);
+    // Ignore the closing vertex of a closed ring.
+    if (num_vertices > 1 && c(0, 0) == c(num_vertices - 1, 0) && c(0, 1) == c(num_vertices - 1, 1))
+    {
+        num_vertices--;
+    }
+
+    Polygon_2 poly;
+    for (py::ssize_t i = 0; i < num_vertices; ++i)
+    {
+        poly.push_back(Point_2(c(i, 0), c(i, 1)));
+    }
+    return poly;
+}
+
+PolygonWithHoles arrays_to_polygon_with_holes(const CoordinateArray &boundary, const std::vector<CoordinateArray> &holes)
+{
+    PolygonWithHoles pwh(array_to_polygon(boundary));
+    for (const auto &hole : holes)
+    {
+        pwh.add_hole(array_to_polygon(hole));
+    }
+    return pwh;
+}
 
-    if (!poly.is_empty())
+py::array_t<double> polygon_to_array(const Polygon_2 &poly)
+{
+    py::array_t<double> coords(std::vector<py::ssize_t>{static_cast<py::ssize_t>(poly.size()), 2});
+    auto c = coords.mutable_unchecked<2>();
+    py::ssize_t i = 0;
+    for (auto v = poly.vertices_begin(); v != poly.vertices_end(); ++v, ++i)
     {
-        // // Traverse through all polygons
-        std::vector<std::vector<Segment_2>> sweeps;
-        // TODO Reuse the directions from the polygon decomposition for performance optimisation
-        Direction_2 bestDir;
-        polygon_coverage_planning::findBestSweepDir(poly, &bestDir);
+        c(i, 0) = CGAL::to_double(v->x());
+        c(i, 1) = CGAL::to_double(v->y());
+    }
+    return coords;
+}
 
-        // Construct the sweep plan
-        std::vector<Segment_2> sweep;
-        if (polygon_coverage_planning::computeSweep(poly, sweep_offset, bestDir, !clockwise, connect_sweeps, sweep))
+// Flatten the polygons into an (N, 2) coordinate array and an offset array,
+// such that polygon i has the vertices coords[offsets[i]:offsets[i + 1]].
+py::tuple polygons_to_arrays(const std::vector<Polygon_2> &polygons)
+{
+    size_t num_vertices = 0;
+    for (const auto &poly : polygons)
+    {
+        num_vertices += poly.size();
+    }
+
+    py::array_t<double> coords(std::vector<py::ssize_t>{static_cast<py::ssize_t>(num_vertices), 2});
+    py::array_t<int64_t> offsets(static_cast<py::ssize_t>(polygons.size() + 1));
+    auto c = coords.mutable_unchecked<2>();
+    auto o = offsets.mutable_unchecked<1>();
+    py::ssize_t i = 0;
+    o(0) = 0;
+    for (size_t p = 0; p < polygons.size(); ++p)
+    {
+        for (auto v = polygons[p].vertices_begin(); v != polygons[p].vertices_end(); ++v, ++i)
         {
-            for (auto segment : sweep)
-                result.append(segment);
+            c(i, 0) = CGAL::to_double(v->x());
+            c(i, 1) = CGAL::to_double(v->y());
         }
-        else
+        o(p + 1) = i;
+    }
+    return py::make_tuple(coords, offsets);
+}
+
+// Convert segments into an (M, 2, 2) array of [[source_x, source_y], [target_x, target_y]].
+py::array_t<double> segments_to_array(const std::vector<Segment_2> &segments)
+{
+    py::array_t<double> result(std::vector<py::ssize_t>{static_cast<py::ssize_t>(segments.size()), 2, 2});
+    auto r = result.mutable_unchecked<3>();
+    for (size_t i = 0; i < segments.size(); ++i)
+    {
+        r(i, 0, 0) = CGAL::to_double(segments[i].source().x());
+        r(i, 0, 1) = CGAL::to_double(segments[i].source().y());
+        r(i, 1, 0) = CGAL::to_double(segments[i].target().x());
+        r(i, 1, 1) = CGAL::to_double(segments[i].target().y());
+    }
+    return result;
+}
+
+py::array_t<double> points_to_array(const std::vector<Point_2> &points)
+{
+    py::array_t<double> result(std::vector<py::ssize_t>{static_cast<py::ssize_t>(points.size()), 2});
+    auto r = result.mutable_unchecked<2>();
+    for (size_t i = 0; i < points.size(); ++i)
+    {
+        r(i, 0) = CGAL::to_double(points[i].x());
+        r(i, 1) = CGAL::to_double(points[i].y());
+    }
+    return result;
+}
+
+py::tuple decompose_array(const CoordinateArray &boundary, const std::vector<CoordinateArray> &holes, size_t num_threads = 1, double angular_tolerance = 0.0, size_t max_directions = 0, const std::string &method = "bcd")
+{
+    const polygon_coverage_planning::DecompositionType type = decomposition_type(method);
+    PolygonWithHoles pwh = arrays_to_polygon_with_holes(boundary, holes);
+    std::vector<Polygon_2> decomposedPolygons;
+    try
+    {
+        py::gil_scoped_release release;
+        compute_best_decomposition(type, pwh, &decomposedPolygons, num_threads, nullptr, nullptr,
+                                   direction_pruning(angular_tolerance, max_directions));
+    }
+    catch (const std::exception &e)
+    {
+        std::cout << e.what() << '\n';
+    }
+    return polygons_to_arrays(decomposedPolygons);
+}
+
+// The number of directions searched by decompose_array after pruning. Every
+// edge direction is searched both ways, so this is twice the number of groups.
+size_t count_decomposition_directions(const CoordinateArray &boundary, const std::vector<CoordinateArray> &holes, double angular_tolerance = 0.0, size_t max_directions = 0)
+{
+    PolygonWithHoles pwh = arrays_to_polygon_with_holes(boundary, holes);
+    return polygon_coverage_planning::findPerpEdgeDirections(pwh, direction_pruning(angular_tolerance, max_directions)).size();
+}
+
+// Decompose in a given direction instead of searching for the best one, e.g. to
+// redecompose a part of a polygon consistently with the rest of the decomposition.
+py::tuple decompose_in_direction_array(const CoordinateArray &boundary, const std::vector<CoordinateArray> &holes, const std::array<double, 2> &direction)
+{
+    PolygonWithHoles pwh = arrays_to_polygon_with_holes(boundary, holes);
+    std::vector<Polygon_2> decomposedPolygons;
+    {
+        py::gil_scoped_release release;
+        decomposedPolygons = polygon_coverage_planning::computeBCD(pwh, Direction_2(direction[0], direction[1]));
+    }
+    return polygons_to_arrays(decomposedPolygons);
+}
+
+std::vector<Segment_2> compute_sweeps(const Polygon_2 &poly, const Direction_2 &dir, const double sweep_offset, bool clockwise, bool connect_sweeps)
+{
+    // Construct the sweep plan
+    std::vector<Segment_2> sweep;
+    if (!polygon_coverage_planning::computeSweep(poly, sweep_offset, dir, !clockwise, connect_sweeps, sweep))
+    {
+        throw std::runtime_error("Sweep computation failed");
+    }
+    return sweep;
+}
+
+std::vector<Segment_2> compute_sweeps(const Polygon_2 &poly, const double sweep_offset, bool clockwise, bool connect_sweeps)
+{
+    if (poly.is_empty())
+    {
+        return std::vector<Segment_2>();
+    }
+
+    // plan_coverage reuses the directions found during the decomposition instead
+    Direction_2 bestDir;
+    polygon_coverage_planning::findBestSweepDir(poly, &bestDir);
+    return compute_sweeps(poly, bestDir, sweep_offset, clockwise, connect_sweeps);
+}
+
+py::list generate_sweeps(const Polygon_2 &poly, const double sweep_offset = 50.0, bool clockwise = false, bool connect_sweeps = false)
+{
+    std::vector<Segment_2> sweep;
+    {
+        py::gil_scoped_release release;
+        sweep = compute_sweeps(poly, sweep_offset, clockwise, connect_sweeps);
+    }
+
+    py::list result = py::list();
+    for (auto segment : sweep)
+        result.append(segment);
+    return result;
+}
+
+py::array_t<double> generate_sweeps_array(const CoordinateArray &polygon, const double sweep_offset = 50.0, bool clockwise = false, bool connect_sweeps = false)
+{
+    Polygon_2 poly = array_to_polygon(polygon);
+    std::vector<Segment_2> sweep;
+    {
+        py::gil_scoped_release release;
+        sweep = compute_sweeps(poly, sweep_offset, clockwise, connect_sweeps);
+    }
+    return segments_to_array(sweep);
+}
+
+py::dict plan_coverage(const CoordinateArray &boundary, const std::vector<CoordinateArray> &holes, const double sweep_offset = 50.0, bool clockwise = false, bool connect_sweeps = false, size_t num_threads = 1, double angular_tolerance = 0.0, size_t max_directions = 0, const std::string &method = "bcd")
+{
+    const polygon_coverage_planning::DecompositionType type = decomposition_type(method);
+    PolygonWithHoles pwh = arrays_to_polygon_with_holes(boundary, holes);
+    std::vector<Polygon_2> cells;
+    std::vector<Direction_2> cell_dirs;
+    Direction_2 bcd_dir(1, 0);
+    std::vector<Segment_2> sweeps;
+    std::vector<size_t> sweep_offsets = {0};
+    {
+        py::gil_scoped_release release;
+        compute_best_decomposition(type, pwh, &cells, num_threads, &cell_dirs, &bcd_dir,
+                                   direction_pruning(angular_tolerance, max_directions));
+        for (size_t i = 0; i < cells.size(); ++i)
         {
-            throw std::runtime_error("Sweep computation failed");
+            // The sweep requires a counterclockwise cell, the direction does not depend on the orientation
+            Polygon_2 cell = cells[i];
+            if (cell.is_clockwise_oriented())
+            {
+                cell.reverse_orientation();
+            }
+            std::vector<Segment_2> sweep = compute_sweeps(cell, cell_dirs[i], sweep_offset, clockwise, connect_sweeps);
+            sweeps.insert(sweeps.end(), sweep.begin(), sweep.end());
+            sweep_offsets.push_back(sweeps.size());
         }
     }
 
+    py::tuple decomposition = polygons_to_arrays(cells);
+    py::array_t<int64_t> sweep_offsets_array(static_cast<py::ssize_t>(sweep_offsets.size()));
+    auto o = sweep_offsets_array.mutable_unchecked<1>();
+    for (size_t i = 0; i < sweep_offsets.size(); ++i)
+    {
+        o(i) = sweep_offsets[i];
+    }
+    py::array_t<double> directions(std::vector<py::ssize_t>{static_cast<py::ssize_t>(cell_dirs.size()), 2});
+    auto d = directions.mutable_unchecked<2>();
+    for (size_t i = 0; i < cell_dirs.size(); ++i)
+    {
+        d(i, 0) = CGAL::to_double(cell_dirs[i].dx());
+        d(i, 1) = CGAL::to_double(cell_dirs[i].dy());
+    }
+
+    py::array_t<double> decomposition_direction(2);
+    auto b = decomposition_direction.mutable_unchecked<1>();
+    b(0) = CGAL::to_double(bcd_dir.dx());
+    b(1) = CGAL::to_double(bcd_dir.dy());
+
+    py::dict result;
+    result["cells"] = decomposition[0];
+    result["cell_offsets"] = decomposition[1];
+    result["sweeps"] = segments_to_array(sweeps);
+    result["sweep_offsets"] = sweep_offsets_array;
+    result["directions"] = directions;
+    result["decomposition_direction"] = decomposition_direction;
     return result;
 }
 
-PYBIND11_MODULE(bindings, m)
+py::tuple order_cells(const CoordinateArray &entries, const CoordinateArray &exits, const py::object &start, double time_budget = 0.5)
+{
+    if (entries.ndim() != 3 || entries.shape(2) != 2 || exits.ndim() != 3 ||
+        exits.shape(0) != entries.shape(0) || exits.shape(1) != entries.shape(1) || exits.shape(2) != 2)
+    {
+        throw std::invalid_argument("Entries and exits must be (C, K, 2) arrays of the same shape.");
+    }
+    const size_t num_candidates = static_cast<size_t>(entries.shape(1));
+    std::vector<polygon_coverage_planning::Point2d> entry_points(entries.shape(0) * num_candidates);
+    std::vector<polygon_coverage_planning::Point2d> exit_points(entry_points.size());
+    auto e = entries.unchecked<3>();
+    auto x = exits.unchecked<3>();
+    for (size_t i = 0; i < entry_points.size(); ++i)
+    {
+        const py::ssize_t c = i / num_candidates, k = i % num_candidates;
+        entry_points[i] = {e(c, k, 0), e(c, k, 1)};
+        exit_points[i] = {x(c, k, 0), x(c, k, 1)};
+    }
+    polygon_coverage_planning::Point2d start_point;
+    if (!start.is_none())
+    {
+        start_point = start.cast<polygon_coverage_planning::Point2d>();
+    }
+
+    polygon_coverage_planning::CellOrder order;
+    {
+        py::gil_scoped_release release;
+        order = polygon_coverage_planning::orderCells(entry_points, exit_points, num_candidates,
+                                                      start.is_none() ? nullptr : &start_point, time_budget);
+    }
+    py::array_t<int64_t> cells(static_cast<py::ssize_t>(order.cells.size()));
+    py::array_t<int64_t> variants(static_cast<py::ssize_t>(order.variants.size()));
+    auto c = cells.mutable_unchecked<1>();
+    auto v = variants.mutable_unchecked<1>();
+    for (size_t i = 0; i < order.cells.size(); ++i)
+    {
+        c(i) = order.cells[i];
+        v(i) = order.variants[i];
+    }
+    return py::make_tuple(cells, variants, order.cost);
+}
+
+PYBIND11_MODULE(TRAJGENPY_MODULE_NAME, m)
 {
     m.doc() = R"pbdoc(
         Pybind11 core plugin
@@ -95,7 +401,10 @@ PYBIND11_MODULE(bindings, m)
            :toctree: _generate
 
            decompose
+           decompose_array
            generate_sweeps
+           generate_sweeps_array
+           plan_coverage
     )pbdoc";
 
     // Expose the Point_2 type to Python
@@ -121,6 +430,7 @@ PYBIND11_MODULE(bindings, m)
                 vertices.append(py::cast(*v));
             }
             return vertices; })
+        .def_property_readonly("vertices_array", &polygon_to_array)
         .def("__str__", [](const Polygon_2 &self)
              {
             std::stringstream ss;
@@ -166,16 +476,104 @@ PYBIND11_MODULE(bindings, m)
             ss << "[" << s.source() << ", " << s.target() << "]";
             return ss.str(); });
 
+    typedef polygon_coverage_planning::visibility_graph::VisibilityGraph VisibilityGraph;
+    py::class_<VisibilityGraph>(m, "VisibilityGraph", R"pbdoc(
+        The reduced visibility graph of a polygon with holes, used to find shortest
+        paths between two points in the polygon.
+
+            Args:
+                boundary: An (N, 2) float64 array with the outer boundary.
+                holes: A list of (K, 2) float64 arrays, one per hole.
+    )pbdoc")
+        .def(py::init([](const CoordinateArray &boundary, const std::vector<CoordinateArray> &holes)
+                      {
+            PolygonWithHoles pwh = arrays_to_polygon_with_holes(boundary, holes);
+            std::unique_ptr<VisibilityGraph> graph;
+            {
+                py::gil_scoped_release release;
+                graph.reset(new VisibilityGraph(pwh));
+            }
+            if (!graph->isInitialized())
+            {
+                throw std::runtime_error("Visibility graph construction failed");
+            }
+            return graph; }),
+             py::arg("boundary"), py::arg("holes") = std::vector<CoordinateArray>())
+        .def_property_readonly("num_nodes", &VisibilityGraph::size)
+        .def_property_readonly("num_edges", [](const VisibilityGraph &graph)
+                               { return graph.getNumberOfEdges() / 2; })
+        .def_property_readonly("nodes", [](const VisibilityGraph &graph)
+                               {
+            std::vector<Point_2> nodes;
+            for (size_t i = 0; i < graph.size(); ++i)
+            {
+                nodes.push_back(graph.getNodeProperty(i)->coordinates);
+            }
+            return points_to_array(nodes); })
+        .def("distance_matrix", [](const VisibilityGraph &graph)
+             {
+            std::vector<std::vector<double>> costs;
+            std::vector<std::vector<size_t>> came_from;
+            {
+                py::gil_scoped_release release;
+                graph.solveAllPairs(&costs, &came_from);
+            }
+            py::array_t<double> result(std::vector<py::ssize_t>{static_cast<py::ssize_t>(costs.size()), static_cast<py::ssize_t>(costs.size())});
+            auto r = result.mutable_unchecked<2>();
+            for (size_t i = 0; i < costs.size(); ++i)
+            {
+                for (size_t j = 0; j < costs.size(); ++j)
+                {
+                    r(i, j) = costs[i][j];
+                }
+            }
+            return result; },
+             R"pbdoc(
+        Returns the (V, V) shortest path lengths between all graph nodes, computed with
+        one Dijkstra search per node. Unreachable pairs are infinite.
+    )pbdoc")
+        .def("shortest_path", [](const VisibilityGraph &graph, const std::array<double, 2> &start, const std::array<double, 2> &goal, bool use_path_trees)
+             {
+            std::vector<Point_2> waypoints;
+            bool solved;
+            {
+                py::gil_scoped_release release;
+                solved = graph.solve(Point_2(start[0], start[1]), Point_2(goal[0], goal[1]), &waypoints, use_path_trees);
+            }
+            if (!solved)
+            {
+                throw std::runtime_error("Shortest path computation failed");
+            }
+            return points_to_array(waypoints); },
+             R"pbdoc(
+        Returns the shortest path from start to goal as a (K, 2) array of waypoints.
+        Start and goal outside of the polygon are projected onto its boundary.
+        With use_path_trees the memoised shortest path trees of the nodes visible
+        from start are reused, otherwise the graph is searched with A*.
+    )pbdoc",
+             py::arg("start"), py::arg("goal"), py::arg("use_path_trees") = true);
+
     m.def("decompose", &decompose, R"pbdoc(
         Decomposes the input polygon into a list of polygons.
 
             Args:
                 polygon: A Polygon_with_holes_2 object.
+                num_threads: Number of worker threads used to search the decomposition
+                    directions. 0 uses all hardware threads. The result does not
+                    depend on the number of threads.
+                angular_tolerance: Decomposition directions whose angles differ by less
+                    than this (in radians) are searched only once. 0 only merges
+                    parallel edges.
+                max_directions: Search at most this many directions, those with the
+                    longest total edge length. 0 searches all.
+                method: "bcd" for the boustrophedon decomposition or "tcd" for the
+                    trapezoidal decomposition, which has more but convex cells.
+                    "tcd" requires the exact kernel.
 
             Returns:
                 A list of Polygon_2 objects. 
     )pbdoc",
-          py::arg("pwh"), "PolygonWithHoles");
+          py::arg("pwh"), py::arg("num_threads") = 1, py::arg("angular_tolerance") = 0.0, py::arg("max_directions") = 0, py::arg("method") = "bcd");
 
     m.def("generate_sweeps", &generate_sweeps, R"pbdoc(
         Generates a sweep pattern from the input polygon.
@@ -188,6 +586,121 @@ PYBIND11_MODULE(bindings, m)
     )pbdoc",
           py::arg("polygon"), py::arg("sweep_offset"), py::arg("clockwise") = false, py::arg("connect_sweeps") = false);
 
+    m.def("decompose_array", &decompose_array, R"pbdoc(
+        Decomposes the polygon given by coordinate arrays into a list of polygons.
+
+            Args:
+                boundary: An (N, 2) float64 array with the outer boundary.
+                holes: A list of (K, 2) float64 arrays, one per hole.
+                num_threads: Number of worker threads used to search the decomposition
+                    directions. 0 uses all hardware threads.
+                angular_tolerance: Decomposition directions whose angles differ by less
+                    than this (in radians) are searched only once. 0 only merges
+                    parallel edges.
+                max_directions: Search at most this many directions, those with the
+                    longest total edge length. 0 searches all.
+                method: "bcd" for the boustrophedon decomposition or "tcd" for the
+                    trapezoidal decomposition, which has more but convex cells.
+                    "tcd" requires the exact kernel.
+
+            Returns:
+                A tuple (coords, offsets) where cell i has the vertices
+                coords[offsets[i]:offsets[i + 1]].
+    )pbdoc",
+          py::arg("boundary"), py::arg("holes") = std::vector<CoordinateArray>(), py::arg("num_threads") = 1,
+          py::arg("angular_tolerance") = 0.0, py::arg("max_directions") = 0, py::arg("method") = "bcd");
+
+    m.def("count_decomposition_directions", &count_decomposition_directions, R"pbdoc(
+        Returns the number of decomposition directions decompose_array searches,
+        counting each edge direction and its opposite.
+
+            Args:
+                boundary, holes, angular_tolerance, max_directions: As for
+                    decompose_array.
+    )pbdoc",
+          py::arg("boundary"), py::arg("holes") = std::vector<CoordinateArray>(),
+          py::arg("angular_tolerance") = 0.0, py::arg("max_directions") = 0);
+
+    m.def("decompose_in_direction_array", &decompose_in_direction_array, R"pbdoc(
+        Computes the boustrophedon decomposition in the given direction.
+
+            Args:
+                boundary: An (N, 2) float64 array with the outer boundary.
+                holes: A list of (K, 2) float64 arrays, one per hole.
+                direction: The (dx, dy) decomposition direction, e.g. the
+                    "decomposition_direction" returned by plan_coverage.
+
+            Returns:
+                A tuple (coords, offsets), see decompose_array.
+    )pbdoc",
+          py::arg("boundary"), py::arg("holes"), py::arg("direction"));
+
+    m.def("generate_sweeps_array", &generate_sweeps_array, R"pbdoc(
+        Generates a sweep pattern from the polygon given by a coordinate array.
+
+            Args:
+                polygon: An (N, 2) float64 array with the polygon vertices.
+
+            Returns:
+                An (M, 2, 2) array with the source and target of each sweep segment.
+    )pbdoc",
+          py::arg("polygon"), py::arg("sweep_offset"), py::arg("clockwise") = false, py::arg("connect_sweeps") = false);
+
+    m.def("plan_coverage", &plan_coverage, R"pbdoc(
+        Decomposes the polygon and generates the sweeps of every cell in a single pass.
+        The sweep direction of each cell is the one found during the decomposition.
+
+            Args:
+                boundary: An (N, 2) float64 array with the outer boundary.
+                holes: A list of (K, 2) float64 arrays, one per hole.
+                sweep_offset: The distance between two sweeps.
+                num_threads: Number of worker threads used to search the decomposition
+                    directions. 0 uses all hardware threads.
+                angular_tolerance: Decomposition directions whose angles differ by less
+                    than this (in radians) are searched only once. 0 only merges
+                    parallel edges.
+                max_directions: Search at most this many directions, those with the
+                    longest total edge length. 0 searches all.
+                method: "bcd" for the boustrophedon decomposition or "tcd" for the
+                    trapezoidal decomposition, which has more but convex cells.
+                    "tcd" requires the exact kernel.
+
+            Returns:
+                A dict with the cells as "cells" and "cell_offsets" (see decompose_array),
+                the (M, 2, 2) "sweeps" array where the sweeps of cell i are
+                sweeps[sweep_offsets[i]:sweep_offsets[i + 1]], the (C, 2) sweep
+                "directions" of the cells and the "decomposition_direction" of the decomposition.
+    )pbdoc",
+          py::arg("boundary"), py::arg("holes"), py::arg("sweep_offset"), py::arg("clockwise") = false, py::arg("connect_sweeps") = false, py::arg("num_threads") = 1,
+          py::arg("angular_tolerance") = 0.0, py::arg("max_directions") = 0, py::arg("method") = "bcd");
+
+    m.def("order_cells", &order_cells, R"pbdoc(
+        Orders cells and chooses how each cell is traversed, such that the transits
+        between the cells are short. Uses nearest neighbour construction followed by
+        2-opt and an exact choice of the traversal variants within the time budget.
+
+            Args:
+                entries: A (C, K, 2) float64 array with K candidate entry points per cell.
+                exits: A (C, K, 2) float64 array with the exit point of each candidate.
+                start: An optional (x, y) start point.
+                time_budget: The maximum run time in seconds.
+
+            Returns:
+                A tuple (cells, variants, cost) with the cell indices in visiting order,
+                the variant of each visited cell and the total transit distance.
+                Variant v < K traverses candidate v, variant v >= K traverses
+                candidate v - K backwards, from its exit to its entry.
+    )pbdoc",
+          py::arg("entries"), py::arg("exits"), py::arg("start") = py::none(), py::arg("time_budget") = 0.5);
+
+    m.def("visibility_graph_cache_size", &polygon_coverage_planning::visibilityGraphCacheSize, R"pbdoc(
+        Returns the number of cached visibility graphs used to connect sweeps.
+    )pbdoc");
+
+    m.def("clear_visibility_graph_cache", &polygon_coverage_planning::clearVisibilityGraphCache, R"pbdoc(
+        Removes all cached visibility graphs.
+    )pbdoc");
+
 #ifdef VERSION_INFO
     m.attr("__version__") = MACRO_STRINGIFY(VERSION_INFO);
 #else
@@ -17,6 +17,9 @@
  * this program.  If not, see <http://www.gnu.org/licenses/>.
  */
 
+#include <algorithm>
+#include <set>
+#include <stdexcept>
 #include <vector>
 
 #include "bcd.h"
@@ -25,6 +28,42 @@
 #include <cassert>
 namespace polygon_coverage_planning
 {
+    namespace
+    {
+        // The edges in L are sorted from bottom to top along the sweep line, two
+        // consecutive edges bound one open cell. Only predicates are evaluated to
+        // locate a point, no intersections are constructed.
+        bool isBelow(const Segment_2 &e, const Point_2 &p)
+        {
+            return CGAL::compare_y_at_x(p, e) == CGAL::LARGER;
+        }
+
+        bool isAbove(const Segment_2 &e, const Point_2 &p)
+        {
+            return CGAL::compare_y_at_x(p, e) == CGAL::SMALLER;
+        }
+
+        // Index of the first edge that is not below p.
+        size_t lowerBound(const SweepEdges &L, const Point_2 &p)
+        {
+            return L.partitionPoint([&p](const Segment_2 &e)
+                                    { return isBelow(e, p); });
+        }
+
+        // Find the edge through p that satisfies pred. The edges through p are
+        // adjacent in L. Returns L.size() if there is none.
+        template <typename Predicate>
+        size_t findEdge(const SweepEdges &L, const Point_2 &p,
+                        const Predicate &pred)
+        {
+            for (size_t i = lowerBound(L, p); i < L.size() && !isAbove(L[i], p); ++i)
+            {
+                if (pred(L[i]))
+                    return i;
+            }
+            return L.size();
+        }
+    } // namespace
 
     std::vector<Polygon_2> computeBCD(const PolygonWithHoles &polygon_in,
                                       const Direction_2 &dir)
@@ -40,19 +79,17 @@ namespace polygon_coverage_planning
             getXSortedVertices(rotated_polygon);
 
         // Initialize edge list.
-        std::list<Segment_2> L;
-        std::list<Polygon_2> open_polygons;
+        SweepEdges L;
+        IndexedSequence<Polygon_2> open_polygons;
         std::vector<Polygon_2> closed_polygons;
-        std::vector<Point_2> processed_vertices;
+        std::set<Point_2> processed_vertices;
         for (size_t i = 0; i < sorted_vertices.size(); ++i)
         {
             const VertexConstCirculator &v = sorted_vertices[i];
             // v already processed.
-            if (std::find(processed_vertices.begin(), processed_vertices.end(), *v) !=
-                processed_vertices.end())
+            if (processed_vertices.count(*v) > 0)
                 continue;
-            processEvent(rotated_polygon, v, &sorted_vertices, &processed_vertices, &L,
-                         &open_polygons, &closed_polygons);
+            processEvent(v, &processed_vertices, &L, &open_polygons, &closed_polygons);
         }
 
         // Rotate back all polygons.
@@ -98,13 +135,11 @@ namespace polygon_coverage_planning
         return sorted_vertices;
     }
 
-    void processEvent(const PolygonWithHoles &pwh, const VertexConstCirculator &v,
-                      std::vector<VertexConstCirculator> *sorted_vertices,
-                      std::vector<Point_2> *processed_vertices,
-                      std::list<Segment_2> *L, std::list<Polygon_2> *open_polygons,
+    void processEvent(const VertexConstCirculator &v,
+                      std::set<Point_2> *processed_vertices, SweepEdges *L,
+                      IndexedSequence<Polygon_2> *open_polygons,
                       std::vector<Polygon_2> *closed_polygons)
     {
-        assert(sorted_vertices);
         assert(processed_vertices);
         assert(L);
         assert(open_polygons);
@@ -112,9 +147,9 @@ namespace polygon_coverage_planning
 
         Polygon_2::Traits::Equal_2 eq_2;
 
-        // Compute intersection.
+        // The sweep line. Intersections with it are only computed for the edges
+        // that bound a cell which is closed or split.
         Line_2 l(*v, Direction_2(0, 1));
-        std::vector<Point_2> intersections = getIntersections(*L, l);
 
         // Get e_lower and e_upper.
         Segment_2 e_prev(*v, *std::prev(v));
@@ -130,7 +165,6 @@ namespace polygon_coverage_planning
             e_next = Segment_2(*std::next(v), *std::next(v, 2));
         }
 
-        Polygon_2::Traits::Less_y_2 less_y_2;
         Polygon_2::Traits::Less_x_2 less_x_2;
         Segment_2 e_lower = e_prev;
         Segment_2 e_upper = e_next;
@@ -145,87 +179,73 @@ namespace polygon_coverage_planning
                 std::swap(e_lower, e_upper);
 
             // Determine whether we close one or close two and open one.
-            // TODO(rikba): instead of looking at unbounded side, look at adjacent edge
-            // angle
-            bool close_one = outOfPWH(pwh, *v + Vector_2(1e-6, 0));
+            bool close_one = leavesPWH(v, Vector_2(1, 0));
 
             // Find edges to remove.
-            std::list<Segment_2>::iterator e_lower_it = L->begin();
-            size_t e_lower_id = 0;
-            for (; e_lower_it != L->end(); ++e_lower_it)
-            {
-                if (*e_lower_it == e_lower || *e_lower_it == e_lower.opposite())
-                {
-                    break;
-                }
-                e_lower_id++;
-            }
-
-            std::list<Segment_2>::iterator e_upper_it = std::next(e_lower_it);
-            size_t e_upper_id = e_lower_id + 1;
-            size_t lower_cell_id = e_lower_id / 2;
-            size_t upper_cell_id = e_upper_id / 2;
+            const size_t e_lower_id = findEdge(
+                *L, e_lower.source(), [&e_lower](const Segment_2 &e)
+                { return e == e_lower || e == e_lower.opposite(); });
+            if (e_lower_id + 1 >= L->size())
+                throw std::runtime_error("Sweep line status is missing an edge.");
+            const size_t e_upper_id = e_lower_id + 1;
+            const size_t lower_cell_id = e_lower_id / 2;
+            const size_t upper_cell_id = e_upper_id / 2;
 
             if (close_one)
             {
-                std::list<Polygon_2>::iterator cell =
-                    std::next(open_polygons->begin(), lower_cell_id);
-                cell->push_back(e_lower.source());
-                Polygon_2::Traits::Equal_2 eq_2;
+                Polygon_2 &cell = (*open_polygons)[lower_cell_id];
+                cell.push_back(e_lower.source());
                 if (!eq_2(e_lower.source(), e_upper.source()))
                 {
-                    cell->push_back(e_upper.source());
+                    cell.push_back(e_upper.source());
                 }
-                if (cleanupPolygon(&*cell))
-                    closed_polygons->push_back(*cell);
-                L->erase(e_lower_it);
-                L->erase(e_upper_it);
-                open_polygons->erase(cell);
+                if (cleanupPolygon(&cell))
+                    closed_polygons->push_back(cell);
+                L->erase(e_lower_id);
+                L->erase(e_lower_id);
+                open_polygons->erase(lower_cell_id);
             }
             else
             {
                 // Close two cells, open one.
-                // Close lower cell.
                 assert(e_lower_id > 0);
-                assert(intersections.size() > e_upper_id + 1);
-                std::list<Polygon_2>::iterator lower_cell =
-                    std::next(open_polygons->begin(), lower_cell_id);
-                lower_cell->push_back(intersections[e_lower_id - 1]);
-                lower_cell->push_back(intersections[e_lower_id]);
-                if (cleanupPolygon(&*lower_cell))
-                    closed_polygons->push_back(*lower_cell);
+                assert(L->size() > e_upper_id + 1);
+                const Point_2 below = intersectSweepLine((*L)[e_lower_id - 1], l);
+                const Point_2 above = intersectSweepLine((*L)[e_upper_id + 1], l);
+                // Close lower cell.
+                Polygon_2 &lower_cell = (*open_polygons)[lower_cell_id];
+                lower_cell.push_back(below);
+                lower_cell.push_back(intersectSweepLine((*L)[e_lower_id], l));
+                if (cleanupPolygon(&lower_cell))
+                    closed_polygons->push_back(lower_cell);
                 // Close upper cell.
-                std::list<Polygon_2>::iterator upper_cell =
-                    std::next(open_polygons->begin(), upper_cell_id);
-                upper_cell->push_back(intersections[e_upper_id]);
-                upper_cell->push_back(intersections[e_upper_id + 1]);
-                if (cleanupPolygon(&*upper_cell))
-                    closed_polygons->push_back(*upper_cell);
+                Polygon_2 &upper_cell = (*open_polygons)[upper_cell_id];
+                upper_cell.push_back(intersectSweepLine((*L)[e_upper_id], l));
+                upper_cell.push_back(above);
+                if (cleanupPolygon(&upper_cell))
+                    closed_polygons->push_back(upper_cell);
 
                 // Delete e_lower and e_upper from list.
-                L->erase(e_lower_it);
-                L->erase(e_upper_it);
-
-                // Open one new cell.
-                std::list<Polygon_2>::iterator new_polygon =
-                    open_polygons->insert(lower_cell, Polygon_2());
-                new_polygon->push_back(intersections[e_upper_id + 1]);
-                new_polygon->push_back(intersections[e_lower_id - 1]);
-
-                open_polygons->erase(lower_cell);
-                open_polygons->erase(upper_cell);
+                L->erase(e_lower_id);
+                L->erase(e_lower_id);
+
+                // Open one new cell in place of the two closed ones.
+                Polygon_2 new_polygon;
+                new_polygon.push_back(above);
+                new_polygon.push_back(below);
+                open_polygons->erase(upper_cell_id);
+                (*open_polygons)[lower_cell_id] = new_polygon;
             }
-            processed_vertices->push_back(e_lower.source());
+            processed_vertices->insert(e_lower.source());
             if (!eq_2(e_lower.source(), e_upper.source()))
             {
-                processed_vertices->push_back(e_upper.source());
+                processed_vertices->insert(e_upper.source());
             }
         }
         else if (!less_x_2(e_lower.target(), e_lower.source()) &&
                  !less_x_2(e_upper.target(), e_upper.source()))
         {
             // IN
-            Polygon_2::Traits::Equal_2 eq_2;
             Point_2 p_on_lower = eq_2(e_lower.source(), e_upper.source())
                                      ? e_lower.target()
                                      : e_lower.source();
@@ -233,234 +253,154 @@ namespace polygon_coverage_planning
                 std::swap(e_lower, e_upper);
 
             // Determine whether we open one or close one and open two.
-            bool open_one = outOfPWH(pwh, *v - Vector_2(1e-6, 0));
+            bool open_one = leavesPWH(v, Vector_2(-1, 0));
 
-            // Find edge to update.
-            size_t e_LOWER_id = 0;
-            bool found_e_lower_id = false;
-            for (size_t i = 0; i < intersections.size() - 1; i = i + 2)
+            // Find the cell below the new one, or the cell to split. The cells
+            // whose lower (upper) edge is below a point are a prefix of L, the
+            // number of edges below the point located by one search.
+            const size_t num_below_lower = lowerBound(*L, e_lower.source());
+            size_t num_cells_below = (num_below_lower + 1) / 2;
+            if (open_one)
             {
-                if (intersections.empty())
-                    break;
-                if (open_one)
-                {
-                    if (less_y_2(intersections[i], e_lower.source()) &&
-                        less_y_2(intersections[i + 1], e_upper.source()))
-                    {
-                        e_LOWER_id = i;
-                        found_e_lower_id = true;
-                    }
-                }
-                else
-                {
-                    if (less_y_2(intersections[i], e_lower.source()) &&
-                        less_y_2(e_upper.source(), intersections[i + 1]))
-                    {
-                        e_LOWER_id = i;
-                    }
-                }
+                num_cells_below = std::min(num_cells_below,
+                                           lowerBound(*L, e_upper.source()) / 2);
+            }
+            else if (num_cells_below == 0 ||
+                     !isAbove((*L)[2 * num_cells_below - 1], e_upper.source()))
+            {
+                throw std::runtime_error("No cell to split in the sweep line status.");
             }
+
             if (open_one)
             {
                 // Add one new cell above e_UPPER.
-                std::list<Segment_2>::iterator e_UPPER = L->begin();
-                std::list<Polygon_2>::iterator open_cell = open_polygons->begin();
-                if (!L->empty() && found_e_lower_id)
-                {
-                    e_UPPER = std::next(e_UPPER, e_LOWER_id + 1);
-                    open_cell = std::next(open_cell, e_LOWER_id / 2 + 1);
-                }
-                // Update edge list.
-                if (L->empty())
-                {
-                    L->insert(L->end(), e_lower);
-                    L->insert(L->end(), e_upper);
-                }
-                else if (!L->empty() && !found_e_lower_id)
-                {
-                    L->insert(L->begin(), e_upper);
-                    L->insert(L->begin(), e_lower);
-                }
-                else
-                {
-                    std::list<Segment_2>::iterator inserter = std::next(e_UPPER);
-                    L->insert(inserter, e_lower);
-                    L->insert(inserter, e_upper);
-                }
+                const size_t insert_id = 2 * num_cells_below;
+                L->insert(insert_id, e_upper);
+                L->insert(insert_id, e_lower);
 
                 // Create new polygon.
-                std::list<Polygon_2>::iterator open_polygon =
-                    open_polygons->insert(open_cell, Polygon_2());
-                open_polygon->push_back(e_upper.source());
+                Polygon_2 open_polygon;
+                open_polygon.push_back(e_upper.source());
                 if (!eq_2(e_lower.source(), e_upper.source()))
                 {
-                    open_polygon->push_back(e_lower.source());
+                    open_polygon.push_back(e_lower.source());
                 }
+                open_polygons->insert(insert_id / 2, open_polygon);
             }
             else
             {
-                // Add new polygon between e_LOWER and e_UPPER.
-                std::list<Segment_2>::iterator e_LOWER =
-                    std::next(L->begin(), e_LOWER_id);
-                std::list<Polygon_2>::iterator cell =
-                    std::next(open_polygons->begin(), e_LOWER_id / 2);
+                // Split the cell between e_LOWER and e_UPPER.
+                const size_t e_LOWER_id = 2 * (num_cells_below - 1);
+                const size_t cell_id = e_LOWER_id / 2;
+                const Point_2 lower = intersectSweepLine((*L)[e_LOWER_id], l);
+                const Point_2 upper = intersectSweepLine((*L)[e_LOWER_id + 1], l);
 
                 // Add e_lower and e_upper
-                std::list<Segment_2>::iterator e_lower_it =
-                    L->insert(std::next(e_LOWER), e_lower);
-                L->insert(std::next(e_lower_it), e_upper);
-
-                // Add new cell.
-                std::list<Polygon_2>::iterator new_polygon =
-                    open_polygons->insert(cell, Polygon_2());
+                L->insert(e_LOWER_id + 1, e_upper);
+                L->insert(e_LOWER_id + 1, e_lower);
 
                 // Close one cell.
-                cell->push_back(intersections[e_LOWER_id]);
-                cell->push_back(intersections[e_LOWER_id + 1]);
-                if (cleanupPolygon(&*cell))
-                    closed_polygons->push_back(*cell);
+                Polygon_2 &cell = (*open_polygons)[cell_id];
+                cell.push_back(lower);
+                cell.push_back(upper);
+                if (cleanupPolygon(&cell))
+                    closed_polygons->push_back(cell);
                 // Open two new cells
                 // Lower polygon.
-                new_polygon->push_back(e_lower.source());
-                new_polygon->push_back(intersections[e_LOWER_id]);
-
+                Polygon_2 lower_polygon;
+                lower_polygon.push_back(e_lower.source());
+                lower_polygon.push_back(lower);
                 // Upper polygon.
-                new_polygon = open_polygons->insert(cell, Polygon_2());
-                new_polygon->push_back(intersections[e_LOWER_id + 1]);
-                new_polygon->push_back(e_upper.source());
-                // Close old cell.
-                open_polygons->erase(cell);
+                Polygon_2 upper_polygon;
+                upper_polygon.push_back(upper);
+                upper_polygon.push_back(e_upper.source());
+
+                (*open_polygons)[cell_id] = lower_polygon;
+                open_polygons->insert(cell_id + 1, upper_polygon);
             }
-            processed_vertices->push_back(e_lower.source());
+            processed_vertices->insert(e_lower.source());
             if (!eq_2(e_lower.source(), e_upper.source()))
             {
-                processed_vertices->push_back(e_upper.source());
+                processed_vertices->insert(e_upper.source());
             }
         }
         else
         {
-            // TODO(rikba): Sort vertices correctly in the first place.
-            // Check if v exits among edges.
-            VertexConstCirculator v_middle = v;
-            std::list<Segment_2>::iterator it = L->end();
-            while (it == L->end())
+            // A vertex can be reached before the vertex above it that joins it to
+            // L by a vertical edge. Process that vertex first, which replaces its
+            // edge in L by the vertical edge.
+            const auto has_v = [&v](const Segment_2 &e)
+            { return *v == e.source() || *v == e.target(); };
+            if (findEdge(*L, *v, has_v) == L->size())
             {
-                for (it = L->begin(); it != L->end(); it++)
-                {
-                    if (*v_middle == it->source() || *v_middle == it->target())
-                    {
-                        // Swap v in sorted vertices.
-                        if (!eq_2(*v, *v_middle))
-                        {
-                            std::vector<VertexConstCirculator>::iterator i_v =
-                                sorted_vertices->end();
-                            std::vector<VertexConstCirculator>::iterator i_v_middle =
-                                sorted_vertices->end();
-                            for (std::vector<VertexConstCirculator>::iterator it =
-                                     sorted_vertices->begin();
-                                 it != sorted_vertices->end(); ++it)
-                            {
-                                if (*it == v)
-                                    i_v = it;
-                                if (*it == v_middle)
-                                    i_v_middle = it;
-                            }
-                            assert(i_v != sorted_vertices->end());
-                            assert(i_v_middle != sorted_vertices->end());
-                            std::iter_swap(i_v, i_v_middle);
-                        }
-                        break;
-                    }
-                }
-                if (it == L->end())
-                {
-                    VertexConstCirculator v_prev = std::prev(v_middle);
-                    VertexConstCirculator v_next = std::next(v_middle);
-                    assert(v_prev->x() != v_next->x());
-                    assert(v_prev->x() == v_middle->x() || v_next->x() == v_middle->x());
-                    if (v_prev->x() == v_middle->x())
-                        v_middle = v_prev;
-                    else
-                        v_middle = v_next;
-                }
+                const VertexConstCirculator v_vertical =
+                    eq_x_2(*std::prev(v), *v) ? std::prev(v) : std::next(v);
+                if (!eq_x_2(*v_vertical, *v))
+                    throw std::runtime_error("Sweep line status is missing a vertex.");
+                processEvent(v_vertical, processed_vertices, L, open_polygons,
+                             closed_polygons);
             }
 
             // Correct vertical edges.
-            e_prev = Segment_2(*v_middle, *std::prev(v_middle));
-            e_next = Segment_2(*v_middle, *std::next(v_middle));
+            e_prev = Segment_2(*v, *std::prev(v));
+            e_next = Segment_2(*v, *std::next(v));
 
             // Find edge to update.
-            std::list<Segment_2>::iterator old_e_it = L->begin();
-            Segment_2 new_edge;
-            size_t edge_id = 0;
-            for (; old_e_it != L->end(); ++old_e_it)
-            {
-                if (*old_e_it == e_next || *old_e_it == e_next.opposite())
-                {
-                    new_edge = e_prev;
-                    break;
-                }
-                else if (*old_e_it == e_prev || *old_e_it == e_prev.opposite())
-                {
-                    new_edge = e_next;
-                    break;
-                }
-                edge_id++;
-            }
-            assert(old_e_it != L->end());
+            const size_t edge_id = findEdge(
+                *L, *v, [&e_prev, &e_next](const Segment_2 &e)
+                { return e == e_next || e == e_next.opposite() ||
+                         e == e_prev || e == e_prev.opposite(); });
+            if (edge_id == L->size())
+                throw std::runtime_error("Sweep line status is missing an edge.");
+            const Segment_2 &old_edge = (*L)[edge_id];
+            const Segment_2 new_edge =
+                (old_edge == e_next || old_edge == e_next.opposite()) ? e_prev : e_next;
 
             // Update cell with new vertex.
-            size_t cell_id = edge_id / 2;
-            std::list<Polygon_2>::iterator cell =
-                std::next(open_polygons->begin(), cell_id);
-
+            Polygon_2 &cell = (*open_polygons)[edge_id / 2];
             if ((edge_id % 2) == 0)
             {
                 // Case 1: Insert new vertex at end.
-                cell->push_back(new_edge.source());
+                cell.push_back(new_edge.source());
             }
             else
             {
                 // Case 2: Insert new vertex at begin.
-                cell->insert(cell->vertices_begin(), new_edge.source());
+                cell.insert(cell.vertices_begin(), new_edge.source());
             }
             // Update edge.
-            L->insert(old_e_it, new_edge);
-            L->erase(old_e_it);
+            (*L)[edge_id] = new_edge;
 
-            processed_vertices->push_back(*v_middle);
+            processed_vertices->insert(*v);
         }
     }
-    std::vector<Point_2> getIntersections(const std::list<Segment_2> &L,
-                                          const Line_2 &l)
+
+    Point_2 intersectSweepLine(const Segment_2 &e, const Line_2 &l)
     {
         typedef CGAL::cpp11::result_of<Intersect_2(Segment_2, Line_2)>::type
             Intersection;
 
-        std::vector<Point_2> intersections(L.size());
-        std::vector<Point_2>::iterator intersection = intersections.begin();
-        for (std::list<Segment_2>::const_iterator it = L.begin(); it != L.end();
-             ++it)
+        Intersection result = CGAL::intersection(e, l);
+        if (result)
         {
-            Intersection result = CGAL::intersection(*it, l);
-            if (result)
-            {
-                if (cgal_compat::get_variant<Segment_2>(&*result))
-                {
-                    *(intersection++) = it->target();
-                }
-                else
-                {
-                    const Point_2 *p = cgal_compat::get_variant<Point_2>(&*result);
-                    *(intersection++) = *p;
-                }
-            }
-            else
+            if (cgal_compat::get_variant<Segment_2>(&*result))
             {
-                std::cout << "No intersection found!" << std::endl;
+                return e.target();
             }
+            return *cgal_compat::get_variant<Point_2>(&*result);
         }
+        std::cout << "No intersection found!" << std::endl;
+        return Point_2();
+    }
 
+    std::vector<Point_2> getIntersections(const std::vector<Segment_2> &L,
+                                          const Line_2 &l)
+    {
+        std::vector<Point_2> intersections(L.size());
+        for (size_t i = 0; i < L.size(); ++i)
+        {
+            intersections[i] = intersectSweepLine(L[i], l);
+        }
         return intersections;
     }
 
@@ -498,6 +438,19 @@ namespace polygon_coverage_planning
         return poly->is_simple() && poly->area() != 0.0;
     }
 
+    bool leavesPWH(const VertexConstCirculator &v, const Vector_2 &direction)
+    {
+        // The boundary is counterclockwise and the holes clockwise, so the interior
+        // is the wedge from the next to the previous edge in counterclockwise order.
+        // Moving along one of the edges stays on the boundary.
+        const Direction_2 to_next(*std::next(v) - *v);
+        const Direction_2 to_prev(*std::prev(v) - *v);
+        const Direction_2 d(direction);
+        if (d == to_next || d == to_prev)
+            return false;
+        return !d.counterclockwise_in_between(to_next, to_prev);
+    }
+
     bool outOfPWH(const PolygonWithHoles &pwh, const Point_2 &p)
     {
         if (pwh.outer_boundary().has_on_unbounded_side(p))
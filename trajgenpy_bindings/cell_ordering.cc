@@ -0,0 +1,300 @@
+#include "cell_ordering.h"
+
+#include <algorithm>
+#include <chrono>
+#include <cmath>
+#include <limits>
+#include <stdexcept>
+
+namespace polygon_coverage_planning
+{
+    namespace
+    {
+        // Up to this many node pairs (2048 nodes, 32 MiB) the transit distances are
+        // precomputed, above they are computed when needed.
+        const size_t kMaxMatrixSize = size_t(1) << 22;
+        // Smallest cost change that counts as an improvement.
+        const double kImprovement = 1e-9;
+
+        typedef std::chrono::steady_clock Clock;
+
+        double distance(const Point2d &a, const Point2d &b)
+        {
+            return std::hypot(a[0] - b[0], a[1] - b[1]);
+        }
+
+        // The nodes of the search are the variants of all cells, node c * V + v is
+        // variant v of cell c, with V = 2 * num_candidates variants per cell.
+        class TransitCosts
+        {
+        public:
+            TransitCosts(const std::vector<Point2d> &entries,
+                         const std::vector<Point2d> &exits, size_t num_candidates,
+                         const Point2d *start)
+                : num_candidates_(num_candidates),
+                  num_variants_(2 * num_candidates),
+                  num_nodes_(2 * entries.size()),
+                  entry_(num_nodes_), exit_(num_nodes_), start_(num_nodes_, 0.0)
+            {
+                for (size_t i = 0; i < entries.size(); ++i)
+                {
+                    const size_t forwards = (i / num_candidates_) * num_variants_ + i % num_candidates_;
+                    const size_t backwards = forwards + num_candidates_;
+                    entry_[forwards] = exit_[backwards] = entries[i];
+                    exit_[forwards] = entry_[backwards] = exits[i];
+                }
+                if (start != nullptr)
+                {
+                    for (size_t n = 0; n < num_nodes_; ++n)
+                    {
+                        start_[n] = distance(*start, entry_[n]);
+                    }
+                }
+
+                // All transit distances in one pass over contiguous memory.
+                if (num_nodes_ * num_nodes_ <= kMaxMatrixSize)
+                {
+                    matrix_.resize(num_nodes_ * num_nodes_);
+                    for (size_t from = 0; from < num_nodes_; ++from)
+                    {
+                        const Point2d &exit = exit_[from];
+                        double *row = &matrix_[from * num_nodes_];
+                        for (size_t to = 0; to < num_nodes_; ++to)
+                        {
+                            row[to] = std::hypot(exit[0] - entry_[to][0], exit[1] - entry_[to][1]);
+                        }
+                    }
+                }
+            }
+
+            // The transit from the exit of one node to the entry of another.
+            inline double operator()(size_t from, size_t to) const
+            {
+                if (matrix_.empty())
+                {
+                    return distance(exit_[from], entry_[to]);
+                }
+                return matrix_[from * num_nodes_ + to];
+            }
+
+            inline double fromStart(size_t node) const { return start_[node]; }
+
+            // The same candidate traversed in the opposite direction.
+            inline size_t reverse(size_t node) const
+            {
+                const size_t variant = node % num_variants_;
+                return node - variant + (variant + num_candidates_) % num_variants_;
+            }
+
+            inline size_t numVariants() const { return num_variants_; }
+            inline size_t numNodes() const { return num_nodes_; }
+
+        private:
+            size_t num_candidates_;
+            size_t num_variants_;
+            size_t num_nodes_;
+            std::vector<Point2d> entry_;
+            std::vector<Point2d> exit_;
+            std::vector<double> start_;
+            std::vector<double> matrix_;
+        };
+
+        double tourCost(const TransitCosts &costs, const std::vector<size_t> &tour)
+        {
+            double cost = costs.fromStart(tour.front());
+            for (size_t i = 1; i < tour.size(); ++i)
+            {
+                cost += costs(tour[i - 1], tour[i]);
+            }
+            return cost;
+        }
+
+        std::vector<size_t> nearestNeighbour(const TransitCosts &costs, size_t first)
+        {
+            const size_t num_variants = costs.numVariants();
+            const size_t num_cells = costs.numNodes() / num_variants;
+            std::vector<bool> visited(num_cells, false);
+            std::vector<size_t> tour = {first};
+            visited[first / num_variants] = true;
+            while (tour.size() < num_cells)
+            {
+                size_t best = 0;
+                double best_cost = std::numeric_limits<double>::infinity();
+                for (size_t n = 0; n < costs.numNodes(); ++n)
+                {
+                    if (!visited[n / num_variants] && costs(tour.back(), n) < best_cost)
+                    {
+                        best = n;
+                        best_cost = costs(tour.back(), n);
+                    }
+                }
+                tour.push_back(best);
+                visited[best / num_variants] = true;
+            }
+            return tour;
+        }
+
+        // Reverse sections of the path as long as this shortens it. A reversed
+        // section traverses its cells backwards, the transits inside the section keep
+        // their length.
+        void twoOpt(const TransitCosts &costs, const Clock::time_point &deadline,
+                    std::vector<size_t> *tour)
+        {
+            const size_t n = tour->size();
+            std::vector<size_t> &t = *tour;
+            bool improved = true;
+            while (improved && Clock::now() < deadline)
+            {
+                improved = false;
+                for (size_t i = 0; i < n && Clock::now() < deadline; ++i)
+                {
+                    for (size_t j = i; j < n; ++j)
+                    {
+                        const size_t first = costs.reverse(t[j]);
+                        const size_t last = costs.reverse(t[i]);
+                        double delta = i > 0 ? costs(t[i - 1], first) - costs(t[i - 1], t[i])
+                                             : costs.fromStart(first) - costs.fromStart(t[i]);
+                        if (j + 1 < n)
+                        {
+                            delta += costs(last, t[j + 1]) - costs(t[j], t[j + 1]);
+                        }
+                        if (delta < -kImprovement)
+                        {
+                            std::reverse(t.begin() + i, t.begin() + j + 1);
+                            for (size_t k = i; k <= j; ++k)
+                            {
+                                t[k] = costs.reverse(t[k]);
+                            }
+                            improved = true;
+                        }
+                    }
+                }
+            }
+        }
+
+        // Choose the best variant of every cell for the given cell order.
+        void optimizeVariants(const TransitCosts &costs, std::vector<size_t> *tour)
+        {
+            const size_t num_variants = costs.numVariants();
+            const size_t n = tour->size();
+            std::vector<double> cost(n * num_variants);
+            std::vector<size_t> came_from(n * num_variants, 0);
+            auto node = [&](size_t i, size_t v)
+            { return (*tour)[i] - (*tour)[i] % num_variants + v; };
+
+            for (size_t v = 0; v < num_variants; ++v)
+            {
+                cost[v] = costs.fromStart(node(0, v));
+            }
+            for (size_t i = 1; i < n; ++i)
+            {
+                for (size_t v = 0; v < num_variants; ++v)
+                {
+                    double best = std::numeric_limits<double>::infinity();
+                    for (size_t u = 0; u < num_variants; ++u)
+                    {
+                        const double c = cost[(i - 1) * num_variants + u] + costs(node(i - 1, u), node(i, v));
+                        if (c < best)
+                        {
+                            best = c;
+                            came_from[i * num_variants + v] = u;
+                        }
+                    }
+                    cost[i * num_variants + v] = best;
+                }
+            }
+
+            size_t v = std::min_element(cost.end() - num_variants, cost.end()) - (cost.end() - num_variants);
+            for (size_t i = n; i-- > 0;)
+            {
+                const size_t previous = came_from[i * num_variants + v];
+                (*tour)[i] = node(i, v);
+                v = previous;
+            }
+        }
+    } // namespace
+
+    CellOrder orderCells(const std::vector<Point2d> &entries,
+                         const std::vector<Point2d> &exits, size_t num_candidates,
+                         const Point2d *start, double time_budget)
+    {
+        if (num_candidates == 0 || entries.size() != exits.size() ||
+            entries.size() % num_candidates != 0)
+        {
+            throw std::invalid_argument("Every cell needs the same number of entry and exit candidates.");
+        }
+
+        CellOrder result;
+        result.cost = 0.0;
+        if (entries.empty())
+        {
+            return result;
+        }
+
+        const Clock::time_point begin = Clock::now();
+        const Clock::time_point deadline =
+            begin + std::chrono::duration_cast<Clock::duration>(std::chrono::duration<double>(time_budget));
+        const TransitCosts costs(entries, exits, num_candidates, start);
+
+        // Construction. From a start point the nearest variant is the natural first
+        // node, otherwise try several first nodes within a quarter of the budget.
+        std::vector<size_t> tour;
+        double cost = std::numeric_limits<double>::infinity();
+        if (start != nullptr)
+        {
+            size_t first = 0;
+            for (size_t n = 1; n < costs.numNodes(); ++n)
+            {
+                if (costs.fromStart(n) < costs.fromStart(first))
+                {
+                    first = n;
+                }
+            }
+            tour = nearestNeighbour(costs, first);
+            cost = tourCost(costs, tour);
+        }
+        else
+        {
+            const Clock::time_point construction_deadline = begin + (deadline - begin) / 4;
+            for (size_t first = 0; first < costs.numNodes(); ++first)
+            {
+                std::vector<size_t> candidate = nearestNeighbour(costs, first);
+                const double candidate_cost = tourCost(costs, candidate);
+                if (candidate_cost < cost)
+                {
+                    tour = candidate;
+                    cost = candidate_cost;
+                }
+                if (Clock::now() >= construction_deadline)
+                {
+                    break;
+                }
+            }
+        }
+
+        // Improvement.
+        while (Clock::now() < deadline)
+        {
+            twoOpt(costs, deadline, &tour);
+            optimizeVariants(costs, &tour);
+            const double improved_cost = tourCost(costs, tour);
+            if (improved_cost > cost - kImprovement)
+            {
+                cost = std::min(cost, improved_cost);
+                break;
+            }
+            cost = improved_cost;
+        }
+
+        result.cells.resize(tour.size());
+        result.variants.resize(tour.size());
+        for (size_t i = 0; i < tour.size(); ++i)
+        {
+            result.cells[i] = tour[i] / costs.numVariants();
+            result.variants[i] = tour[i] % costs.numVariants();
+        }
+        result.cost = tourCost(costs, tour);
+        return result;
+    }
+
+} // namespace polygon_coverage_planning
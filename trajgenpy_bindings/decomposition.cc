@@ -17,61 +17,158 @@
  * this program.  If not, see <http://www.gnu.org/licenses/>.
  */
 
+#include <algorithm>
+#include <atomic>
+#include <cmath>
+#include <exception>
+#include <mutex>
+#include <thread>
+
 #include "bcd.h"
 #include "decomposition.h"
+#include "tcd.h"
 #include "weakly_monotone.h"
 
 namespace polygon_coverage_planning
 {
 
-    std::vector<Direction_2> findEdgeDirections(const PolygonWithHoles &pwh)
+    namespace
     {
-        // Get all possible polygon directions.
-        std::vector<Direction_2> directions;
-        for (size_t i = 0; i < pwh.outer_boundary().size(); ++i)
+        // All edges that are parallel to one undirected line.
+        struct EdgeDirection
+        {
+            Direction_2 direction; // Of the representing edge, as found in the polygon.
+            Direction_2 key;       // Pointing into the upper half-plane.
+            size_t first_edge;
+            double length;
+            double angle; // Of key, in [0, pi).
+        };
+
+        void addEdges(const Polygon_2 &poly, std::vector<EdgeDirection> *edges)
+        {
+            for (size_t i = 0; i < poly.size(); ++i)
+            {
+                const Segment_2 edge = poly.edge(i);
+                EdgeDirection e;
+                e.direction = edge.direction();
+                e.key = (CGAL::is_negative(e.direction.dy()) ||
+                         (CGAL::is_zero(e.direction.dy()) && CGAL::is_negative(e.direction.dx())))
+                            ? -e.direction
+                            : e.direction;
+                e.first_edge = edges->size();
+                e.length = std::sqrt(CGAL::to_double(edge.squared_length()));
+                e.angle = std::atan2(CGAL::to_double(e.key.dy()), CGAL::to_double(e.key.dx()));
+                edges->push_back(e);
+            }
+        }
+
+        // Merge the edges of e into the group, the direction with the longest edges
+        // represents the group.
+        void merge(const EdgeDirection &e, double e_longest, EdgeDirection *group,
+                   double *longest)
         {
-            directions.push_back(pwh.outer_boundary().edge(i).direction());
+            if (e_longest > *longest)
+            {
+                *longest = e_longest;
+                group->direction = e.direction;
+                group->key = e.key;
+                group->angle = e.angle;
+            }
+            group->first_edge = std::min(group->first_edge, e.first_edge);
+            group->length += e.length;
         }
+    } // namespace
+
+    std::vector<Direction_2> findEdgeDirections(const PolygonWithHoles &pwh,
+                                                const DirectionPruning &pruning)
+    {
+        // Get all possible polygon directions.
+        std::vector<EdgeDirection> edges;
+        addEdges(pwh.outer_boundary(), &edges);
         // TODO should all the edge directions be added? Or is the outer boundary enough?
         for (PolygonWithHoles::Hole_const_iterator hit = pwh.holes_begin();
              hit != pwh.holes_end(); ++hit)
         {
-            for (size_t i = 0; i < hit->size(); i++)
-            {
-                directions.push_back(hit->edge(i).direction());
-            }
+            addEdges(*hit, &edges);
+        }
+
+        // Remove redundant directions. Sorting by the exact angle puts collinear
+        // edges next to each other, the first edge represents all of them.
+        std::stable_sort(edges.begin(), edges.end(),
+                         [](const EdgeDirection &a, const EdgeDirection &b)
+                         { return a.key < b.key; });
+        std::vector<EdgeDirection> groups;
+        for (const EdgeDirection &e : edges)
+        {
+            if (!groups.empty() && groups.back().key == e.key)
+                groups.back().length += e.length;
+            else
+                groups.push_back(e);
         }
 
-        // Remove redundant directions.
-        std::set<size_t> to_remove;
-        for (size_t i = 0; i < directions.size() - 1; ++i)
+        // Merge directions within the angular tolerance, including across the
+        // wrap-around at pi.
+        if (pruning.angular_tolerance > 0.0 && groups.size() > 1)
         {
-            for (size_t j = i + 1; j < directions.size(); ++j)
+            std::vector<EdgeDirection> bins;
+            std::vector<double> longest;
+            double bin_start = 0.0;
+            for (const EdgeDirection &group : groups)
             {
-                if (CGAL::orientation(directions[i].vector(), directions[j].vector()) ==
-                    CGAL::COLLINEAR)
-                    to_remove.insert(j);
+                if (bins.empty() || group.angle - bin_start >= pruning.angular_tolerance)
+                {
+                    bins.push_back(group);
+                    longest.push_back(group.length);
+                    bin_start = group.angle;
+                }
+                else
+                {
+                    merge(group, group.length, &bins.back(), &longest.back());
+                }
             }
+            if (bins.size() > 1 &&
+                groups.front().angle + CGAL_PI - bin_start < pruning.angular_tolerance)
+            {
+                merge(bins.back(), longest.back(), &bins.front(), &longest.front());
+                bins.pop_back();
+            }
+            groups = std::move(bins);
+        }
+
+        // Keep the directions with the longest total edge length.
+        if (pruning.max_directions > 0 && groups.size() > pruning.max_directions)
+        {
+            std::stable_sort(groups.begin(), groups.end(),
+                             [](const EdgeDirection &a, const EdgeDirection &b)
+                             { return a.length > b.length; });
+            groups.resize(pruning.max_directions);
         }
-        for (std::set<size_t>::reverse_iterator rit = to_remove.rbegin();
-             rit != to_remove.rend(); ++rit)
+
+        // Restore the polygon order, such that ties in the decomposition search are
+        // broken as without pruning.
+        std::sort(groups.begin(), groups.end(),
+                  [](const EdgeDirection &a, const EdgeDirection &b)
+                  { return a.first_edge < b.first_edge; });
+        std::vector<Direction_2> directions;
+        directions.reserve(2 * groups.size());
+        for (const EdgeDirection &group : groups)
         {
-            directions.erase(std::next(directions.begin(), *rit));
+            directions.push_back(group.direction);
         }
 
         // Add opposite directions.
-        std::vector<Direction_2> temp_directions = directions;
-        for (size_t i = 0; i < temp_directions.size(); ++i)
+        for (size_t i = 0; i < groups.size(); ++i)
         {
-            directions.push_back(-temp_directions[i]);
+            directions.push_back(-directions[i]);
         }
 
         return directions;
     }
 
-    std::vector<Direction_2> findPerpEdgeDirections(const PolygonWithHoles &pwh)
+    std::vector<Direction_2> findPerpEdgeDirections(const PolygonWithHoles &pwh,
+                                                    const DirectionPruning &pruning)
     {
-        std::vector<Direction_2> directions = findEdgeDirections(pwh);
+        std::vector<Direction_2> directions = findEdgeDirections(pwh, pruning);
         for (auto &d : directions)
         {
             d = Direction_2(-d.dy(), d.dx());
@@ -110,42 +207,212 @@ namespace polygon_coverage_planning
         return min_altitude;
     }
 
-    bool computeBestBCDFromPolygonWithHoles(const PolygonWithHoles &pwh,
-                                            std::vector<Polygon_2> *bcd_polygons)
+    namespace
     {
-        assert(bcd_polygons);
-        bcd_polygons->clear();
-        double min_altitude_sum = std::numeric_limits<double>::max();
+        // A decomposition candidate. Lower altitude sums are better, ties are
+        // broken by the lower direction index to be independent of the
+        // evaluation order.
+        struct DecompositionCandidate
+        {
+            bool valid = false;
+            size_t direction_id = 0;
+            double altitude_sum = std::numeric_limits<double>::max();
+            std::vector<Polygon_2> cells;
+            std::vector<Direction_2> cell_dirs;
 
-        // Get all possible decomposition directions.
+            bool isBetterThan(const DecompositionCandidate &other) const
+            {
+                if (!valid)
+                    return false;
+                if (!other.valid)
+                    return true;
+                if (altitude_sum != other.altitude_sum)
+                    return altitude_sum < other.altitude_sum;
+                return direction_id < other.direction_id;
+            }
+        };
 
-        std::vector<Direction_2> directions = findPerpEdgeDirections(pwh);
-        // std::cout << "Number of perpendicular edge directions: " << directions.size() << std::endl;
-        // For all possible rotations:
-        for (const auto &dir : directions)
+        DecompositionCandidate computeCandidate(DecompositionType type,
+                                                const PolygonWithHoles &pwh,
+                                                const std::vector<Direction_2> &directions,
+                                                size_t direction_id)
         {
+            DecompositionCandidate candidate;
+            candidate.direction_id = direction_id;
+
             // Calculate decomposition.
-            std::vector<Polygon_2> cells = computeBCD(pwh, dir);
+            if (type == DecompositionType::kTCD)
+                candidate.cells = computeTCD(pwh, directions[direction_id]);
+            else
+                candidate.cells = computeBCD(pwh, directions[direction_id]);
 
             // Calculate minimum altitude sum for each cell.
-            double min_altitude_sum_tmp = 0.0;
-            for (const auto &cell : cells)
+            candidate.altitude_sum = 0.0;
+            candidate.cell_dirs.resize(candidate.cells.size());
+            for (size_t i = 0; i < candidate.cells.size(); ++i)
             {
-                min_altitude_sum_tmp += findBestSweepDir(cell);
+                candidate.altitude_sum +=
+                    findBestSweepDir(candidate.cells[i], &candidate.cell_dirs[i]);
             }
+            candidate.valid =
+                candidate.altitude_sum < std::numeric_limits<double>::max();
 
-            // Update best decomposition.
-            if (min_altitude_sum_tmp < min_altitude_sum)
+            return candidate;
+        }
+
+        // Lazy exact objects compute and cache their exact value on first use.
+        // Evaluating the shared input up front means that worker threads only
+        // read it. Inexact constructions are plain doubles and need nothing.
+        void evaluateExact(const Polygon_2 &poly)
+        {
+#ifndef TRAJGENPY_INEXACT_KERNEL
+            for (VertexConstIterator it = poly.vertices_begin();
+                 it != poly.vertices_end(); ++it)
+            {
+                CGAL::exact(it->x());
+                CGAL::exact(it->y());
+            }
+#endif
+        }
+
+        void evaluateExact(const PolygonWithHoles &pwh,
+                           const std::vector<Direction_2> &directions)
+        {
+            evaluateExact(pwh.outer_boundary());
+            for (PolygonWithHoles::Hole_const_iterator hit = pwh.holes_begin();
+                 hit != pwh.holes_end(); ++hit)
+            {
+                evaluateExact(*hit);
+            }
+#ifndef TRAJGENPY_INEXACT_KERNEL
+            for (const auto &dir : directions)
+            {
+                CGAL::exact(dir.dx());
+                CGAL::exact(dir.dy());
+            }
+#endif
+        }
+
+        bool computeBestDecomposition(DecompositionType type,
+                                      const PolygonWithHoles &pwh,
+                                      std::vector<Polygon_2> *polygons,
+                                      size_t num_threads,
+                                      std::vector<Direction_2> *cell_dirs,
+                                      Direction_2 *decomposition_dir,
+                                      const DirectionPruning &pruning)
+        {
+            assert(polygons);
+            polygons->clear();
+
+            // Get all possible decomposition directions.
+            std::vector<Direction_2> directions = findPerpEdgeDirections(pwh, pruning);
+            // std::cout << "Number of perpendicular edge directions: " << directions.size() << std::endl;
+
+            if (num_threads == 0)
+                num_threads = std::max<size_t>(1, std::thread::hardware_concurrency());
+            num_threads = std::min(num_threads, directions.size());
+
+            DecompositionCandidate best;
+            if (num_threads <= 1)
+            {
+                // For all possible rotations:
+                for (size_t i = 0; i < directions.size(); ++i)
+                {
+                    DecompositionCandidate candidate = computeCandidate(type, pwh, directions, i);
+                    // Update best decomposition.
+                    if (candidate.isBetterThan(best))
+                        best = std::move(candidate);
+                }
+            }
+            else
             {
-                min_altitude_sum = min_altitude_sum_tmp;
-                *bcd_polygons = cells;
+                evaluateExact(pwh, directions);
+
+                std::atomic<size_t> next_direction(0);
+                std::mutex mutex;
+                // The serial search stops at the first direction that throws, so
+                // only the exception of the lowest failing direction is reported.
+                size_t error_id = std::numeric_limits<size_t>::max();
+                std::exception_ptr error;
+
+                auto worker = [&]()
+                {
+                    DecompositionCandidate local_best;
+                    for (size_t i = next_direction++; i < directions.size();
+                         i = next_direction++)
+                    {
+                        {
+                            std::lock_guard<std::mutex> lock(mutex);
+                            if (i > error_id)
+                                break;
+                        }
+                        try
+                        {
+                            DecompositionCandidate candidate =
+                                computeCandidate(type, pwh, directions, i);
+                            if (candidate.isBetterThan(local_best))
+                                local_best = std::move(candidate);
+                        }
+                        catch (...)
+                        {
+                            std::lock_guard<std::mutex> lock(mutex);
+                            if (i < error_id)
+                            {
+                                error_id = i;
+                                error = std::current_exception();
+                            }
+                        }
+                    }
+
+                    std::lock_guard<std::mutex> lock(mutex);
+                    if (local_best.isBetterThan(best))
+                        best = std::move(local_best);
+                };
+
+                std::vector<std::thread> threads;
+                threads.reserve(num_threads);
+                for (size_t t = 0; t < num_threads; ++t)
+                    threads.emplace_back(worker);
+                for (std::thread &thread : threads)
+                    thread.join();
+
+                if (error)
+                    std::rethrow_exception(error);
             }
+
+            *polygons = std::move(best.cells);
+            if (cell_dirs)
+                *cell_dirs = std::move(best.cell_dirs);
+            if (decomposition_dir && best.valid)
+                *decomposition_dir = directions[best.direction_id];
+
+            if (polygons->empty())
+                return false;
+            else
+                return true;
         }
+    } // namespace
+
+    bool computeBestBCDFromPolygonWithHoles(const PolygonWithHoles &pwh,
+                                            std::vector<Polygon_2> *bcd_polygons,
+                                            size_t num_threads,
+                                            std::vector<Direction_2> *cell_dirs,
+                                            Direction_2 *bcd_dir,
+                                            const DirectionPruning &pruning)
+    {
+        return computeBestDecomposition(DecompositionType::kBCD, pwh, bcd_polygons,
+                                        num_threads, cell_dirs, bcd_dir, pruning);
+    }
 
-        if (bcd_polygons->empty())
-            return false;
-        else
-            return true;
+    bool computeBestTCDFromPolygonWithHoles(const PolygonWithHoles &pwh,
+                                            std::vector<Polygon_2> *trap_polygons,
+                                            size_t num_threads,
+                                            std::vector<Direction_2> *cell_dirs,
+                                            Direction_2 *tcd_dir,
+                                            const DirectionPruning &pruning)
+    {
+        return computeBestDecomposition(DecompositionType::kTCD, pwh, trap_polygons,
+                                        num_threads, cell_dirs, tcd_dir, pruning);
     }
 
 } // namespace polygon_coverage_planning
\ No newline at end of file
@@ -20,7 +20,11 @@
 #ifndef POLYGON_COVERAGE_GEOMETRY_BCD_H_
 #define POLYGON_COVERAGE_GEOMETRY_BCD_H_
 
+#include <set>
+#include <vector>
+
 #include "cgal_definitions.h"
+#include "indexed_sequence.h"
 
 // Choset, Howie. "Coverage of known spaces: The boustrophedon cellular
 // decomposition." Autonomous Robots 9.3 (2000): 247-253.
@@ -32,13 +36,23 @@ std::vector<Polygon_2> computeBCD(const PolygonWithHoles& polygon_in,
 void sortPolygon(PolygonWithHoles* pwh);
 std::vector<VertexConstCirculator> getXSortedVertices(
     const PolygonWithHoles& p);
-void processEvent(const PolygonWithHoles& pwh, const VertexConstCirculator& v,
-                  std::vector<VertexConstCirculator>* sorted_vertices,
-                  std::vector<Point_2>* processed_vertices,
-                  std::list<Segment_2>* L, std::list<Polygon_2>* open_polygons,
+// The sweep line status L holds the edges below and above every open cell,
+// sorted from bottom to top, such that cell i lies between L[2i] and L[2i + 1].
+// Edges and cells are located by binary search, and both sequences are trees
+// with logarithmic insertion and erasure by index.
+typedef IndexedSequence<Segment_2> SweepEdges;
+void processEvent(const VertexConstCirculator& v,
+                  std::set<Point_2>* processed_vertices, SweepEdges* L,
+                  IndexedSequence<Polygon_2>* open_polygons,
                   std::vector<Polygon_2>* closed_polygons);
-std::vector<Point_2> getIntersections(const std::list<Segment_2>& L,
+// The intersection of an edge with the vertical sweep line, the target of the
+// edge if it is vertical.
+Point_2 intersectSweepLine(const Segment_2& e, const Line_2& l);
+std::vector<Point_2> getIntersections(const std::vector<Segment_2>& L,
                                       const Line_2& l);
+// Whether moving from the vertex v in direction leaves the polygon with holes,
+// decided exactly by the angle between the adjacent edges.
+bool leavesPWH(const VertexConstCirculator& v, const Vector_2& direction);
 bool outOfPWH(const PolygonWithHoles& pwh, const Point_2& p);
 // Removes duplicate vertices. Returns if resulting polygon is simple and has
 // some area.
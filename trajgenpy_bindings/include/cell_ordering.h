@@ -0,0 +1,39 @@
+#ifndef POLYGON_COVERAGE_PLANNING_CELL_ORDERING_H_
+#define POLYGON_COVERAGE_PLANNING_CELL_ORDERING_H_
+
+#include <array>
+#include <cstddef>
+#include <vector>
+
+namespace polygon_coverage_planning
+{
+
+    typedef std::array<double, 2> Point2d;
+
+    // The order in which the cells are covered.
+    // cells: the cell ids in visiting order.
+    // variants: the variant of every visited cell. Variant v < K enters the cell
+    // at entry v and leaves it at exit v, variant v >= K traverses candidate v - K
+    // backwards, i.e. enters at exit v - K and leaves at entry v - K.
+    // cost: the total transit distance, including the way from the start point.
+    struct CellOrder
+    {
+        std::vector<size_t> cells;
+        std::vector<size_t> variants;
+        double cost;
+    };
+
+    // Order the cells and choose how each one is traversed, such that the transit
+    // distance between the cells is short (a generalized traveling salesman path).
+    // Every cell has num_candidates (entry, exit) pairs, the pairs of cell c are
+    // entries[c * num_candidates + k] and exits[c * num_candidates + k].
+    // start is an optional start point, the path starts at the first cell otherwise.
+    // The tour is built with nearest neighbour and improved with 2-opt and an exact
+    // choice of the variants until no move improves it or time_budget seconds passed.
+    CellOrder orderCells(const std::vector<Point2d> &entries,
+                         const std::vector<Point2d> &exits, size_t num_candidates,
+                         const Point2d *start, double time_budget);
+
+} // namespace polygon_coverage_planning
+
+#endif // POLYGON_COVERAGE_PLANNING_CELL_ORDERING_H_
@@ -26,7 +26,14 @@
 #include <cassert>
 #define assertm(exp, msg) assert(((void)msg, exp))
 
+// The bindings are compiled twice: with exact constructions, and with
+// TRAJGENPY_INEXACT_KERNEL defined as a faster fast path that falls back to the
+// exact build when it fails.
+#ifdef TRAJGENPY_INEXACT_KERNEL
+typedef CGAL::Exact_predicates_inexact_constructions_kernel K;
+#else
 typedef CGAL::Exact_predicates_exact_constructions_kernel K;
+#endif
 typedef K::FT FT;
 typedef K::Point_2 Point_2;
 typedef K::Point_3 Point_3;
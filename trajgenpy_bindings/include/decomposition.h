@@ -25,12 +25,27 @@
 namespace polygon_coverage_planning
 {
 
+    // Limits the edge directions that are searched for the best decomposition,
+    // to bound the decomposition time of detailed boundaries.
+    struct DirectionPruning
+    {
+        // Directions whose angles differ by less than this (in radians) are merged
+        // into the direction of the longest edge among them. 0 only merges
+        // collinear directions.
+        double angular_tolerance = 0.0;
+        // Keep at most this many directions, those with the longest total edge
+        // length. 0 keeps all.
+        size_t max_directions = 0;
+    };
+
     // Get all unique polygon edge directions including opposite directions.
-    std::vector<Direction_2> findEdgeDirections(const PolygonWithHoles &pwh);
+    std::vector<Direction_2> findEdgeDirections(const PolygonWithHoles &pwh,
+                                                const DirectionPruning &pruning = DirectionPruning());
 
     // Get all directions that are perpendicular to the edges found with
     // findEdgeDirections.
-    std::vector<Direction_2> findPerpEdgeDirections(const PolygonWithHoles &pwh);
+    std::vector<Direction_2> findPerpEdgeDirections(const PolygonWithHoles &pwh,
+                                                    const DirectionPruning &pruning = DirectionPruning());
 
     // Find the best edge direction to sweep. The best direction is the direction
     // with the smallest polygon altitude. Returns the smallest altitude.
@@ -38,13 +53,30 @@ namespace polygon_coverage_planning
 
     // Compute BCDs for every edge direction. Return any with the smallest possible
     // altitude sum.
+    // The directions are distributed over num_threads worker threads (0 uses all
+    // hardware threads). Ties on the altitude sum are broken by the direction
+    // index, so the result does not depend on the number of threads.
+    // Optionally returns the best sweep direction of every cell and the
+    // decomposition direction of the best BCD, which can be passed to computeBCD
+    // to decompose a part of the polygon consistently.
+    // pruning limits the searched directions, see DirectionPruning.
     bool computeBestBCDFromPolygonWithHoles(const PolygonWithHoles &pwh,
-                                            std::vector<Polygon_2> *bcd_polygons);
+                                            std::vector<Polygon_2> *bcd_polygons,
+                                            size_t num_threads = 1,
+                                            std::vector<Direction_2> *cell_dirs = nullptr,
+                                            Direction_2 *bcd_dir = nullptr,
+                                            const DirectionPruning &pruning = DirectionPruning());
 
     // Compute TCDs for every edge direction. Return any with the smallest possible
-    // altitude sum.
+    // altitude sum. The trapezoidal decomposition has more cells than the BCD, but
+    // its cells are convex. The options are the same as for
+    // computeBestBCDFromPolygonWithHoles. Requires the exact kernel.
     bool computeBestTCDFromPolygonWithHoles(const PolygonWithHoles &pwh,
-                                            std::vector<Polygon_2> *trap_polygons);
+                                            std::vector<Polygon_2> *trap_polygons,
+                                            size_t num_threads = 1,
+                                            std::vector<Direction_2> *cell_dirs = nullptr,
+                                            Direction_2 *tcd_dir = nullptr,
+                                            const DirectionPruning &pruning = DirectionPruning());
 
     enum DecompositionType
     {
@@ -23,6 +23,7 @@
 #include <cmath>
 #include <limits>
 #include <map>
+#include <memory>
 #include <vector>
 
 // Utilities to create graphs.
@@ -54,6 +55,18 @@ namespace polygon_coverage_planning
     // second: heuristic cost to goal
     typedef std::map<size_t, double> Heuristic;
 
+    // Marks a node without predecessor in a shortest path tree.
+    const size_t kNoNode = std::numeric_limits<size_t>::max();
+
+    // A contiguous (compressed sparse row) copy of the adjacency lists.
+    // The neighbors of node i are targets[offsets[i]] to targets[offsets[i + 1] - 1].
+    struct CompressedGraph
+    {
+        std::vector<size_t> offsets;
+        std::vector<size_t> targets;
+        std::vector<double> costs;
+    };
+
     // The base graph class.
     template <class NodeProperty, class EdgeProperty>
     class GraphBase
@@ -106,6 +119,25 @@ namespace polygon_coverage_planning
         // Solve the graph with A* using internal start and goal index.
         bool solveAStar(Solution *solution) const;
 
+        // Compute the shortest paths from start to all nodes with Dijkstra.
+        // Unreachable nodes have infinite cost and kNoNode as predecessor.
+        void solveDijkstraAll(size_t start, std::vector<double> *cost,
+                              std::vector<size_t> *came_from) const;
+        // Same as solveDijkstraAll for several start nodes in one pass over a shared
+        // compressed graph. Row i holds the shortest path tree of starts[i].
+        void solveDijkstraBatch(const std::vector<size_t> &starts,
+                                std::vector<std::vector<double>> *costs,
+                                std::vector<std::vector<size_t>> *came_from) const;
+        // The shortest path trees of all nodes.
+        void solveAllPairs(std::vector<std::vector<double>> *costs,
+                           std::vector<std::vector<size_t>> *came_from) const;
+
+        // Copy the adjacency lists into contiguous arrays for the solvers.
+        CompressedGraph compress() const;
+        // The compressed graph shared by all queries. It is built on first use and
+        // rebuilt after the nodes or edges change. Safe to call from several threads.
+        std::shared_ptr<const CompressedGraph> getCompressedGraph() const;
+
         // Create the adjacency matrix setting no connectings to INT_MAX and
         // transforming cost into milli int.
         std::vector<std::vector<int>> getAdjacencyMatrix() const;
@@ -122,6 +154,18 @@ namespace polygon_coverage_planning
 
         Solution reconstructSolution(const std::map<size_t, size_t> &came_from,
                                      size_t current) const;
+        Solution reconstructSolution(const std::vector<size_t> &came_from,
+                                     size_t current) const;
+
+        // Best first search on the compressed graph with a binary heap frontier.
+        // Without heuristic this is Dijkstra, with heuristic A*. Stops when the goal
+        // is settled, or explores all reachable nodes if goal is kNoNode.
+        // The optional extension holds additional edges per node and may have more
+        // rows than the graph, e.g. for temporary start and goal nodes appended to it.
+        static bool search(const CompressedGraph &graph,
+                           const CompressedGraph *extension, size_t start,
+                           size_t goal, const std::vector<double> *heuristic,
+                           std::vector<double> *cost, std::vector<size_t> *came_from);
 
         Graph graph_;
         // Map to store all node properties. Key is the graph node id.
@@ -131,6 +175,10 @@ namespace polygon_coverage_planning
         size_t start_idx_;
         size_t goal_idx_;
         bool is_created_;
+
+    private:
+        // Reset whenever graph_ changes, accessed atomically by getCompressedGraph.
+        mutable std::shared_ptr<const CompressedGraph> compressed_;
     };
 
 } // namespace polygon_coverage_planning
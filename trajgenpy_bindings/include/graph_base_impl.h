@@ -21,7 +21,8 @@
 #define POLYGON_COVERAGE_SOLVERS_GRAPH_BASE_IMPL_H_
 
 #include <algorithm>
-#include <set>
+#include <functional>
+#include <queue>
 
 namespace polygon_coverage_planning
 {
@@ -30,6 +31,7 @@ namespace polygon_coverage_planning
     bool GraphBase<NodeProperty, EdgeProperty>::addNode(const NodeProperty &node_property)
     {
         graph_.push_back(std::map<size_t, double>()); // Add node.
+        compressed_.reset();
 
         // Add node properties.
         const size_t idx = graph_.size() - 1;
@@ -80,6 +82,7 @@ namespace polygon_coverage_planning
     void GraphBase<NodeProperty, EdgeProperty>::clear()
     {
         graph_.clear();
+        compressed_.reset();
         node_properties_.clear();
         edge_properties_.clear();
         start_idx_ = std::numeric_limits<size_t>::max();
@@ -95,6 +98,7 @@ namespace polygon_coverage_planning
         {
             neighbors.clear();
         }
+        compressed_.reset();
     }
 
     template <class NodeProperty, class EdgeProperty>
@@ -178,68 +182,165 @@ namespace polygon_coverage_planning
     }
 
     template <class NodeProperty, class EdgeProperty>
-    bool GraphBase<NodeProperty, EdgeProperty>::solveDijkstra(
-        size_t start, size_t goal, Solution *solution) const
+    CompressedGraph GraphBase<NodeProperty, EdgeProperty>::compress() const
     {
-        assert(solution);
-        solution->clear();
-        if (!nodeExists(start) || !nodeExists(goal))
+        CompressedGraph compressed;
+        compressed.offsets.reserve(graph_.size() + 1);
+        compressed.offsets.push_back(0);
+        for (const std::map<size_t, double> &neighbors : graph_)
         {
-            return false;
+            for (const std::pair<const size_t, double> &n : neighbors)
+            {
+                compressed.targets.push_back(n.first);
+                compressed.costs.push_back(n.second);
+            }
+            compressed.offsets.push_back(compressed.targets.size());
         }
+        return compressed;
+    }
 
-        // https://en.wikipedia.org/wiki/Dijkstra%27s_algorithm
-        // Initialization.
-        std::set<size_t> open_set = {start}; // Nodes to evaluate.
-        std::set<size_t> closed_set;         // Nodes already evaluated.
-        std::map<size_t, size_t> came_from;  // Get previous node on optimal path.
-        std::map<size_t, double> cost;       // Optimal cost from start.
-        for (size_t i = 0; i < graph_.size(); i++)
+    template <class NodeProperty, class EdgeProperty>
+    std::shared_ptr<const CompressedGraph>
+    GraphBase<NodeProperty, EdgeProperty>::getCompressedGraph() const
+    {
+        std::shared_ptr<const CompressedGraph> compressed = std::atomic_load(&compressed_);
+        if (compressed == nullptr)
+        {
+            // Threads that get here at the same time build identical copies.
+            compressed = std::make_shared<const CompressedGraph>(compress());
+            std::atomic_store(&compressed_, compressed);
+        }
+        return compressed;
+    }
+
+    template <class NodeProperty, class EdgeProperty>
+    bool GraphBase<NodeProperty, EdgeProperty>::search(
+        const CompressedGraph &graph, const CompressedGraph *extension,
+        size_t start, size_t goal, const std::vector<double> *heuristic,
+        std::vector<double> *cost, std::vector<size_t> *came_from)
+    {
+        assert(cost);
+        assert(came_from);
+        size_t num_nodes = graph.offsets.size() - 1;
+        if (extension != nullptr)
         {
-            cost[i] = std::numeric_limits<double>::max();
+            num_nodes = std::max(num_nodes, extension->offsets.size() - 1);
         }
-        cost[start] = 0.0;
+        cost->assign(num_nodes, std::numeric_limits<double>::infinity());
+        came_from->assign(num_nodes, kNoNode);
+        std::vector<bool> closed(num_nodes, false); // Nodes already evaluated.
+
+        // Min heap of (cost + heuristic, node). Improved nodes are pushed again and
+        // outdated entries are skipped when popped. Ties are broken by the node id.
+        typedef std::pair<double, size_t> Entry;
+        std::priority_queue<Entry, std::vector<Entry>, std::greater<Entry>> open_set;
+        (*cost)[start] = 0.0;
+        open_set.push(Entry(heuristic ? (*heuristic)[start] : 0.0, start));
 
         while (!open_set.empty())
         {
-            // Pop vertex with lowest score from open set.
-            size_t current = *std::min_element(
-                open_set.begin(), open_set.end(),
-                [&cost](size_t i, size_t j)
-                { return cost[i] < cost[j]; });
+            const size_t current = open_set.top().second;
+            open_set.pop();
+            if (closed[current])
+            {
+                continue;
+            }
             if (current == goal)
             { // Reached goal.
-                *solution = reconstructSolution(came_from, current);
                 return true;
             }
-            open_set.erase(current);
-            closed_set.insert(current);
+            closed[current] = true;
 
-            // Check all neighbors.
-            for (const std::pair<size_t, double> &n : graph_[current])
+            // Check all neighbors, those of the graph before those of the extension.
+            for (const CompressedGraph *edges : {&graph, extension})
             {
-                if (closed_set.count(n.first) > 0)
-                {
-                    continue; // Ignore already evaluated neighbors.
-                }
-                open_set.insert(n.first); // Add to open set if not already in.
-
-                // The distance from start to a neighbor.
-                const double tentative_cost = cost[current] + n.second;
-                if (tentative_cost >= cost[n.first])
+                if (edges == nullptr || current + 1 >= edges->offsets.size())
                 {
-                    continue; // This is not a better path to n.
+                    continue; // No edges of this node.
                 }
-                else
+                for (size_t i = edges->offsets[current]; i < edges->offsets[current + 1]; ++i)
                 {
-                    // This path is the best path to n until now.
-                    came_from[n.first] = current;
-                    cost[n.first] = tentative_cost;
+                    const size_t n = edges->targets[i];
+                    if (closed[n])
+                    {
+                        continue; // Ignore already evaluated neighbors.
+                    }
+                    // The distance from start to a neighbor.
+                    const double tentative_cost = (*cost)[current] + edges->costs[i];
+                    if (tentative_cost < (*cost)[n])
+                    {
+                        // This path is the best path to n until now.
+                        (*came_from)[n] = current;
+                        (*cost)[n] = tentative_cost;
+                        open_set.push(Entry(heuristic ? tentative_cost + (*heuristic)[n] : tentative_cost, n));
+                    }
                 }
             }
         }
 
-        return false;
+        return goal == kNoNode;
+    }
+
+    template <class NodeProperty, class EdgeProperty>
+    bool GraphBase<NodeProperty, EdgeProperty>::solveDijkstra(
+        size_t start, size_t goal, Solution *solution) const
+    {
+        assert(solution);
+        solution->clear();
+        if (!nodeExists(start) || !nodeExists(goal))
+        {
+            return false;
+        }
+
+        // https://en.wikipedia.org/wiki/Dijkstra%27s_algorithm
+        std::vector<double> cost;
+        std::vector<size_t> came_from;
+        if (!search(*getCompressedGraph(), nullptr, start, goal, nullptr, &cost, &came_from))
+        {
+            return false;
+        }
+        *solution = reconstructSolution(came_from, goal);
+        return true;
+    }
+
+    template <class NodeProperty, class EdgeProperty>
+    void GraphBase<NodeProperty, EdgeProperty>::solveDijkstraAll(
+        size_t start, std::vector<double> *cost,
+        std::vector<size_t> *came_from) const
+    {
+        assert(nodeExists(start));
+        search(*getCompressedGraph(), nullptr, start, kNoNode, nullptr, cost, came_from);
+    }
+
+    template <class NodeProperty, class EdgeProperty>
+    void GraphBase<NodeProperty, EdgeProperty>::solveDijkstraBatch(
+        const std::vector<size_t> &starts,
+        std::vector<std::vector<double>> *costs,
+        std::vector<std::vector<size_t>> *came_from) const
+    {
+        assert(costs);
+        assert(came_from);
+        const std::shared_ptr<const CompressedGraph> compressed = getCompressedGraph();
+        costs->resize(starts.size());
+        came_from->resize(starts.size());
+        for (size_t i = 0; i < starts.size(); ++i)
+        {
+            assert(nodeExists(starts[i]));
+            search(*compressed, nullptr, starts[i], kNoNode, nullptr, &(*costs)[i], &(*came_from)[i]);
+        }
+    }
+
+    template <class NodeProperty, class EdgeProperty>
+    void GraphBase<NodeProperty, EdgeProperty>::solveAllPairs(
+        std::vector<std::vector<double>> *costs,
+        std::vector<std::vector<size_t>> *came_from) const
+    {
+        std::vector<size_t> starts(graph_.size());
+        for (size_t i = 0; i < starts.size(); ++i)
+        {
+            starts[i] = i;
+        }
+        solveDijkstraBatch(starts, costs, came_from);
     }
 
     template <class NodeProperty, class EdgeProperty>
@@ -274,73 +375,25 @@ namespace polygon_coverage_planning
         }
 
         // https://en.wikipedia.org/wiki/A*_search_algorithm
-        // Initialization.
-        std::set<size_t> open_set = {start};          // Nodes to evaluate.
-        std::set<size_t> closed_set;                  // Nodes already evaluated.
-        std::map<size_t, size_t> came_from;           // Get previous node on optimal path.
-        std::map<size_t, double> cost;                // Optimal cost from start.
-        std::map<size_t, double> cost_with_heuristic; // cost + heuristic
-        for (size_t i = 0; i < graph_.size(); i++)
-        {
-            cost[i] = std::numeric_limits<double>::max();
-            cost_with_heuristic[i] = std::numeric_limits<double>::max();
-        }
-        cost[start] = 0.0;
-        const Heuristic::const_iterator start_heuristic_it = heuristic.find(start);
-        if (start_heuristic_it == heuristic.end())
-        {
-            return false; // Heuristic not found.
-        }
-        cost_with_heuristic[start] = start_heuristic_it->second;
-
-        while (!open_set.empty())
+        std::vector<double> heuristic_costs(graph_.size());
+        for (size_t i = 0; i < graph_.size(); ++i)
         {
-            // Pop vertex with lowest cost with heuristic from open set.
-            size_t current = *std::min_element(
-                open_set.begin(), open_set.end(),
-                [&cost_with_heuristic](size_t i, size_t j)
-                {
-                    return cost_with_heuristic[i] < cost_with_heuristic[j];
-                });
-            if (current == goal)
-            { // Reached goal.
-                *solution = reconstructSolution(came_from, current);
-                return true;
-            }
-            open_set.erase(current);
-            closed_set.insert(current);
-
-            // Check all neighbors.
-            for (const std::pair<size_t, double> &n : graph_[current])
+            const Heuristic::const_iterator heuristic_it = heuristic.find(i);
+            if (heuristic_it == heuristic.end())
             {
-                if (closed_set.count(n.first) > 0)
-                {
-                    continue; // Ignore already evaluated neighbors.
-                }
-                open_set.insert(n.first); // Add to open set if not already in.
-
-                // The distance from start to a neighbor.
-                const double tentative_cost = cost[current] + n.second;
-                if (tentative_cost >= cost[n.first])
-                {
-                    continue; // This is not a better path to n.
-                }
-                else
-                {
-                    // This path is the best path to n until now.
-                    came_from[n.first] = current;
-                    cost[n.first] = tentative_cost;
-                    const Heuristic::const_iterator heuristic_it = heuristic.find(n.first);
-                    if (heuristic_it == heuristic.end())
-                    {
-                        return false; // Heuristic not found.
-                    }
-                    cost_with_heuristic[n.first] = cost[n.first] + heuristic_it->second;
-                }
+                return false; // Heuristic not found.
             }
+            heuristic_costs[i] = heuristic_it->second;
         }
 
-        return false;
+        std::vector<double> cost;
+        std::vector<size_t> came_from;
+        if (!search(*getCompressedGraph(), nullptr, start, goal, &heuristic_costs, &cost, &came_from))
+        {
+            return false;
+        }
+        *solution = reconstructSolution(came_from, goal);
+        return true;
     }
 
     template <class NodeProperty, class EdgeProperty>
@@ -357,6 +410,7 @@ namespace polygon_coverage_planning
         if (cost >= 0.0 && nodeExists(edge_id.first))
         {
             graph_[edge_id.first][edge_id.second] = cost;
+            compressed_.reset();
             edge_properties_.insert(std::make_pair(edge_id, edge_property));
             return true;
         }
@@ -380,6 +434,20 @@ namespace polygon_coverage_planning
         return solution;
     }
 
+    template <class NodeProperty, class EdgeProperty>
+    Solution GraphBase<NodeProperty, EdgeProperty>::reconstructSolution(
+        const std::vector<size_t> &came_from, size_t current) const
+    {
+        Solution solution = {current};
+        while (came_from[current] != kNoNode)
+        {
+            current = came_from[current];
+            solution.push_back(current);
+        }
+        std::reverse(solution.begin(), solution.end());
+        return solution;
+    }
+
     template <class NodeProperty, class EdgeProperty>
     std::vector<std::vector<int>>
     GraphBase<NodeProperty, EdgeProperty>::getAdjacencyMatrix() const
@@ -0,0 +1,203 @@
+/*
+ * polygon_coverage_planning implements algorithms for coverage planning in
+ * general polygons with holes. Copyright (C) 2019, Rik Bähnemann, Autonomous
+ * Systems Lab, ETH Zürich
+ *
+ * This program is free software: you can redistribute it and/or modify it under
+ * the terms of the GNU General Public License as published by the Free Software
+ * Foundation, either version 3 of the License, or (at your option) any later
+ * version.
+ *
+ * This program is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+ * FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+ * details.
+ *
+ * You should have received a copy of the GNU General Public License along with
+ * this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+#ifndef POLYGON_COVERAGE_GEOMETRY_INDEXED_SEQUENCE_H_
+#define POLYGON_COVERAGE_GEOMETRY_INDEXED_SEQUENCE_H_
+
+#include <cassert>
+#include <cstdint>
+#include <limits>
+#include <random>
+#include <vector>
+
+namespace polygon_coverage_planning
+{
+
+    // A sequence with access, insertion and erasure by index in expected
+    // logarithmic time. It is stored as an implicit treap, a randomized binary
+    // search tree ordered by position, in which every node knows the size of its
+    // subtree.
+    template <typename T>
+    class IndexedSequence
+    {
+    public:
+        IndexedSequence() : root_(kNil) {}
+
+        size_t size() const { return sizeOf(root_); }
+        bool empty() const { return root_ == kNil; }
+
+        T &operator[](size_t i) { return nodes_[nodeAt(i)].value; }
+        const T &operator[](size_t i) const { return nodes_[nodeAt(i)].value; }
+
+        // Inserts value before the element at index i, at the end if i == size().
+        void insert(size_t i, const T &value)
+        {
+            assert(i <= size());
+            size_t node;
+            if (free_.empty())
+            {
+                node = nodes_.size();
+                nodes_.push_back(Node());
+            }
+            else
+            {
+                node = free_.back();
+                free_.pop_back();
+            }
+            nodes_[node].value = value;
+            nodes_[node].left = kNil;
+            nodes_[node].right = kNil;
+            nodes_[node].size = 1;
+            nodes_[node].priority = random_();
+
+            size_t left, right;
+            split(root_, i, &left, &right);
+            root_ = merge(merge(left, node), right);
+        }
+
+        void erase(size_t i)
+        {
+            assert(i < size());
+            size_t left, middle, right;
+            split(root_, i, &left, &middle);
+            split(middle, 1, &middle, &right);
+            nodes_[middle].value = T();
+            free_.push_back(middle);
+            root_ = merge(left, right);
+        }
+
+        // The index of the first element for which pred is false. pred has to be
+        // true for a prefix of the sequence and false for the rest.
+        template <typename Predicate>
+        size_t partitionPoint(const Predicate &pred) const
+        {
+            size_t index = 0;
+            size_t node = root_;
+            while (node != kNil)
+            {
+                if (pred(nodes_[node].value))
+                {
+                    index += sizeOf(nodes_[node].left) + 1;
+                    node = nodes_[node].right;
+                }
+                else
+                {
+                    node = nodes_[node].left;
+                }
+            }
+            return index;
+        }
+
+    private:
+        static constexpr size_t kNil = std::numeric_limits<size_t>::max();
+
+        struct Node
+        {
+            T value;
+            size_t left;
+            size_t right;
+            size_t size;
+            uint32_t priority;
+        };
+
+        size_t sizeOf(size_t node) const
+        {
+            return node == kNil ? 0 : nodes_[node].size;
+        }
+
+        void update(size_t node)
+        {
+            nodes_[node].size =
+                sizeOf(nodes_[node].left) + sizeOf(nodes_[node].right) + 1;
+        }
+
+        size_t nodeAt(size_t i) const
+        {
+            assert(i < size());
+            size_t node = root_;
+            while (true)
+            {
+                const size_t left_size = sizeOf(nodes_[node].left);
+                if (i < left_size)
+                {
+                    node = nodes_[node].left;
+                }
+                else if (i == left_size)
+                {
+                    return node;
+                }
+                else
+                {
+                    i -= left_size + 1;
+                    node = nodes_[node].right;
+                }
+            }
+        }
+
+        // Splits the tree rooted at node into the first count elements and the
+        // rest.
+        void split(size_t node, size_t count, size_t *left, size_t *right)
+        {
+            if (node == kNil)
+            {
+                *left = kNil;
+                *right = kNil;
+                return;
+            }
+            if (sizeOf(nodes_[node].left) < count)
+            {
+                split(nodes_[node].right, count - sizeOf(nodes_[node].left) - 1,
+                      &nodes_[node].right, right);
+                *left = node;
+            }
+            else
+            {
+                split(nodes_[node].left, count, left, &nodes_[node].left);
+                *right = node;
+            }
+            update(node);
+        }
+
+        // Concatenates two trees.
+        size_t merge(size_t left, size_t right)
+        {
+            if (left == kNil)
+                return right;
+            if (right == kNil)
+                return left;
+            if (nodes_[left].priority > nodes_[right].priority)
+            {
+                nodes_[left].right = merge(nodes_[left].right, right);
+                update(left);
+                return left;
+            }
+            nodes_[right].left = merge(left, nodes_[right].left);
+            update(right);
+            return right;
+        }
+
+        std::vector<Node> nodes_;
+        std::vector<size_t> free_;
+        size_t root_;
+        std::minstd_rand random_;
+    };
+
+} // namespace polygon_coverage_planning
+
+#endif // POLYGON_COVERAGE_GEOMETRY_INDEXED_SEQUENCE_H_
@@ -20,6 +20,8 @@
 #ifndef POLYGON_COVERAGE_GEOMETRY_SWEEP_H_
 #define POLYGON_COVERAGE_GEOMETRY_SWEEP_H_
 
+#include <memory>
+
 #include "cgal_definitions.h"
 #include "weakly_monotone.h"
 /* #include "polygon_coverage_geometry/visibility_graph.h" */
@@ -49,6 +51,47 @@ namespace polygon_coverage_planning
     bool findSweepSegment(const Polygon_2 &p, const Line_2 &l,
                           Segment_2 *sweep_segment);
 
+    // Finds the sweep segments of consecutive sweep lines with direction dir. The
+    // edges are sorted by their extent along the sweep normal and only the edges
+    // that cross the current line are intersected with it. The lines are expected
+    // to move to the left of dir, moving back is supported but collects the
+    // crossing edges again.
+    class SweepIntersector
+    {
+    public:
+        SweepIntersector(const Polygon_2 &p, const Direction_2 &dir);
+
+        // Same as findSweepSegment for a line with direction dir.
+        bool findSweepSegment(const Line_2 &l, Segment_2 *sweep_segment);
+
+    private:
+        struct Edge
+        {
+            Segment_2 segment;
+            FT lower;
+            FT upper;
+        };
+
+        // Position of a point along the sweep normal.
+        FT position(const Point_2 &p) const;
+
+        Direction_2 dir_;
+        std::vector<Edge> edges_; // Sorted by lower.
+        std::vector<size_t> active_;
+        size_t next_edge_;
+        bool has_position_;
+        FT position_;
+    };
+
+    // Returns the visibility graph of the polygon. The graphs of recently swept
+    // polygons are cached, so that repeated sweeps of the same cell share one graph.
+    std::shared_ptr<const visibility_graph::VisibilityGraph> getVisibilityGraph(const Polygon_2 &polygon);
+
+    // Number of cached visibility graphs.
+    size_t visibilityGraphCacheSize();
+
+    void clearVisibilityGraphCache();
+
     bool calculateShortestPath(const visibility_graph::VisibilityGraph &visibility_graph, const Point_2 &start, const Point_2 &goal, std::vector<Point_2> *shortest_path);
 
     // Sort vertices of polygon based on signed distance to line l.
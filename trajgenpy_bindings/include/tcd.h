@@ -0,0 +1,19 @@
+#ifndef POLYGON_COVERAGE_GEOMETRY_TCD_H_
+#define POLYGON_COVERAGE_GEOMETRY_TCD_H_
+
+#include "cgal_definitions.h"
+
+// Trapezoidal decomposition with vertical walls through every vertex, see CGAL's
+// Polygon_vertical_decomposition_2. It has more cells than the boustrophedon
+// decomposition, because it also splits at vertices where the cell stays connected.
+namespace polygon_coverage_planning {
+
+// Decompose the polygon into trapezoids with walls perpendicular to dir. Throws
+// std::runtime_error in the inexact kernel build, the decomposition requires
+// exact constructions.
+std::vector<Polygon_2> computeTCD(const PolygonWithHoles& polygon_in,
+                                  const Direction_2& dir);
+
+}  // namespace polygon_coverage_planning
+
+#endif  // POLYGON_COVERAGE_GEOMETRY_TCD_H_
@@ -21,10 +21,13 @@
 #define POLYGON_COVERAGE_GEOMETRY_VISIBILITY_GRAPH_H_
 
 #include <map>
+#include <memory>
+#include <mutex>
 
 #include "graph_base.h"
 
 #include "cgal_definitions.h"
+#include "visibility_polygon.h"
 
 namespace polygon_coverage_planning
 {
@@ -61,14 +64,18 @@ namespace polygon_coverage_planning
             // Compute the shortest path in a polygon with holes using A* and the
             // precomputed visibility graph.
             // If start or goal are outside the polygon, they are snapped (projected) back
-            // into it.
+            // into it. use_path_trees is as for the overload below.
             bool solve(const Point_2 &start, const Point_2 &goal,
-                       std::vector<Point_2> *waypoints) const;
+                       std::vector<Point_2> *waypoints,
+                       bool use_path_trees = true) const;
             // Same as solve but provide a precomputed visibility graph for the polygon.
             // Note: Start and goal need to be contained in the polygon_.
+            // With use_path_trees the query reuses the memoised shortest path trees of
+            // the nodes visible from start, otherwise it searches the graph with A*.
             bool solve(const Point_2 &start, const Polygon_2 &start_visibility_polygon,
                        const Point_2 &goal, const Polygon_2 &goal_visibility_polygon,
-                       std::vector<Point_2> *waypoints) const;
+                       std::vector<Point_2> *waypoints,
+                       bool use_path_trees = true) const;
 
             // Convenience function: addtionally adds original start and goal to shortest
             // path, if they were outside of polygon.
@@ -80,6 +87,11 @@ namespace polygon_coverage_planning
 
             inline PolygonWithHoles getPolygon() const { return polygon_; }
 
+            // Compute the visibility polygon of a point in the polygon, reusing the
+            // triangulation built for the graph vertices.
+            bool computeVisibility(const Point_2 &query_point,
+                                   Polygon_2 *visibility_polygon) const;
+
         private:
             // Adds all line of sight neighbors.
             // The graph is acyclic and undirected and thus forms a symmetric adjacency
@@ -97,11 +109,32 @@ namespace polygon_coverage_planning
             void findConvexHoleVertices(
                 std::vector<VertexConstCirculator> *convex_vertices) const;
 
+            // Find the graph nodes inside a visibility polygon.
+            std::vector<size_t> findVisibleNodes(const Polygon_2 &visibility) const;
+
+            // The shortest paths from one graph node to all others.
+            struct ShortestPathTree
+            {
+                std::vector<double> costs;
+                std::vector<size_t> came_from;
+            };
+            // Shortest path trees by source node, computed on their first query.
+            struct ShortestPathTrees
+            {
+                std::mutex mutex;
+                std::map<size_t, std::shared_ptr<const ShortestPathTree>> trees;
+            };
+            std::vector<std::shared_ptr<const ShortestPathTree>> getShortestPathTrees(
+                const std::vector<size_t> &sources) const;
+
             // Given two waypoints, compute its euclidean distance.
             double computeEuclideanSegmentCost(const Point_2 &from,
                                                const Point_2 &to) const;
 
             PolygonWithHoles polygon_;
+            // Shared between copies of the graph.
+            std::shared_ptr<const VisibilityPolygonComputer> visibility_computer_;
+            std::shared_ptr<ShortestPathTrees> shortest_path_trees_;
         };
 
     } // namespace visibility_graph
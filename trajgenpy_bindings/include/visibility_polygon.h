@@ -20,15 +20,35 @@
 #ifndef POLYGON_COVERAGE_GEOMETRY_VISIBILITY_POLYGON_H_
 #define POLYGON_COVERAGE_GEOMETRY_VISIBILITY_POLYGON_H_
 
+#include <memory>
+
 #include "cgal_definitions.h"
 
 namespace polygon_coverage_planning
 {
 
+    // Computes the visibility polygons of many query points in the same polygon.
+    // The arrangement, its triangulation and the point location structure are
+    // built once and shared by all queries. Queries are serialized internally.
+    class VisibilityPolygonComputer
+    {
+    public:
+        explicit VisibilityPolygonComputer(const PolygonWithHoles &pwh);
+        ~VisibilityPolygonComputer();
+
+        bool compute(const Point_2 &query_point, Polygon_2 *visibility_polygon) const;
+
+    private:
+        struct Impl;
+        std::unique_ptr<Impl> impl_;
+    };
+
     // Compute the visibility polygon given a point inside a strictly simple
     // polygon. Francisc Bungiu, Michael Hemmer, John Hershberger, Kan Huang, and
     // Alexander Kröller. Efficient computation of visibility polygons. CoRR,
     // abs/1403.3905, 2014.
+    // Builds a VisibilityPolygonComputer for a single query, prefer the class for
+    // repeated queries in the same polygon.
     bool computeVisibilityPolygon(const PolygonWithHoles &pwh,
                                   const Point_2 &query_point,
                                   Polygon_2 *visibility_polygon);
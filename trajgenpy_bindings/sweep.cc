@@ -19,9 +19,178 @@
 
 #include "sweep.h"
 
+#include <algorithm>
+#include <functional>
+#include <list>
+#include <mutex>
+
 #include "cgal_variant_compat.h"
 namespace polygon_coverage_planning
 {
+    namespace
+    {
+        struct CachedVisibilityGraph
+        {
+            size_t hash;
+            Polygon_2 polygon;
+            std::shared_ptr<const visibility_graph::VisibilityGraph> graph;
+        };
+
+        // Least recently used visibility graphs, most recent first.
+        const size_t kMaxCachedVisibilityGraphs = 64;
+        std::mutex visibility_graph_mutex;
+        std::list<CachedVisibilityGraph> visibility_graph_cache;
+
+        size_t hashPolygon(const Polygon_2 &polygon)
+        {
+            size_t hash = polygon.size();
+            std::hash<double> hasher;
+            for (VertexConstIterator it = polygon.vertices_begin(); it != polygon.vertices_end(); ++it)
+            {
+                hash ^= hasher(CGAL::to_double(it->x())) + 0x9e3779b97f4a7c15 + (hash << 6) + (hash >> 2);
+                hash ^= hasher(CGAL::to_double(it->y())) + 0x9e3779b97f4a7c15 + (hash << 6) + (hash >> 2);
+            }
+            return hash;
+        }
+
+        typedef CGAL::cpp11::result_of<Intersect_2(Segment_2, Line_2)>::type
+            Intersection;
+
+        void addIntersections(const Segment_2 &edge, const Line_2 &l,
+                              std::vector<Point_2> *intersections)
+        {
+            Intersection result = CGAL::intersection(edge, l);
+            if (result)
+            {
+                if (const Segment_2 *s = cgal_compat::get_variant<Segment_2>(&*result))
+                {
+                    intersections->push_back(s->source());
+                    intersections->push_back(s->target());
+                }
+                else
+                {
+                    intersections->push_back(*cgal_compat::get_variant<Point_2>(&*result));
+                }
+            }
+        }
+    } // namespace
+
+    SweepIntersector::SweepIntersector(const Polygon_2 &p, const Direction_2 &dir)
+        : dir_(dir), next_edge_(0), has_position_(false)
+    {
+        edges_.reserve(p.size());
+        for (EdgeConstIterator it = p.edges_begin(); it != p.edges_end(); ++it)
+        {
+            Edge edge;
+            edge.segment = *it;
+            edge.lower = position(it->source());
+            edge.upper = position(it->target());
+            if (edge.upper < edge.lower)
+            {
+                std::swap(edge.lower, edge.upper);
+            }
+            edges_.push_back(edge);
+        }
+        std::sort(edges_.begin(), edges_.end(),
+                  [](const Edge &a, const Edge &b) -> bool
+                  {
+                      return a.lower < b.lower;
+                  });
+    }
+
+    FT SweepIntersector::position(const Point_2 &p) const
+    {
+        // The signed distance to the line through the origin, scaled by the length of dir.
+        return dir_.dx() * p.y() - dir_.dy() * p.x();
+    }
+
+    bool SweepIntersector::findSweepSegment(const Line_2 &l, Segment_2 *sweep_segment)
+    {
+        const FT t = position(l.point(0));
+        if (has_position_ && t < position_)
+        {
+            // The line moved backwards, collect the active edges again.
+            active_.clear();
+            next_edge_ = 0;
+        }
+        position_ = t;
+        has_position_ = true;
+
+        // Activate the edges that start before the line.
+        while (next_edge_ < edges_.size() && edges_[next_edge_].lower <= t)
+        {
+            active_.push_back(next_edge_++);
+        }
+
+        // Deactivate the edges that end before the line and intersect the others.
+        std::vector<Point_2> intersections;
+        size_t i = 0;
+        while (i < active_.size())
+        {
+            const Edge &edge = edges_[active_[i]];
+            if (edge.upper < t)
+            {
+                active_[i] = active_.back();
+                active_.pop_back();
+                continue;
+            }
+            addIntersections(edge.segment, l, &intersections);
+            ++i;
+        }
+        if (intersections.empty())
+        {
+            return false;
+        }
+
+        Line_2 perp_l = l.perpendicular(l.point(0));
+        auto extremes = std::minmax_element(
+            intersections.begin(), intersections.end(),
+            [&perp_l](const Point_2 &a, const Point_2 &b) -> bool
+            {
+                return CGAL::has_smaller_signed_distance_to_line(perp_l, a, b);
+            });
+        *sweep_segment = Segment_2(*extremes.first, *extremes.second);
+        return true;
+    }
+
+    std::shared_ptr<const visibility_graph::VisibilityGraph> getVisibilityGraph(const Polygon_2 &polygon)
+    {
+        const size_t hash = hashPolygon(polygon);
+        {
+            std::lock_guard<std::mutex> lock(visibility_graph_mutex);
+            for (auto it = visibility_graph_cache.begin(); it != visibility_graph_cache.end(); ++it)
+            {
+                if (it->hash == hash && it->polygon == polygon)
+                {
+                    visibility_graph_cache.splice(visibility_graph_cache.begin(), visibility_graph_cache, it);
+                    return it->graph;
+                }
+            }
+        }
+
+        // Build the graph outside of the lock, other threads may sweep other polygons meanwhile.
+        auto graph = std::make_shared<const visibility_graph::VisibilityGraph>(polygon);
+
+        std::lock_guard<std::mutex> lock(visibility_graph_mutex);
+        visibility_graph_cache.push_front(CachedVisibilityGraph{hash, polygon, graph});
+        if (visibility_graph_cache.size() > kMaxCachedVisibilityGraphs)
+        {
+            visibility_graph_cache.pop_back();
+        }
+        return graph;
+    }
+
+    size_t visibilityGraphCacheSize()
+    {
+        std::lock_guard<std::mutex> lock(visibility_graph_mutex);
+        return visibility_graph_cache.size();
+    }
+
+    void clearVisibilityGraphCache()
+    {
+        std::lock_guard<std::mutex> lock(visibility_graph_mutex);
+        visibility_graph_cache.clear();
+    }
 
     bool computeSweep(
         const Polygon_2 &in,
@@ -44,8 +213,9 @@ namespace polygon_coverage_planning
         {
             throw std::runtime_error("Outer polygon is not counterclockwise oriented.");
         }
-        // Only define the visibility graph if we need to connect the sweeps
-        visibility_graph::VisibilityGraph visibility_graph(in);
+        // The visibility graph is only built once the first connection between two sweeps is needed
+        std::shared_ptr<const visibility_graph::VisibilityGraph> visibility_graph;
+        SweepIntersector intersector(in, dir);
 
         // Find start sweep.
         Line_2 sweep(Point_2(0.0, 0.0), dir);
@@ -57,7 +227,7 @@ namespace polygon_coverage_planning
         const CGAL::Aff_transformation_2<K> kOffset(CGAL::TRANSLATION, offset_vector);
 
         Segment_2 sweep_segment;
-        bool has_sweep_segment = findSweepSegment(in, sweep, &sweep_segment);
+        bool has_sweep_segment = intersector.findSweepSegment(sweep, &sweep_segment);
         while (has_sweep_segment)
         {
             // Align sweep segment.
@@ -68,8 +238,12 @@ namespace polygon_coverage_planning
 
             if (connect_sweeps && !sweep_segments.empty())
             {
+                if (!visibility_graph)
+                {
+                    visibility_graph = getVisibilityGraph(in);
+                }
                 std::vector<Point_2> shortest_path;
-                if (!calculateShortestPath(visibility_graph, waypoints.back(), sweep_segment.source(), &shortest_path))
+                if (!calculateShortestPath(*visibility_graph, waypoints.back(), sweep_segment.source(), &shortest_path))
                     return false;
                 // Create segments for all points except the first and last one.
                 for (std::vector<Point_2>::iterator it = std::next(shortest_path.begin()); it != std::prev(shortest_path.end()); ++it)
@@ -91,18 +265,18 @@ namespace polygon_coverage_planning
             sweep = sweep.transform(kOffset);
             // Find new sweep segment.
             Segment_2 prev_sweep_segment = counter_clockwise ? sweep_segment.opposite() : sweep_segment;
-            has_sweep_segment = findSweepSegment(in, sweep, &sweep_segment);
+            has_sweep_segment = intersector.findSweepSegment(sweep, &sweep_segment);
             // Add a final ssweep.
             if (!has_sweep_segment && !((!waypoints.empty() && *std::prev(waypoints.end(), 1) == sorted_pts.back()) || (waypoints.size() > 1 && *std::prev(waypoints.end(), 2) == sorted_pts.back())))
             {
                 sweep = Line_2(sorted_pts.back(), dir);
-                has_sweep_segment = findSweepSegment(in, sweep, &sweep_segment);
+                has_sweep_segment = intersector.findSweepSegment(sweep, &sweep_segment);
                 if (!has_sweep_segment)
                 {
                     throw std::runtime_error("Failed to calculate final sweep.");
                 }
                 // Do not add a sweep if it is half the offset, because then it has already been covered
-                if (sqrt(CGAL::squared_distance(sweep_segment, prev_sweep_segment).approx()) < offset.approx() / 2)
+                if (std::sqrt(CGAL::to_double(CGAL::squared_distance(sweep_segment, prev_sweep_segment))) < CGAL::to_double(offset) / 2)
                 {
                     break;
                 }
@@ -115,7 +289,7 @@ namespace polygon_coverage_planning
                 if (unobservable_point != sorted_pts.end())
                 {
                     sweep = Line_2(*unobservable_point, dir);
-                    has_sweep_segment = findSweepSegment(in, sweep, &sweep_segment);
+                    has_sweep_segment = intersector.findSweepSegment(sweep, &sweep_segment);
                     if (!has_sweep_segment)
                     {
                         // throw
@@ -200,24 +374,9 @@ namespace polygon_coverage_planning
     std::vector<Point_2> findIntersections(const Polygon_2 &p, const Line_2 &l)
     {
         std::vector<Point_2> intersections;
-        typedef CGAL::cpp11::result_of<Intersect_2(Segment_2, Line_2)>::type
-            Intersection;
-
         for (EdgeConstIterator it = p.edges_begin(); it != p.edges_end(); ++it)
         {
-            Intersection result = CGAL::intersection(*it, l);
-            if (result)
-            {
-                if (const Segment_2 *s = cgal_compat::get_variant<Segment_2>(&*result))
-                {
-                    intersections.push_back(s->source());
-                    intersections.push_back(s->target());
-                }
-                else
-                {
-                    intersections.push_back(*cgal_compat::get_variant<Point_2>(&*result));
-                }
-            }
+            addIntersections(*it, l, &intersections);
         }
 
         // Sort.
@@ -241,14 +400,14 @@ namespace polygon_coverage_planning
         shortest_path->clear();
 
         Polygon_2 start_visibility, goal_visibility;
-        if (!computeVisibilityPolygon(visibility_graph.getPolygon(), start, &start_visibility))
+        if (!visibility_graph.computeVisibility(start, &start_visibility))
         {
             std::cout << "Cannot compute visibility polygon from start query point "
                       << start
                       << " in polygon: " << visibility_graph.getPolygon() << std::endl;
             return false;
         }
-        if (!computeVisibilityPolygon(visibility_graph.getPolygon(), goal, &goal_visibility))
+        if (!visibility_graph.computeVisibility(goal, &goal_visibility))
         {
             std::cout << "Cannot compute visibility polygon from goal query point "
                       << goal
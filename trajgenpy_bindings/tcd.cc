@@ -0,0 +1,39 @@
+#include "tcd.h"
+
+#include <iterator>
+#include <stdexcept>
+
+#ifndef TRAJGENPY_INEXACT_KERNEL
+#include <CGAL/Polygon_vertical_decomposition_2.h>
+#endif
+
+#include "cgal_comm.h"
+
+namespace polygon_coverage_planning
+{
+
+    std::vector<Polygon_2> computeTCD(const PolygonWithHoles &polygon_in,
+                                      const Direction_2 &dir)
+    {
+#ifdef TRAJGENPY_INEXACT_KERNEL
+        throw std::runtime_error("The trapezoidal decomposition requires the exact kernel.");
+#else
+        // Rotate polygon to have direction aligned with x-axis, the walls are vertical.
+        PolygonWithHoles rotated_polygon = rotatePolygon(polygon_in, dir);
+
+        std::vector<Polygon_2> traps;
+        CGAL::Polygon_vertical_decomposition_2<K> decomposition;
+        decomposition(rotated_polygon, std::back_inserter(traps));
+
+        // Rotate back all polygons.
+        CGAL::Aff_transformation_2<K> rotation(CGAL::ROTATION, dir, 1, 1e9);
+        for (Polygon_2 &p : traps)
+        {
+            p = CGAL::transform(rotation, p);
+        }
+
+        return traps;
+#endif
+    }
+
+} // namespace polygon_coverage_planning
@@ -20,11 +20,57 @@
 #include "cgal_comm.h"
 #include "visibility_graph.h"
 #include "visibility_polygon.h"
+#include <algorithm>
 #include <cassert>
 namespace polygon_coverage_planning
 {
     namespace visibility_graph
     {
+        namespace
+        {
+            // Graphs up to this size answer queries from memoised shortest path trees
+            // of the nodes visible from the start, larger graphs search the graph for
+            // every query.
+            const size_t kMaxPathTreeNodes = 1000;
+            // At most this many trees are kept per graph, i.e. 32 * 16 bytes per node.
+            const size_t kMaxPathTrees = 32;
+
+            // Tests which points are inside a visibility polygon. Visible graph
+            // vertices are usually vertices of the visibility polygon, everything
+            // outside of its bounding box is not visible. Only the remaining
+            // candidates need the exact point in polygon test.
+            class VisibilityTest
+            {
+            public:
+                explicit VisibilityTest(const Polygon_2 &visibility)
+                    : visibility_(visibility),
+                      vertices_(visibility.vertices_begin(), visibility.vertices_end()),
+                      bbox_(visibility.bbox())
+                {
+                    std::sort(vertices_.begin(), vertices_.end());
+                }
+
+                bool operator()(const Point_2 &p) const
+                {
+                    if (std::binary_search(vertices_.begin(), vertices_.end(), p))
+                    {
+                        return true;
+                    }
+                    if (!CGAL::do_overlap(bbox_, p.bbox()))
+                    {
+                        return false;
+                    }
+                    return CGAL::bounded_side_2(visibility_.vertices_begin(),
+                                                visibility_.vertices_end(), p,
+                                                K()) != CGAL::ON_UNBOUNDED_SIDE;
+                }
+
+            private:
+                const Polygon_2 &visibility_;
+                std::vector<Point_2> vertices_;
+                CGAL::Bbox_2 bbox_;
+            };
+        } // namespace
 
         VisibilityGraph::VisibilityGraph(const PolygonWithHoles &polygon)
             : GraphBase(), polygon_(polygon)
@@ -42,12 +88,16 @@ namespace polygon_coverage_planning
             std::vector<VertexConstCirculator> graph_vertices;
             findConcaveOuterBoundaryVertices(&graph_vertices);
             findConvexHoleVertices(&graph_vertices);
+            graph_.reserve(graph_vertices.size() + 2);
 
+            // The arrangement and its triangulation are built once for all vertices.
+            visibility_computer_ = std::make_shared<const VisibilityPolygonComputer>(polygon_);
+            shortest_path_trees_ = std::make_shared<ShortestPathTrees>();
             for (const VertexConstCirculator &v : graph_vertices)
             {
                 // Compute visibility polygon.
                 Polygon_2 visibility;
-                if (!computeVisibilityPolygon(polygon_, *v, &visibility))
+                if (!visibility_computer_->compute(*v, &visibility))
                 {
                     std::cout << "Cannot compute visibility polygon." << std::endl;
                     return false;
@@ -114,17 +164,23 @@ namespace polygon_coverage_planning
             }
 
             const size_t new_id = graph_.size() - 1;
+            const NodeProperty *new_node_property = getNodeProperty(new_id);
+            if (new_node_property == nullptr)
+            {
+                std::cout << "Cannot access new node." << std::endl;
+                return false;
+            }
+
+            const VisibilityTest is_visible(new_node_property->visibility);
             for (size_t adj_id = 0; adj_id < new_id; ++adj_id)
             {
-                const NodeProperty *new_node_property = getNodeProperty(new_id);
                 const NodeProperty *adj_node_property = getNodeProperty(adj_id);
                 if (adj_node_property == nullptr)
                 {
                     std::cout << "Cannot access potential neighbor." << std::endl;
                     return false;
                 }
-                if (pointInPolygon(new_node_property->visibility,
-                                   adj_node_property->coordinates))
+                if (is_visible(adj_node_property->coordinates))
                 {
                     EdgeId forwards_edge_id(new_id, adj_id);
                     EdgeId backwards_edge_id(adj_id, new_id);
@@ -142,7 +198,8 @@ namespace polygon_coverage_planning
         }
 
         bool VisibilityGraph::solve(const Point_2 &start, const Point_2 &goal,
-                                    std::vector<Point_2> *waypoints) const
+                                    std::vector<Point_2> *waypoints,
+                                    bool use_path_trees) const
         {
             assert(waypoints);
             waypoints->clear();
@@ -157,22 +214,23 @@ namespace polygon_coverage_planning
 
             // Compute start and goal visibility polygon.
             Polygon_2 start_visibility, goal_visibility;
-            if (!computeVisibilityPolygon(polygon_, start_new, &start_visibility) ||
-                !computeVisibilityPolygon(polygon_, goal_new, &goal_visibility))
+            if (!computeVisibility(start_new, &start_visibility) ||
+                !computeVisibility(goal_new, &goal_visibility))
             {
                 return false;
             }
 
             // Find shortest path.
             return solve(start_new, start_visibility, goal_new, goal_visibility,
-                         waypoints);
+                         waypoints, use_path_trees);
         }
 
         bool VisibilityGraph::solve(const Point_2 &start,
                                     const Polygon_2 &start_visibility_polygon,
                                     const Point_2 &goal,
                                     const Polygon_2 &goal_visibility_polygon,
-                                    std::vector<Point_2> *waypoints) const
+                                    std::vector<Point_2> *waypoints,
+                                    bool use_path_trees) const
         {
             assert(waypoints);
             waypoints->clear();
@@ -189,35 +247,126 @@ namespace polygon_coverage_planning
                 return false;
             }
 
-            VisibilityGraph temp_visibility_graph = *this;
-            // Add start and goal node.
-            if (!temp_visibility_graph.addStartNode(
-                    NodeProperty(start, start_visibility_polygon)) ||
-                !temp_visibility_graph.addGoalNode(
-                    NodeProperty(goal, goal_visibility_polygon)))
-            {
-                return false;
-            }
-
             // Check if start and goal are in line of sight.
-            size_t start_idx = temp_visibility_graph.getStartIdx();
-            size_t goal_idx = temp_visibility_graph.getGoalIdx();
-            const NodeProperty *start_node_property =
-                temp_visibility_graph.getNodeProperty(start_idx);
-            if (start_node_property == nullptr)
+            if (pointInPolygon(start_visibility_polygon, goal))
             {
-                return false;
+                waypoints->push_back(start);
+                waypoints->push_back(goal);
+                return true;
             }
-            if (pointInPolygon(start_node_property->visibility, goal))
+
+            if (use_path_trees && shortest_path_trees_ != nullptr &&
+                graph_.size() <= kMaxPathTreeNodes)
             {
+                // Connect start and goal through the shortest path trees of the graph
+                // nodes the start sees.
+                const std::vector<size_t> start_nodes = findVisibleNodes(start_visibility_polygon);
+                const std::vector<size_t> goal_nodes = findVisibleNodes(goal_visibility_polygon);
+                const std::vector<std::shared_ptr<const ShortestPathTree>> trees =
+                    getShortestPathTrees(start_nodes);
+                std::vector<double> goal_costs(goal_nodes.size());
+                for (size_t j = 0; j < goal_nodes.size(); ++j)
+                {
+                    goal_costs[j] = computeEuclideanSegmentCost(
+                        getNodeProperty(goal_nodes[j])->coordinates, goal);
+                }
+
+                double best_cost = std::numeric_limits<double>::infinity();
+                size_t best_start = kNoNode, best_goal = kNoNode;
+                for (size_t i = 0; i < start_nodes.size(); ++i)
+                {
+                    const size_t start_node = start_nodes[i];
+                    const double start_cost = computeEuclideanSegmentCost(
+                        start, getNodeProperty(start_node)->coordinates);
+                    const std::vector<double> &costs = trees[i]->costs;
+                    for (size_t j = 0; j < goal_nodes.size(); ++j)
+                    {
+                        const double cost = start_cost + costs[goal_nodes[j]] + goal_costs[j];
+                        if (cost < best_cost)
+                        {
+                            best_cost = cost;
+                            best_start = i;
+                            best_goal = goal_nodes[j];
+                        }
+                    }
+                }
+                if (best_start == kNoNode)
+                {
+                    std::cout << "Could not find shortest path. Graph not fully connected."
+                              << std::endl;
+                    return false;
+                }
+
+                // Reconstruct waypoints.
                 waypoints->push_back(start);
-                waypoints->push_back(goal);
+                std::vector<Point_2> graph_waypoints;
+                if (!getWaypoints(reconstructSolution(trees[best_start]->came_from, best_goal),
+                                  &graph_waypoints))
+                {
+                    waypoints->clear();
+                    return false;
+                }
+                graph_waypoints.push_back(goal);
+                // Start or goal may coincide with a graph node.
+                for (const Point_2 &waypoint : graph_waypoints)
+                {
+                    if (waypoint != waypoints->back())
+                    {
+                        waypoints->push_back(waypoint);
+                    }
+                }
                 return true;
             }
 
-            // Find shortest way using A*.
-            Solution solution;
-            if (!temp_visibility_graph.solveAStar(start_idx, goal_idx, &solution))
+            // Search with A* on the shared compressed graph. Start and goal are appended
+            // as two nodes whose edges are kept apart, instead of copying the graph.
+            const size_t start_idx = graph_.size();
+            const size_t goal_idx = start_idx + 1;
+            CompressedGraph extension;
+            extension.offsets.reserve(goal_idx + 2);
+            extension.offsets.push_back(0);
+            std::vector<bool> sees_goal(start_idx, false);
+            for (size_t id : findVisibleNodes(goal_visibility_polygon))
+            {
+                sees_goal[id] = true;
+            }
+            for (size_t id = 0; id < start_idx; ++id)
+            {
+                if (sees_goal[id])
+                {
+                    extension.targets.push_back(goal_idx);
+                    extension.costs.push_back(computeEuclideanSegmentCost(
+                        getNodeProperty(id)->coordinates, goal));
+                }
+                extension.offsets.push_back(extension.targets.size());
+            }
+            for (size_t id : findVisibleNodes(start_visibility_polygon))
+            {
+                extension.targets.push_back(id);
+                extension.costs.push_back(computeEuclideanSegmentCost(
+                    start, getNodeProperty(id)->coordinates));
+            }
+            if (VisibilityTest(goal_visibility_polygon)(start))
+            {
+                extension.targets.push_back(goal_idx);
+                extension.costs.push_back(computeEuclideanSegmentCost(start, goal));
+            }
+            extension.offsets.push_back(extension.targets.size());
+            extension.offsets.push_back(extension.targets.size()); // The goal has no edges.
+
+            std::vector<double> heuristic_costs(goal_idx + 1);
+            for (size_t id = 0; id < start_idx; ++id)
+            {
+                heuristic_costs[id] = computeEuclideanSegmentCost(
+                    getNodeProperty(id)->coordinates, goal);
+            }
+            heuristic_costs[start_idx] = computeEuclideanSegmentCost(start, goal);
+            heuristic_costs[goal_idx] = 0.0;
+
+            std::vector<double> cost;
+            std::vector<size_t> came_from;
+            if (!search(*getCompressedGraph(), &extension, start_idx, goal_idx,
+                        &heuristic_costs, &cost, &came_from))
             {
                 std::cout << "Could not find shortest path. Graph not fully connected."
                           << std::endl;
@@ -225,7 +374,83 @@ namespace polygon_coverage_planning
             }
 
             // Reconstruct waypoints.
-            return temp_visibility_graph.getWaypoints(solution, waypoints);
+            for (size_t id : reconstructSolution(came_from, goal_idx))
+            {
+                if (id == start_idx)
+                    waypoints->push_back(start);
+                else if (id == goal_idx)
+                    waypoints->push_back(goal);
+                else
+                    waypoints->push_back(getNodeProperty(id)->coordinates);
+            }
+            return true;
+        }
+
+        bool VisibilityGraph::computeVisibility(const Point_2 &query_point,
+                                                Polygon_2 *visibility_polygon) const
+        {
+            if (visibility_computer_ == nullptr)
+            {
+                return computeVisibilityPolygon(polygon_, query_point, visibility_polygon);
+            }
+            return visibility_computer_->compute(query_point, visibility_polygon);
+        }
+
+        std::vector<size_t> VisibilityGraph::findVisibleNodes(
+            const Polygon_2 &visibility) const
+        {
+            const VisibilityTest is_visible(visibility);
+            std::vector<size_t> visible_nodes;
+            for (size_t id = 0; id < graph_.size(); ++id)
+            {
+                const NodeProperty *node_property = getNodeProperty(id);
+                if (node_property != nullptr && is_visible(node_property->coordinates))
+                {
+                    visible_nodes.push_back(id);
+                }
+            }
+            return visible_nodes;
+        }
+
+        std::vector<std::shared_ptr<const VisibilityGraph::ShortestPathTree>>
+        VisibilityGraph::getShortestPathTrees(const std::vector<size_t> &sources) const
+        {
+            std::vector<std::shared_ptr<const ShortestPathTree>> trees(sources.size());
+            std::vector<size_t> missing;
+            {
+                std::lock_guard<std::mutex> lock(shortest_path_trees_->mutex);
+                for (size_t i = 0; i < sources.size(); ++i)
+                {
+                    auto it = shortest_path_trees_->trees.find(sources[i]);
+                    if (it != shortest_path_trees_->trees.end())
+                        trees[i] = it->second;
+                    else
+                        missing.push_back(i);
+                }
+            }
+            if (missing.empty())
+                return trees;
+
+            // Solved outside of the lock, other threads may query other sources meanwhile.
+            std::vector<size_t> starts(missing.size());
+            for (size_t j = 0; j < missing.size(); ++j)
+                starts[j] = sources[missing[j]];
+            std::vector<std::vector<double>> costs;
+            std::vector<std::vector<size_t>> came_from;
+            solveDijkstraBatch(starts, &costs, &came_from);
+
+            std::lock_guard<std::mutex> lock(shortest_path_trees_->mutex);
+            if (shortest_path_trees_->trees.size() + missing.size() > kMaxPathTrees)
+                shortest_path_trees_->trees.clear();
+            for (size_t j = 0; j < missing.size(); ++j)
+            {
+                auto tree = std::make_shared<ShortestPathTree>();
+                tree->costs = std::move(costs[j]);
+                tree->came_from = std::move(came_from[j]);
+                trees[missing[j]] = tree;
+                shortest_path_trees_->trees.emplace(starts[j], tree);
+            }
+            return trees;
         }
 
         bool VisibilityGraph::getWaypoints(const Solution &solution,
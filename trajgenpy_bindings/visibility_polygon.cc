@@ -16,31 +16,45 @@
  * You should have received a copy of the GNU General Public License along with
  * this program.  If not, see <http://www.gnu.org/licenses/>.
  */
-
-#include <CGAL/Arr_naive_point_location.h>
 #include <CGAL/Arr_segment_traits_2.h>
+#include <CGAL/Arr_trapezoid_ric_point_location.h>
 #include <CGAL/Triangular_expansion_visibility_2.h>
 
+#include <mutex>
+
 #include "cgal_variant_compat.h"
 #include "cgal_comm.h"
 #include "visibility_polygon.h"
 namespace polygon_coverage_planning
 {
 
-    bool computeVisibilityPolygon(const PolygonWithHoles &pwh,
-                                  const Point_2 &query_point,
-                                  Polygon_2 *visibility_polygon)
-    {
-        assert(visibility_polygon);
+    typedef CGAL::Arr_segment_traits_2<K> VisibilityTraits;
+    typedef CGAL::Arrangement_2<VisibilityTraits> VisibilityArrangement;
+    typedef CGAL::Triangular_expansion_visibility_2<VisibilityArrangement,
+                                                    CGAL::Tag_true>
+        TEV;
+    typedef CGAL::Arr_trapezoid_ric_point_location<VisibilityArrangement> PointLocation;
+    typedef CGAL::Arr_point_location_result<VisibilityArrangement>::Type PLResult;
 
+    struct VisibilityPolygonComputer::Impl
+    {
+        VisibilityArrangement poly;
+        VisibilityArrangement::Face_const_handle main_face;
+        // Both hold a reference to the arrangement and are created once it is complete.
+        std::unique_ptr<TEV> tev;
+        std::unique_ptr<PointLocation> pl;
+        // The triangular expansion keeps state between queries.
+        std::mutex mutex;
+    };
+
+    VisibilityPolygonComputer::VisibilityPolygonComputer(const PolygonWithHoles &pwh)
+        : impl_(new Impl())
+    {
         // Preconditions.
-        assertm(pointInPolygon(pwh, query_point), "Query point not in polygon.");
         assertm(isStrictlySimple(pwh), "Polygon is not strictly simple.");
 
         // Create 2D arrangement.
-        typedef CGAL::Arr_segment_traits_2<K> VisibilityTraits;
-        typedef CGAL::Arrangement_2<VisibilityTraits> VisibilityArrangement;
-        VisibilityArrangement poly;
+        VisibilityArrangement &poly = impl_->poly;
         CGAL::insert(poly, pwh.outer_boundary().edges_begin(),
                      pwh.outer_boundary().edges_end());
         // Store main face.
@@ -49,28 +63,32 @@ namespace polygon_coverage_planning
         assertm(poly.number_of_faces() == 2,
                 "More than one bounded face in polygon.");
 
-        VisibilityArrangement::Face_const_handle main_face = poly.faces_begin();
-        while (main_face->is_unbounded())
+        impl_->main_face = poly.faces_begin();
+        while (impl_->main_face->is_unbounded())
         {
-            main_face++;
+            impl_->main_face++;
         }
 
         for (PolygonWithHoles::Hole_const_iterator hit = pwh.holes_begin();
              hit != pwh.holes_end(); ++hit)
             CGAL::insert(poly, hit->edges_begin(), hit->edges_end());
 
-        // Create Triangular Expansion Visibility object.
-        typedef CGAL::Triangular_expansion_visibility_2<VisibilityArrangement,
-                                                        CGAL::Tag_true>
-            TEV;
-        TEV tev(poly);
+        // Create Triangular Expansion Visibility object and the point location.
+        impl_->tev.reset(new TEV(poly));
+        impl_->pl.reset(new PointLocation(poly));
+    }
+
+    VisibilityPolygonComputer::~VisibilityPolygonComputer() = default;
+
+    bool VisibilityPolygonComputer::compute(const Point_2 &query_point,
+                                            Polygon_2 *visibility_polygon) const
+    {
+        assert(visibility_polygon);
+        std::lock_guard<std::mutex> lock(impl_->mutex);
 
         // We need to determine the halfedge or face to which the query point
         // corresponds.
-        typedef CGAL::Arr_naive_point_location<VisibilityArrangement> NaivePL;
-        typedef CGAL::Arr_point_location_result<VisibilityArrangement>::Type PLResult;
-        NaivePL pl(poly);
-        PLResult pl_result = pl.locate(query_point);
+        PLResult pl_result = impl_->pl->locate(query_point);
 
         VisibilityArrangement::Vertex_const_handle *v = nullptr;
         VisibilityArrangement::Halfedge_const_handle *e = nullptr;
@@ -82,26 +100,27 @@ namespace polygon_coverage_planning
         if ((f = cgal_compat::get_variant<VisibilityArrangement::Face_const_handle>(&pl_result)))
         {
             // Located in face.
-            fh = tev.compute_visibility(query_point, *f, visibility_arr);
+            fh = impl_->tev->compute_visibility(query_point, *f, visibility_arr);
         }
         else if ((v = cgal_compat::get_variant<VisibilityArrangement::Vertex_const_handle>(
                       &pl_result)))
         {
             // Located on vertex.
             // Search the incident halfedge that contains the polygon face.
-            VisibilityArrangement::Halfedge_const_handle he = poly.halfedges_begin();
-            while ((he->target()->point() != (*v)->point()) ||
-                   (he->face() != main_face))
+            // Only the halfedges around the vertex are candidates.
+            VisibilityArrangement::Halfedge_around_vertex_const_circulator first = (*v)->incident_halfedges();
+            VisibilityArrangement::Halfedge_around_vertex_const_circulator curr = first;
+            while (curr->face() != impl_->main_face)
             {
-                he++;
-                if (he == poly.halfedges_end())
+                if (++curr == first)
                 {
                     std::cout << "Vertex: " << (*v)->point() << std::endl;
                     return false;
                 }
             }
 
-            fh = tev.compute_visibility(query_point, he, visibility_arr);
+            VisibilityArrangement::Halfedge_const_handle he = curr;
+            fh = impl_->tev->compute_visibility(query_point, he, visibility_arr);
         }
         else if ((e = cgal_compat::get_variant<VisibilityArrangement::Halfedge_const_handle>(
                       &pl_result)))
@@ -109,8 +128,8 @@ namespace polygon_coverage_planning
             // Located on halfedge.
             // Find halfedge that has polygon interior as face.
             VisibilityArrangement::Halfedge_const_handle he =
-                (*e)->face() == main_face ? (*e) : (*e)->twin();
-            fh = tev.compute_visibility(query_point, he, visibility_arr);
+                (*e)->face() == impl_->main_face ? (*e) : (*e)->twin();
+            fh = impl_->tev->compute_visibility(query_point, he, visibility_arr);
         }
         else
         {
@@ -145,4 +164,12 @@ namespace polygon_coverage_planning
         return true;
     }
 
-} // namespace polygon_coverage_planning
\ No newline at end of file
+    bool computeVisibilityPolygon(const PolygonWithHoles &pwh,
+                                  const Point_2 &query_point,
+                                  Polygon_2 *visibility_polygon)
+    {
+        assertm(pointInPolygon(pwh, query_point), "Query point not in polygon.");
+        return VisibilityPolygonComputer(pwh).compute(query_point, visibility_polygon);
+    }
+
+} // namespace polygon_coverage_planning